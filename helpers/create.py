@@ -145,6 +145,9 @@ class ZyklopenkekseCreateApp(App):
                     id="python_version",
                     classes="form-input",
                 )
+            with Horizontal(classes="switch-row"):
+                yield Static("Free-threaded Python (experimental)", classes="switch-label")
+                yield Switch(value=False, id="python_free_threaded")
             with Horizontal(classes="form-row"):
                 yield Static("Node.js", classes="form-label")
                 yield Select(
@@ -204,6 +207,18 @@ class ZyklopenkekseCreateApp(App):
                     id="storage_backend",
                     classes="form-input",
                 )
+            with Horizontal(classes="form-row"):
+                yield Static("Memory Allocator", classes="form-label")
+                yield Select(
+                    [
+                        ("glibc malloc (default)", "glibc"),
+                        ("jemalloc", "jemalloc"),
+                        ("mimalloc", "mimalloc"),
+                    ],
+                    value="glibc",
+                    id="memory_allocator",
+                    classes="form-input",
+                )
             with Horizontal(classes="form-row"):
                 yield Static("CI Platform", classes="form-label")
                 yield Select(
@@ -397,11 +412,13 @@ class ZyklopenkekseCreateApp(App):
             "plone_version": _get_select("plone_version"),
             "volto_version": _get_select("volto_version"),
             "python_version": _get_select("python_version"),
+            "python_free_threaded": _get_switch("python_free_threaded"),
             "node_version": _get_select("node_version"),
             "pnpm_version": _get_select("pnpm_version"),
             "initial_user_password": _get_input("initial_user_password"),
             "include_frontend": _get_switch("include_frontend"),
             "storage_backend": _get_select("storage_backend"),
+            "memory_allocator": _get_select("memory_allocator"),
             "container_registry": _get_input("container_registry"),
             "ci_platform": _get_select("ci_platform"),
             "include_varnish": _get_switch("include_varnish"),
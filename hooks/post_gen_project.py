@@ -58,16 +58,81 @@ def main():
     # Remove conditional cdk8s files based on toggles
     cdk8s_dir = os.path.join(project_dir, "deployment", "cdk8s")
     if "{{ cookiecutter.include_cnpg }}" != "yes":
-        postgres_ts = os.path.join(cdk8s_dir, "postgres.ts")
-        if os.path.exists(postgres_ts):
-            os.remove(postgres_ts)
-            print("  Removed postgres.ts (CloudNativePG disabled)")
+        for name in ("postgres.ts", "postgres.test.ts"):
+            path = os.path.join(cdk8s_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"  Removed {name} (CloudNativePG disabled)")
 
     if "{{ cookiecutter.include_ingress }}" != "yes":
-        ingress_ts = os.path.join(cdk8s_dir, "ingress.ts")
-        if os.path.exists(ingress_ts):
-            os.remove(ingress_ts)
-            print("  Removed ingress.ts (Ingress disabled)")
+        for name in ("ingress.ts", "ingress.test.ts"):
+            ingress_ts = os.path.join(cdk8s_dir, name)
+            if os.path.exists(ingress_ts):
+                os.remove(ingress_ts)
+                print(f"  Removed {name} (Ingress disabled)")
+
+    if "{{ cookiecutter.include_varnish }}" != "yes":
+        for name in ("varnish.ts", "varnish.test.ts"):
+            varnish_ts = os.path.join(cdk8s_dir, name)
+            if os.path.exists(varnish_ts):
+                os.remove(varnish_ts)
+                print(f"  Removed {name} (Varnish disabled)")
+        varnish_dir = os.path.join(project_dir, "deployment", "varnish")
+        if os.path.isdir(varnish_dir):
+            shutil.rmtree(varnish_dir)
+            print("  Removed deployment/varnish/ (Varnish disabled)")
+
+    # Free-threaded Python tooling
+    if "{{ cookiecutter.python_free_threaded }}" != "yes":
+        scripts_dir = os.path.join(project_dir, "backend", "scripts")
+        for script in ("gil_check.py", "bench_threads.py"):
+            path = os.path.join(scripts_dir, script)
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"  Removed {script} (standard Python)")
+
+    # Background jobs need the PostgreSQL database of the ZODB
+    if "{{ cookiecutter.storage_backend }}" == "none":
+        package_dir = os.path.join(
+            project_dir,
+            "backend",
+            "src",
+            "{{ cookiecutter.organization }}",
+            "{{ cookiecutter.project_name }}",
+        )
+        for path in (
+            os.path.join(cdk8s_dir, "worker.ts"),
+            os.path.join(cdk8s_dir, "worker.test.ts"),
+            os.path.join(project_dir, "backend", "scripts", "worker.py"),
+            os.path.join(package_dir, "jobs.py"),
+            os.path.join(project_dir, "backend", "tests", "test_jobs.py"),
+            os.path.join(project_dir, "backend", "scripts", "db_report.py"),
+            os.path.join(project_dir, "backend", "tests", "test_db_report.py"),
+        ):
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"  Removed {os.path.basename(path)} (no PostgreSQL storage)")
+
+    # Allocator soak test
+    if "{{ cookiecutter.memory_allocator }}" == "glibc":
+        soak_rss = os.path.join(project_dir, "backend", "scripts", "soak_rss.py")
+        if os.path.exists(soak_rss):
+            os.remove(soak_rss)
+            print("  Removed soak_rss.py (glibc malloc)")
+
+    if "{{ cookiecutter.storage_backend }}" != "relstorage":
+        for name in ("pack.ts", "pack.test.ts", "readonly.ts", "readonly.test.ts"):
+            path = os.path.join(cdk8s_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"  Removed {name} (no RelStorage)")
+        for zodbstream in (
+            os.path.join(project_dir, "backend", "scripts", "zodbstream.py"),
+            os.path.join(project_dir, "backend", "tests", "test_zodbstream.py"),
+        ):
+            if os.path.exists(zodbstream):
+                os.remove(zodbstream)
+                print(f"  Removed {os.path.basename(zodbstream)} (no RelStorage)")
 
     # Remove unused CI files based on platform choice
     ci_platform = "{{ cookiecutter.ci_platform }}"
@@ -1,4 +1,7 @@
 """pytest-cookies fixtures for template testing."""
+import os
+import subprocess
+
 import pytest
 
 
@@ -27,3 +30,47 @@ def default_context():
 def no_frontend_context(default_context):
     """Template context without frontend (ClassicUI only)."""
     return {**default_context, "include_frontend": "no"}
+
+
+@pytest.fixture
+def run_entrypoint(tmp_path):
+    """Run a command of a generated deployment/entrypoint.sh.
+
+    The tools it calls are fakes on PATH that print their name and
+    arguments, the contents of file arguments and the variables the
+    entrypoint sets for them. ``up`` lists the URLs the fake wget reaches.
+    The image directories (/backend) do not exist here, so ``cd`` into them
+    is a no-op.
+    """
+    fakebin = tmp_path / "bin"
+    fakebin.mkdir()
+    for tool in (
+        "gunicorn", "make", "python", "wget", "zconsole", "zodbconvert", "zodbpack",
+    ):
+        fake = fakebin / tool
+        fake.write_text(
+            "#!/bin/bash\n"
+            'if [[ $(basename "$0") == wget ]]; then\n'
+            '    for url in $FAKE_UP; do [[ " $* " == *" $url "* ]] && exit 0; done\n'
+            "    exit 1\n"
+            "fi\n"
+            'echo "$(basename "$0") $*"\n'
+            'for a; do [[ -f "$a" ]] && cat "$a"; done\n'
+            "env | grep -E '^(LD_PRELOAD|WARMUP_ON_START)=' | sort\n"
+            "exit 0\n"
+        )
+        fake.chmod(0o755)
+
+    def run(project, *args, env=None, up=(), check=True):
+        environ = {
+            "PATH": f"{fakebin}:{os.environ['PATH']}",
+            "BASH_FUNC_cd%%": '() { builtin cd "$@" 2>/dev/null || true; }',
+            "FAKE_UP": " ".join(up),
+            **(env or {}),
+        }
+        return subprocess.run(
+            ["bash", str(project / "deployment" / "entrypoint.sh"), *args],
+            env=environ, capture_output=True, text=True, check=check,
+        )
+
+    return run
@@ -1,5 +1,6 @@
 """Test backend template content."""
 import json
+from xml.etree import ElementTree
 
 import yaml
 
@@ -127,3 +128,75 @@ def test_yaml_valid(cookies, default_context):
     result = cookies.bake(extra_context=default_context)
     for yaml_file in result.project_path.rglob("*.yaml"):
         yaml.safe_load(yaml_file.read_text())
+
+
+def test_parallel_test_support(cookies, default_context):
+    """Backend supports pytest-xdist workers and duration-based shards."""
+    result = cookies.bake(extra_context=default_context)
+    backend = result.project_path / "backend"
+    pyproject = (backend / "pyproject.toml").read_text()
+    assert '"pytest-xdist"' in pyproject
+    assert '"pytest-split"' in pyproject
+    include_mk = (backend / "include.mk").read_text()
+    assert "test-parallel:" in include_mk
+    assert "--dist loadgroup" in include_mk
+    conftest = (backend / "tests" / "conftest.py").read_text()
+    assert "pytest.mark.xdist_group(layer)" in conftest
+    assert "--splits $(TEST_SPLITS) --group $(TEST_GROUP)" in include_mk
+    assert "--store-durations" in include_mk
+
+
+def test_health_views(cookies):
+    """Backend package registers liveness and readiness views on the Zope root."""
+    result = cookies.bake(extra_context={
+        "organization": "kup",
+        "project_name": "tfv",
+    })
+    backend = result.project_path / "backend"
+    assert (backend / "src" / "kup" / "tfv" / "health.py").exists()
+    # The views are tested in the project (make test)
+    assert (backend / "tests" / "test_health.py").exists()
+
+
+def test_cache_warmup(cookies):
+    """Backend ships a cache warm-up, runnable on start and as a script."""
+    result = cookies.bake(extra_context={
+        "organization": "kup",
+        "project_name": "tfv",
+    })
+    backend = result.project_path / "backend"
+    package = backend / "src" / "kup" / "tfv"
+    zcml = (package / "configure.zcml").read_text()
+    assert 'handler=".warmup.warmup_on_start"' in zcml
+    assert "zope-warmup:" in (backend / "include.mk").read_text()
+    assert (backend / "tests" / "test_warmup.py").exists()
+
+
+def test_cache_purging(cookies):
+    """Backend installs plone.app.caching and purges the configured proxies."""
+    result = cookies.bake(extra_context={
+        "organization": "kup",
+        "project_name": "tfv",
+    })
+    backend = result.project_path / "backend"
+    package = backend / "src" / "kup" / "tfv"
+    assert '"plone.app.caching"' in (backend / "pyproject.toml").read_text()
+    metadata = (package / "profiles" / "default" / "metadata.xml").read_text()
+    assert "profile-plone.app.caching:default" in metadata
+    # The settings from CACHE_PURGE_PROXIES are tested in the backend
+    assert (backend / "tests" / "test_purging.py").exists()
+
+
+def test_caching_rules(cookies):
+    """Default profile ships caching rules, covered by integration tests."""
+    result = cookies.bake(extra_context={
+        "organization": "kup",
+        "project_name": "tfv",
+    })
+    backend = result.project_path / "backend"
+    registry = ElementTree.parse(
+        backend / "src" / "kup" / "tfv" / "profiles" / "default" / "registry"
+        / "caching.xml"
+    ).getroot()
+    assert registry.tag == "registry"
+    assert (backend / "tests" / "test_caching.py").exists()
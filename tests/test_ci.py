@@ -2,6 +2,8 @@
 import tempfile
 from pathlib import Path
 
+import yaml
+
 from helpers.generate import generate_project
 
 
@@ -154,3 +156,139 @@ def test_gitlab_ci_has_python_version():
         )
         ci = (Path(result) / ".gitlab-ci.yml").read_text()
         assert "python:3.13" in ci
+
+
+def test_github_ci_path_filters():
+    """GitHub CI computes affected areas and skips unaffected jobs."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {"organization": "testorg", "project_name": "testproject"},
+            output_dir=tmpdir,
+        )
+        ci = (Path(result) / ".github" / "workflows" / "ci.yml").read_text()
+        assert "dorny/paths-filter" in ci
+        filters = yaml.safe_load(
+            yaml.safe_load(ci)["jobs"]["changes"]["steps"][1]["with"]["filters"]
+        )
+        # backend-test builds a stage of the image
+        assert "Dockerfile" in filters["backend"]
+        assert "deployment/entrypoint.sh" in filters["backend"]
+        assert "needs.changes.outputs.backend == 'true'" in ci
+        assert "needs.changes.outputs.frontend == 'true'" in ci
+        assert "needs.changes.outputs.image == 'true'" in ci
+        assert "deployment/cdk8s/**" in ci
+
+
+def test_github_ci_merge_gate():
+    """GitHub CI has a gate job that tolerates skipped jobs."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {"organization": "testorg", "project_name": "testproject"},
+            output_dir=tmpdir,
+        )
+        ci = yaml.safe_load(
+            (Path(result) / ".github" / "workflows" / "ci.yml").read_text()
+        )
+        gate = ci["jobs"]["ci-passed"]
+        assert gate["if"] == "always()"
+        assert "backend-test" in gate["needs"]
+        assert "frontend-test" in gate["needs"]
+        build = ci["jobs"]["build-image"]
+        assert "ci-passed" in build["needs"]
+        # Runs after skipped area jobs too, as long as the gate passed
+        assert build["if"].startswith("${{ !cancelled() && needs.ci-passed.result == 'success'")
+
+
+def merge_request_rule():
+    return {"if": '$CI_PIPELINE_SOURCE == "merge_request_event"'}
+
+
+def test_gitlab_ci_change_rules():
+    """GitLab CI only runs jobs for changed areas and has a gate job."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {
+                "organization": "testorg",
+                "project_name": "testproject",
+                "ci_platform": "gitlab",
+            },
+            output_dir=tmpdir,
+        )
+        ci = yaml.safe_load((Path(result) / ".gitlab-ci.yml").read_text())
+        merge_request, branch = ci["test-backend"]["rules"]
+        assert merge_request["if"] == '$CI_PIPELINE_SOURCE == "merge_request_event"'
+        assert "backend/**/*" in merge_request["changes"]["paths"]
+        assert "Dockerfile" in merge_request["changes"]["paths"]
+        assert "$CI_MERGE_REQUEST_TARGET_BRANCH_NAME" in merge_request["changes"]["compare_to"]
+        assert "backend/**/*" in branch["changes"]
+        assert "frontend/**/*" in ci["lint-frontend"]["rules"][1]["changes"]
+        assert "Dockerfile" in ci["build-image"]["rules"][0]["changes"]
+        assert ci["ci-passed"]["stage"] == "gate"
+        assert ci["ci-passed"]["rules"][0] == merge_request_rule()
+        assert ci["workflow"]["rules"][0] == merge_request_rule()
+
+
+def test_github_ci_backend_test_shards():
+    """GitHub CI shards backend tests across a configurable matrix."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {"organization": "testorg", "project_name": "testproject"},
+            output_dir=tmpdir,
+        )
+        ci = (Path(result) / ".github" / "workflows" / "ci.yml").read_text()
+        assert "vars.BACKEND_TEST_SHARDS" in ci
+        assert "TEST_SPLITS=${{ strategy.job-total }}" in ci
+        assert "TEST_GROUP=${{ matrix.shard }}" in ci
+
+
+def test_gitlab_ci_backend_test_shards():
+    """GitLab CI shards backend tests with parallel job indices."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {
+                "organization": "testorg",
+                "project_name": "testproject",
+                "ci_platform": "gitlab",
+            },
+            output_dir=tmpdir,
+        )
+        ci = (Path(result) / ".gitlab-ci.yml").read_text()
+        assert "TEST_SPLITS=${CI_NODE_TOTAL:-1}" in ci
+        assert "TEST_GROUP=${CI_NODE_INDEX:-1}" in ci
+
+
+def test_github_ci_backend_tests_in_image_build():
+    """GitHub CI runs backend tests in the backend-test image stage."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {"organization": "testorg", "project_name": "testproject"},
+            output_dir=tmpdir,
+        )
+        ci = yaml.safe_load(
+            (Path(result) / ".github" / "workflows" / "ci.yml").read_text()
+        )
+        test_build = ci["jobs"]["backend-test"]["steps"][-1]["with"]
+        assert test_build["target"] == "backend-test"
+        assert test_build["cache-to"] == "type=gha,scope=backend,mode=max"
+        image_build = ci["jobs"]["build-image"]["steps"][-1]["with"]
+        assert "type=gha,scope=backend" in image_build["cache-from"]
+
+
+def test_gitlab_ci_backend_tests_in_image_build():
+    """GitLab CI runs backend tests in the backend-test image stage."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {
+                "organization": "testorg",
+                "project_name": "testproject",
+                "ci_platform": "gitlab",
+            },
+            output_dir=tmpdir,
+        )
+        ci = yaml.safe_load((Path(result) / ".gitlab-ci.yml").read_text())
+        test_script = ci["test-backend"]["script"][0]
+        assert "--target backend-test" in test_script
+        assert "--cache-to type=registry,ref=$IMAGE:buildcache" in test_script
+        assert "--cache-from type=registry,ref=$IMAGE:buildcache" in (
+            ci["build-image"]["script"][0]
+        )
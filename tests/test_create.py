@@ -192,11 +192,13 @@ async def test_collect_values_all_fields(app, mock_versions):
             "plone_version",
             "volto_version",
             "python_version",
+            "python_free_threaded",
             "node_version",
             "pnpm_version",
             "initial_user_password",
             "include_frontend",
             "storage_backend",
+            "memory_allocator",
             "container_registry",
             "ci_platform",
             "include_varnish",
@@ -1,7 +1,13 @@
 """Tests for deployment/cdk8s template files."""
 import json
+import os
+import re
+import subprocess
 import tempfile
 from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
 
 from helpers.generate import generate_project
 
@@ -91,6 +97,10 @@ def test_cdk8s_no_varnish():
             Path(result) / "deployment" / "cdk8s" / "main.ts"
         ).read_text()
         assert "PloneHttpcache" not in main_ts
+        assert not (Path(result) / "deployment" / "varnish").exists()
+        assert not (Path(result) / "deployment" / "cdk8s" / "varnish.ts").exists()
+        assert not (Path(result) / "deployment" / "cdk8s" / "varnish.test.ts").exists()
+        assert "varnish-test" not in (Path(result) / "Makefile").read_text()
 
 
 def test_cdk8s_no_ingress():
@@ -107,8 +117,8 @@ def test_cdk8s_no_ingress():
         cdk8s = Path(result) / "deployment" / "cdk8s"
         main_ts = (cdk8s / "main.ts").read_text()
         assert "PloneIngress" not in main_ts
-        # ingress.ts is removed by post_gen hook, but hook may not run
-        # in this test context, so we only check main.ts content
+        assert not (cdk8s / "ingress.ts").exists()
+        assert not (cdk8s / "ingress.test.ts").exists()
 
 
 def test_cdk8s_no_cnpg():
@@ -197,3 +207,188 @@ def test_cdk8s_main_ts_has_plone_construct():
         assert "new Plone(" in main_ts
         assert "start-backend" in main_ts
         assert "start-frontend" in main_ts
+
+
+def test_cdk8s_probes():
+    """main.ts sets startup, readiness and liveness probes on both roles."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {"organization": "testorg", "project_name": "testproject"},
+            output_dir=tmpdir,
+        )
+        cdk8s = Path(result) / "deployment" / "cdk8s"
+        # addHttpProbes is tested in patches.test.ts (npm test)
+        assert "addHttpProbes(" in (cdk8s / "patches.test.ts").read_text()
+        main_ts = (cdk8s / "main.ts").read_text()
+        assert "readyPath: '/@@ready'" in main_ts
+        assert "readyPath: '/health/ready'" in main_ts
+
+
+def test_cdk8s_warmup_on_start():
+    """Backend pods warm their caches before serving."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {"organization": "testorg", "project_name": "testproject"},
+            output_dir=tmpdir,
+        )
+        main_ts = (
+            Path(result) / "deployment" / "cdk8s" / "main.ts"
+        ).read_text()
+        assert "env.addVariable('WARMUP_ON_START'" in main_ts
+
+
+def test_cdk8s_tuning_from_limits():
+    """Backend tuning variables are derived from the resource limits."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {"organization": "testorg", "project_name": "testproject"},
+            output_dir=tmpdir,
+        )
+        cdk8s = Path(result) / "deployment" / "cdk8s"
+        # main.test.ts synthesizes the chart and checks the derived values
+        assert (cdk8s / "main.test.ts").exists()
+        assert "backendTuning(" in (cdk8s / "main.ts").read_text()
+
+
+def test_cdk8s_autoscaling():
+    """Autoscalers are emitted when a maximum above the replicas is set."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {"organization": "testorg", "project_name": "testproject"},
+            output_dir=tmpdir,
+        )
+        cdk8s = Path(result) / "deployment" / "cdk8s"
+        # autoscaling.test.ts and main.test.ts synthesize the autoscalers
+        assert (cdk8s / "autoscaling.test.ts").exists()
+        env_example = (cdk8s / ".env.example").read_text()
+        assert "BACKEND_MAX_REPLICAS=" in env_example
+
+
+def test_cdk8s_sizing_presets():
+    """SIZE presets set resources of all roles; all get PDBs and spreading."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {"organization": "testorg", "project_name": "testproject"},
+            output_dir=tmpdir,
+        )
+        cdk8s = Path(result) / "deployment" / "cdk8s"
+        # sizing, patches and main tests cover the presets, budgets and spreading
+        for name in ("sizing.test.ts", "patches.test.ts", "main.test.ts"):
+            assert (cdk8s / name).exists()
+        assert "enablePdb: true" in (cdk8s / "postgres.ts").read_text()
+        assert "SIZE=medium" in (cdk8s / ".env.example").read_text()
+
+
+def test_cdk8s_pgbouncer_pooler():
+    """PG_POOLER adds a CNPG Pooler the database DSN points at."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {"organization": "testorg", "project_name": "testproject"},
+            output_dir=tmpdir,
+        )
+        cdk8s = Path(result) / "deployment" / "cdk8s"
+        # postgres.test.ts and main.test.ts synthesize the pooler
+        assert "describe('pooler'" in (cdk8s / "main.test.ts").read_text()
+        assert "PG_POOLER=" in (cdk8s / ".env.example").read_text()
+
+
+def test_cdk8s_postgres_tuning():
+    """PostgreSQL parameters derive from resources and a workload profile."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {
+                "organization": "testorg",
+                "project_name": "testproject",
+                "storage_backend": "pgjsonb",
+            },
+            output_dir=tmpdir,
+        )
+        cdk8s = Path(result) / "deployment" / "cdk8s"
+        assert "process.env.PG_PROFILE ?? 'jsonb'" in (cdk8s / "main.ts").read_text()
+        package = json.loads((cdk8s / "package.json").read_text())
+        assert package["scripts"]["test"] == "jest"
+        assert (cdk8s / "postgres.test.ts").exists()
+
+
+def test_cdk8s_no_cnpg_no_postgres_test():
+    """Without CNPG the cluster snapshot test is removed with postgres.ts."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {
+                "organization": "testorg",
+                "project_name": "testproject",
+                "include_cnpg": "no",
+            },
+            output_dir=tmpdir,
+        )
+        cdk8s = Path(result) / "deployment" / "cdk8s"
+        assert not (cdk8s / "postgres.test.ts").exists()
+        assert (cdk8s / "sizing.test.ts").exists()
+
+
+@pytest.mark.parametrize("frontend", ["yes", "no"])
+def test_varnish_vcl(frontend, tmp_path):
+    """The VCL is versioned in deployment/varnish/ and rendered by main.ts.
+
+    The rendering, the cache storage and the static paths of the ingress are
+    tested in the chart (varnish.test.ts, ingress.test.ts, main.test.ts), the
+    VCL by the varnishtest cases.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = generate_project(
+            {
+                "organization": "testorg",
+                "project_name": "testproject",
+                "include_frontend": frontend,
+            },
+            output_dir=tmpdir,
+        )
+        varnish = Path(result) / "deployment" / "varnish"
+        vcl = (varnish / "plone.vcl").read_text()
+        assert vcl.startswith("vcl 4.1;")
+        assert ("plone_frontend" in vcl) == (frontend == "yes")
+        assert (Path(result) / "deployment" / "cdk8s" / "varnish.test.ts").exists()
+        # test.sh renders the VCL for the test servers and runs the cases
+        rendered = run_varnish_tests(varnish, tmp_path, VARNISH_GRACE="2h")
+        assert sorted(Path(arg).name for arg in rendered.args if arg.endswith(".vtc")) == [
+            "anonymous.vtc", "authenticated.vtc", "grace.vtc", "purge.vtc", "shard.vtc",
+            "static.vtc",
+        ]
+        assert not re.search(r"\$\{[A-Z_]+\}|\{\{", rendered.vcl)
+        assert "set beresp.grace = 2h;" in rendered.vcl
+        assert "set beresp.keep = 1d;" in rendered.vcl
+        assert "127.0.0.1" in rendered.vcl
+        assert "backend shard1" not in rendered.vcl
+        # With the Varnish pods of kube-httpcache filled in, for shard.vtc
+        assert not re.search(r"\$\{[A-Z_]+\}|\{\{", rendered.shard_vcl)
+        assert "shard1_port=16081" in rendered.args
+        for pod, port in (("shard1", 16081), ("shard2", 16082)):
+            assert f'backend {pod} {{\n    .host = "127.0.0.1";\n    .port = "{port}";' in rendered.shard_vcl
+            assert f"shard.add_backend({pod});" in rendered.shard_vcl
+
+
+def run_varnish_tests(varnish, tmp_path, **env):
+    """Run deployment/varnish/test.sh with a fake varnishtest.
+
+    Returns its arguments and the rendered VCL, single and sharded.
+    """
+    fakebin = tmp_path / "bin"
+    fakebin.mkdir()
+    fake = fakebin / "varnishtest"
+    fake.write_text(
+        "#!/bin/bash\n"
+        'printf "%s\\n" "$@"\n'
+        'for a; do [[ $a == *vcl=* ]] && cp "${a#*=}" "$FAKE_OUT/${a%%=*}"; done\n'
+        "exit 0\n"
+    )
+    fake.chmod(0o755)
+    result = subprocess.run(
+        ["bash", str(varnish / "test.sh")],
+        env={**os.environ, "PATH": f"{fakebin}:{os.environ['PATH']}", "FAKE_OUT": str(tmp_path), **env},
+        capture_output=True, text=True, check=True,
+    )
+    return SimpleNamespace(
+        args=result.stdout.splitlines(),
+        vcl=(tmp_path / "vcl").read_text(),
+        shard_vcl=(tmp_path / "shard_vcl").read_text(),
+    )
@@ -1,4 +1,15 @@
 """Test Dockerfile and deployment template content."""
+import http.server
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import sysconfig
+import threading
+
+import pytest
+import yaml
 
 
 def test_dockerfile_uses_correct_python(cookies):
@@ -83,3 +94,307 @@ def test_entrypoint_no_frontend(cookies, no_frontend_context):
     content = (result.project_path / "deployment" / "entrypoint.sh").read_text()
     assert "start-backend" in content
     assert "start-frontend" not in content
+
+
+def test_dockerfile_backend_test_stage(cookies, default_context):
+    """Dockerfile has an optional test stage on top of backend-build."""
+    result = cookies.bake(extra_context=default_context)
+    content = (result.project_path / "Dockerfile").read_text()
+    assert "FROM backend-build AS backend-test" in content
+    assert 'uv pip install -c constraints-mxdev.txt -e ".[test]"' in content
+    assert "make test-parallel" in content
+    # The runtime image is still built from backend-build, not the test stage
+    assert "COPY --from=backend-test" not in content
+
+
+def test_healthcheck_probes_server(cookies, default_context):
+    """Image HEALTHCHECK probes the running server via the entrypoint."""
+    result = cookies.bake(extra_context=default_context)
+    dockerfile = (result.project_path / "Dockerfile").read_text()
+    assert 'CMD ["/deployment/entrypoint.sh", "healthcheck"]' in dockerfile
+
+
+@pytest.mark.parametrize(
+    ("frontend", "up", "healthy"),
+    [
+        ("yes", ["http://127.0.0.1:8080/@@health"], True),
+        ("yes", ["http://127.0.0.1:3000/health"], True),
+        ("yes", [], False),
+        ("no", ["http://127.0.0.1:8080/@@health"], True),
+        ("no", ["http://127.0.0.1:3000/health"], False),
+    ],
+)
+def test_healthcheck(cookies, default_context, run_entrypoint, frontend, up, healthy):
+    """healthcheck succeeds if the server of the container answers."""
+    result = cookies.bake(extra_context={**default_context, "include_frontend": frontend})
+    healthcheck = run_entrypoint(result.project_path, "healthcheck", up=up, check=False)
+    assert (healthcheck.returncode == 0) == healthy
+
+
+def test_entrypoint_warmup(cookies, default_context, run_entrypoint, tmp_path):
+    """warmup fills the storage caches in a process of its own."""
+    result = cookies.bake(extra_context=default_context)
+    warmup = run_entrypoint(result.project_path, "warmup", env={
+        "WARMUP_ON_START": "true",
+        "INSTANCE_db_blobs_location": str(tmp_path / "blobs"),
+        "INSTANCE_db_relstorage_cache_local_dir": str(tmp_path / "cache"),
+    })
+    # Only the separate process warms the storage; no second warm-up on start
+    assert warmup.stdout.splitlines()[-2:] == [
+        "make zope-warmup", "WARMUP_ON_START=false",
+    ]
+
+
+def test_tuning_knobs(cookies, default_context):
+    """Threads, pool and cache sizes are set in the image and instance.yaml."""
+    result = cookies.bake(extra_context=default_context)
+    dockerfile = (result.project_path / "Dockerfile").read_text()
+    instance = yaml.safe_load(
+        (result.project_path / "backend" / "instance.yaml").read_text()
+    )["default_context"]
+    for name in ("wsgi_threads", "db_pool_size", "db_cache_size", "db_cache_size_bytes"):
+        assert f"ENV INSTANCE_{name}=" in dockerfile
+        assert name in instance
+
+
+@pytest.mark.parametrize(
+    "environ,command",
+    [
+        ({"WSGI_SERVER": "waitress"}, "make zope-start"),
+        (
+            {"WSGI_SERVER": "gunicorn", "WSGI_WORKERS": "3"},
+            "gunicorn --paste /app/etc/zope.ini --bind 0.0.0.0:8080 --workers 3"
+            " --threads 4 --timeout 120 --graceful-timeout 30",
+        ),
+    ],
+)
+def test_entrypoint_wsgi_server(
+    cookies, default_context, run_entrypoint, tmp_path, environ, command,
+):
+    """start-backend runs waitress or a gunicorn prefork server."""
+    result = cookies.bake(extra_context=default_context)
+    backend = run_entrypoint(result.project_path, "start-backend", env={
+        "INSTANCE_target": "/app",
+        "INSTANCE_wsgi_threads": "4",
+        "INSTANCE_db_blobs_location": str(tmp_path / "blobs"),
+        "MEMORY_PER_WORKER_MB": "768",
+        **environ,
+    })
+    assert command in backend.stdout.splitlines()
+    pyproject = (result.project_path / "backend" / "pyproject.toml").read_text()
+    assert '"gunicorn"' in pyproject
+
+
+def test_entrypoint_gunicorn_workers(cookies, default_context, run_entrypoint, tmp_path):
+    """Without WSGI_WORKERS, gunicorn runs a process per CPU, at least one."""
+    result = cookies.bake(extra_context=default_context)
+    backend = run_entrypoint(result.project_path, "start-backend", env={
+        "WSGI_SERVER": "gunicorn",
+        "INSTANCE_db_blobs_location": str(tmp_path / "blobs"),
+        "MEMORY_PER_WORKER_MB": "768",
+    })
+    gunicorn = next(line for line in backend.stdout.splitlines() if line.startswith("gunicorn "))
+    workers = int(gunicorn.split("--workers ")[1].split()[0])
+    assert 1 <= workers <= os.cpu_count()
+
+
+def test_entrypoint_gunicorn_filestorage(cookies, default_context, run_entrypoint, tmp_path):
+    """On FileStorage, gunicorn runs one process and refuses more."""
+    ctx = {**default_context, "storage_backend": "none"}
+    result = cookies.bake(extra_context=ctx)
+    env = {
+        "WSGI_SERVER": "gunicorn",
+        "INSTANCE_target": "/app",
+        "INSTANCE_wsgi_threads": "4",
+        "INSTANCE_db_blobs_location": str(tmp_path / "blobs"),
+    }
+    backend = run_entrypoint(result.project_path, "start-backend", env=env)
+    assert "--workers 1" in backend.stdout
+    backend = run_entrypoint(
+        result.project_path, "start-backend", env={**env, "WSGI_WORKERS": "2"}, check=False,
+    )
+    assert backend.returncode == 1
+    assert "FileStorage allows one process" in backend.stderr
+    assert "gunicorn --paste" not in backend.stdout
+    assert "default_workers" not in (result.project_path / "deployment" / "entrypoint.sh").read_text()
+
+
+def test_entrypoint_unknown_wsgi_server(cookies, default_context, run_entrypoint, tmp_path):
+    """start-backend fails on an unknown WSGI_SERVER."""
+    result = cookies.bake(extra_context=default_context)
+    backend = run_entrypoint(result.project_path, "start-backend", env={
+        "WSGI_SERVER": "uwsgi",
+        "INSTANCE_db_blobs_location": str(tmp_path / "blobs"),
+    }, check=False)
+    assert backend.returncode == 1
+    assert "Unknown WSGI_SERVER 'uwsgi'" in backend.stderr
+
+
+def test_free_threaded_python(cookies, default_context, run_entrypoint):
+    """The free-threaded option builds on 3.13t and ships the GIL tooling."""
+    ctx = {**default_context, "python_free_threaded": "yes"}
+    result = cookies.bake(extra_context=ctx)
+    dockerfile = (result.project_path / "Dockerfile").read_text()
+    assert "ARG PYTHON_BUILD=t" in dockerfile
+    assert "build-image-gil:" in (result.project_path / "Makefile").read_text()
+    gil_check = run_entrypoint(result.project_path, "gil-check")
+    assert "python /backend/scripts/gil_check.py" in gil_check.stdout.splitlines()
+
+
+@pytest.fixture
+def free_threaded_scripts(cookies, default_context):
+    ctx = {**default_context, "python_free_threaded": "yes"}
+    return cookies.bake(extra_context=ctx).project_path / "backend" / "scripts"
+
+
+@pytest.mark.skipif(
+    bool(sysconfig.get_config_var("Py_GIL_DISABLED")), reason="free-threaded build",
+)
+def test_gil_check_standard_build(free_threaded_scripts):
+    """gil_check.py refuses to check a standard build."""
+    check = subprocess.run(
+        [sys.executable, free_threaded_scripts / "gil_check.py"],
+        capture_output=True, text=True,
+    )
+    assert check.returncode == 2
+    assert "is not a free-threaded build" in check.stderr
+
+
+@pytest.fixture
+def http_server():
+    """Local server answering /ok with 200 and everything else with 404."""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = b"ok"
+            self.send_response(200 if self.path == "/ok" else 404)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("path,returncode", [("/ok", 0), ("/missing", 1)])
+def test_bench_threads(free_threaded_scripts, http_server, path, returncode):
+    """bench_threads.py measures requests and fails on error responses."""
+    bench = subprocess.run(
+        [
+            sys.executable, free_threaded_scripts / "bench_threads.py",
+            http_server + path,
+            "--clients", "2", "--duration", "0.5", "--warmup", "0", "--json",
+        ],
+        capture_output=True, text=True,
+    )
+    assert bench.returncode == returncode
+    result = json.loads(bench.stdout)
+    assert result["clients"] == 2
+    if returncode:
+        assert result["errors"] > 0
+    else:
+        assert result["requests"] > 0 and result["errors"] == 0
+        assert result["p50_ms"] <= result["p99_ms"]
+
+
+def test_standard_python_by_default(cookies, default_context):
+    """Without the option, the image uses the GIL build of the base image."""
+    result = cookies.bake(extra_context=default_context)
+    dockerfile = (result.project_path / "Dockerfile").read_text()
+    assert "PYTHON_BUILD" not in dockerfile
+    assert "/python" not in dockerfile
+    assert "gil-check" not in (result.project_path / "deployment" / "entrypoint.sh").read_text()
+    assert not (result.project_path / "backend" / "scripts" / "gil_check.py").exists()
+
+
+def test_memory_allocator_jemalloc(cookies, default_context):
+    """jemalloc is installed in the runtime and preloaded for the backend."""
+    ctx = {**default_context, "memory_allocator": "jemalloc"}
+    result = cookies.bake(extra_context=ctx)
+    dockerfile = (result.project_path / "Dockerfile").read_text()
+    assert "libjemalloc2" in dockerfile.split("AS runtime", 1)[1]
+    assert "ENV MALLOC_LIBRARY=/usr/local/lib/libjemalloc.so" in dockerfile
+    main_ts = (result.project_path / "deployment" / "cdk8s" / "main.ts").read_text()
+    assert "'MALLOC_CONF'" in main_ts
+
+
+@pytest.fixture
+def jemalloc_project(cookies, default_context):
+    ctx = {**default_context, "memory_allocator": "jemalloc"}
+    return cookies.bake(extra_context=ctx).project_path
+
+
+@pytest.mark.parametrize("command", ["start-backend", "start-worker"])
+def test_allocator_preloaded(jemalloc_project, run_entrypoint, tmp_path, command):
+    """Backend processes preload MALLOC_LIBRARY."""
+    library = tmp_path / "libjemalloc.so"
+    library.touch()
+    started = run_entrypoint(jemalloc_project, command, env={
+        "WSGI_SERVER": "waitress",
+        "MALLOC_LIBRARY": str(library),
+        "LD_PRELOAD": "/lib/other.so",
+        "INSTANCE_db_blobs_location": str(tmp_path / "blobs"),
+    })
+    assert f"LD_PRELOAD={library} /lib/other.so" in started.stdout.splitlines()
+
+
+def test_allocator_glibc_with_empty_library(jemalloc_project, run_entrypoint, tmp_path):
+    """An empty MALLOC_LIBRARY falls back to glibc malloc."""
+    started = run_entrypoint(jemalloc_project, "start-backend", env={
+        "WSGI_SERVER": "waitress",
+        "MALLOC_LIBRARY": "",
+        "INSTANCE_db_blobs_location": str(tmp_path / "blobs"),
+    })
+    assert "LD_PRELOAD" not in started.stdout
+
+
+def test_allocator_missing_library(jemalloc_project, run_entrypoint, tmp_path):
+    """A MALLOC_LIBRARY that does not exist stops the start."""
+    started = run_entrypoint(jemalloc_project, "start-backend", env={
+        "WSGI_SERVER": "waitress",
+        "MALLOC_LIBRARY": str(tmp_path / "missing.so"),
+        "INSTANCE_db_blobs_location": str(tmp_path / "blobs"),
+    }, check=False)
+    assert started.returncode == 1
+    assert "missing.so' not found" in started.stderr
+    assert "make zope-start" not in started.stdout
+
+
+def test_soak_rss_growth(jemalloc_project):
+    """soak_rss.py reports the RSS growth per hour after warm-up."""
+    spec = importlib.util.spec_from_file_location(
+        "soak_rss", jemalloc_project / "backend" / "scripts" / "soak_rss.py",
+    )
+    soak_rss = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(soak_rss)
+    assert list(soak_rss.VARIANTS) == ["jemalloc", "glibc"]
+    assert soak_rss.growth_per_hour([(0, 100.0), (1800, 112.0), (3600, 120.0)]) == 20.0
+    assert soak_rss.growth_per_hour([(0, 100.0)]) == 0.0
+
+
+def test_memory_allocator_mimalloc(cookies, default_context):
+    """mimalloc is configured through its own variables."""
+    ctx = {**default_context, "memory_allocator": "mimalloc"}
+    result = cookies.bake(extra_context=ctx)
+    dockerfile = (result.project_path / "Dockerfile").read_text()
+    assert "ENV MALLOC_LIBRARY=/usr/local/lib/libmimalloc.so" in dockerfile
+    assert "MALLOC_CONF" not in dockerfile
+
+
+def test_memory_allocator_glibc_default(cookies, default_context):
+    """By default, backends use glibc malloc without preloading."""
+    result = cookies.bake(extra_context=default_context)
+    dockerfile = (result.project_path / "Dockerfile").read_text()
+    assert "MALLOC_LIBRARY" not in dockerfile
+    entrypoint = (result.project_path / "deployment" / "entrypoint.sh").read_text()
+    assert "LD_PRELOAD" not in entrypoint
+    assert not (result.project_path / "backend" / "scripts" / "soak_rss.py").exists()
@@ -1,5 +1,8 @@
 """Test frontend template content."""
+import gzip
 import json
+import os
+import subprocess
 
 
 def test_package_json_addon_name(cookies):
@@ -116,3 +119,49 @@ def test_frontend_preseed(cookies):
     })
     content = (result.project_path / "frontend" / "mxmake-preseed.yaml").read_text()
     assert "volto-kup-tfv" in content
+
+
+def test_addon_health_middleware(cookies, default_context):
+    """Addon installs an SSR health middleware for probes."""
+    result = cookies.bake(extra_context=default_context)
+    src = (
+        result.project_path / "frontend" / "packages"
+        / "volto-testorg-testproject" / "src"
+    )
+    assert (src / "express-middleware" / "health.test.ts").exists()
+    assert "healthMiddleware," in (src / "config" / "server.ts").read_text()
+    assert "installServer(config)" in (src / "index.ts").read_text()
+
+
+def test_precompressed_static_resources(cookies, default_context, tmp_path):
+    """The image build precompresses static resources, the addon serves them.
+
+    Serving them is tested in the addon (precompressed.test.ts).
+    """
+    result = cookies.bake(extra_context=default_context)
+    frontend = result.project_path / "frontend"
+    package = json.loads((frontend / "package.json").read_text())
+    script = frontend / "scripts" / "precompress.mjs"
+    assert str(script.relative_to(frontend)) in package["scripts"]["build:compress"]
+    static = tmp_path / "static"
+    (static / "js").mkdir(parents=True)
+    bundle = b"function f() { return 'plone'; }\n" * 100
+    (static / "js" / "client.js").write_bytes(bundle)
+    (static / "js" / "small.js").write_bytes(b"small")
+    (static / "js" / "random.js").write_bytes(os.urandom(4096))
+    (static / "font.woff2").write_bytes(bundle)
+    run = subprocess.run(
+        ["node", str(script), str(static)], capture_output=True, text=True, check=True
+    )
+    assert run.stdout.startswith("Precompressed 1 files")
+    assert gzip.decompress((static / "js" / "client.js.gz").read_bytes()) == bundle
+    assert (static / "js" / "client.js.br").stat().st_size < len(bundle) / 10
+    # Too small, not compressible, or compressed already
+    siblings = sorted(path.name for path in static.rglob("*") if path.suffix in (".br", ".gz"))
+    assert siblings == ["client.js.br", "client.js.gz"]
+    assert subprocess.run(["node", str(script)], capture_output=True).returncode == 1
+    src = frontend / "packages" / "volto-testorg-testproject" / "src"
+    assert (src / "express-middleware" / "precompressed.test.ts").exists()
+    assert "precompressedStatic(express.static)" in (src / "config" / "server.ts").read_text()
+    dockerfile = (result.project_path / "Dockerfile").read_text()
+    assert "pnpm build && \\\n    pnpm build:compress" in dockerfile
@@ -32,6 +32,7 @@ def test_makefile_has_backend_proxy_targets():
         "backend-install",
         "backend-start",
         "backend-test",
+        "backend-test-parallel",
         "backend-check",
         "backend-format",
         "backend-clean",
@@ -69,6 +70,7 @@ def test_makefile_has_docker_target():
     content = _makefile()
     assert "build-image" in content
     assert "docker build" in content
+    assert "--target backend-test" in content
 
 
 def test_makefile_has_correct_image():
@@ -1,5 +1,10 @@
 """Tests for storage backend options."""
+import os
+import re
+import subprocess
+import sys
 import tempfile
+import tomllib
 from pathlib import Path
 
 import pytest
@@ -57,12 +62,48 @@ def test_relstorage_dockerfile_env(relstorage_project):
     assert "libpq5" in content
 
 
-def test_relstorage_entrypoint(relstorage_project):
-    """RelStorage: entrypoint has export/import/pack commands."""
-    content = (relstorage_project / "deployment" / "entrypoint.sh").read_text()
-    assert "relstorage-export.conf" in content
-    assert "relstorage-import.conf" in content
-    assert "relstorage-pack.conf" in content
+def relstorage_env(tmp_path):
+    """Environment of the database commands, as the image and chart set it."""
+    return {
+        "FILESTORAGE_PATH": str(tmp_path / "filestorage" / "Data.fs"),
+        "FILESTORAGE_BLOBS": str(tmp_path / "blobstorage"),
+        "INSTANCE_db_blobs_location": str(tmp_path / "cache"),
+        "INSTANCE_db_relstorage_postgresql_dsn": "dbname=plone",
+        "PACK_DAYS": "7",
+        "PACK_GC": "true",
+        "PACK_BATCH_TIMEOUT": "1",
+        "PACK_COMMIT_BUSY_DELAY": "5",
+    }
+
+
+@pytest.mark.parametrize(
+    ("command", "source", "destination"),
+    [("export", "relstorage", "filestorage"), ("import", "filestorage", "relstorage")],
+)
+def test_relstorage_export_import(
+    relstorage_project, run_entrypoint, tmp_path, command, source, destination,
+):
+    """RelStorage: export and import convert between the database and a FileStorage."""
+    output = run_entrypoint(
+        relstorage_project, command, env=relstorage_env(tmp_path),
+    ).stdout
+    assert f"zodbconvert --clear /tmp/relstorage-{command}.conf" in output
+    assert f"<{source} source>" in output
+    assert f"<{destination} destination>" in output
+    assert f"path {tmp_path}/filestorage/Data.fs" in output
+    assert "dsn dbname=plone" in output
+    assert (tmp_path / "filestorage").is_dir()
+
+
+def test_relstorage_pack(relstorage_project, run_entrypoint, tmp_path):
+    """RelStorage: pack runs zodbpack in batches on the same configuration."""
+    output = run_entrypoint(
+        relstorage_project, "pack", env=relstorage_env(tmp_path),
+    ).stdout
+    assert "zodbpack --days 7 /tmp/relstorage-pack.conf" in output
+    assert "<relstorage>" in output
+    assert "pack-batch-timeout 1" in output
+    assert "pack-gc true" in output
 
 
 def test_relstorage_cdk8s(relstorage_project):
@@ -73,6 +114,41 @@ def test_relstorage_cdk8s(relstorage_project):
     assert "INSTANCE_db_relstorage_postgresql_dsn" in content
 
 
+def test_relstorage_persistent_cache(relstorage_project):
+    """RelStorage: object and blob caches live on the /cache volume."""
+    dockerfile = (relstorage_project / "Dockerfile").read_text()
+    assert "INSTANCE_db_relstorage_cache_local_dir=/cache/relstorage" in dockerfile
+    main_ts = (relstorage_project / "deployment" / "cdk8s" / "main.ts").read_text()
+    assert "addCacheVolume(backend" in main_ts
+
+
+def test_relstorage_scheduled_pack(relstorage_project):
+    """RelStorage: the chart runs the pack command as a CronJob in batches."""
+    cdk8s = relstorage_project / "deployment" / "cdk8s"
+    # pack.test.ts synthesizes the CronJob
+    assert (cdk8s / "pack.test.ts").exists()
+    assert "new ZodbPack(this, 'pack'" in (cdk8s / "main.ts").read_text()
+
+
+@pytest.mark.parametrize("command", ["dump", "load"])
+def test_relstorage_stream_export_import(
+    relstorage_project, run_entrypoint, tmp_path, command,
+):
+    """RelStorage: dump/load stream transactions without a FileStorage."""
+    output = run_entrypoint(
+        relstorage_project, command, "--after", "03ab", env=relstorage_env(tmp_path),
+    ).stdout.splitlines()
+    # Nothing else on stdout, which carries the stream
+    assert output[0] == (
+        f"python /backend/scripts/zodbstream.py {command} /tmp/relstorage.conf"
+        " --after 03ab"
+    )
+    assert "%import relstorage" in output
+    # backend/tests/test_zodbstream.py round-trips a database
+    tests = relstorage_project / "backend" / "tests"
+    assert (tests / "test_zodbstream.py").exists()
+
+
 # --- PGJsonB tests ---
 
 
@@ -109,6 +185,11 @@ def test_pgjsonb_cdk8s(pgjsonb_project):
     assert "'pgjsonb'" in content
     assert "INSTANCE_db_pgjsonb_dsn" in content
     assert "INSTANCE_db_relstorage" not in content
+    assert "ZodbPack" not in content
+    for name in ("pack.ts", "pack.test.ts"):
+        assert not (pgjsonb_project / "deployment" / "cdk8s" / name).exists()
+    assert not (pgjsonb_project / "backend" / "scripts" / "zodbstream.py").exists()
+    assert not (pgjsonb_project / "backend" / "tests" / "test_zodbstream.py").exists()
 
 
 def test_pgjsonb_readme(pgjsonb_project):
@@ -117,6 +198,75 @@ def test_pgjsonb_readme(pgjsonb_project):
     assert "PGJsonB" in content
 
 
+def test_pgjsonb_persistent_cache(pgjsonb_project):
+    """PGJsonB: blob cache lives on the /cache volume."""
+    dockerfile = (pgjsonb_project / "Dockerfile").read_text()
+    assert "INSTANCE_db_blobs_location=/cache/blobs" in dockerfile
+    main_ts = (pgjsonb_project / "deployment" / "cdk8s" / "main.ts").read_text()
+    assert "addCacheVolume(backend" in main_ts
+
+
+@pytest.mark.parametrize("backend", ["relstorage", "pgjsonb"])
+def test_cache_on_empty_volume(
+    backend, relstorage_project, pgjsonb_project, run_entrypoint, tmp_path,
+):
+    """Database backends: the caches start on a freshly mounted volume."""
+    project = {"relstorage": relstorage_project, "pgjsonb": pgjsonb_project}[backend]
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    run_entrypoint(project, "start-backend", env={
+        "WSGI_SERVER": "waitress",
+        "INSTANCE_db_relstorage_cache_local_dir": str(cache / "relstorage"),
+        "INSTANCE_db_blobs_location": str(cache / "blobs"),
+    })
+    expected = {"blobs", "relstorage"} if backend == "relstorage" else {"blobs"}
+    assert {path.name for path in cache.iterdir()} == expected
+
+
+@pytest.mark.parametrize("backend", ["relstorage", "pgjsonb"])
+def test_worker_role(backend, relstorage_project, pgjsonb_project):
+    """Database backends: worker role with a PostgreSQL job queue."""
+    project = {"relstorage": relstorage_project, "pgjsonb": pgjsonb_project}[backend]
+    assert (project / "backend" / "scripts" / "worker.py").exists()
+    # The backend and chart tests cover the queue and the Deployment
+    assert (project / "backend" / "tests" / "test_jobs.py").exists()
+    assert (project / "deployment" / "cdk8s" / "worker.test.ts").exists()
+    assert "new Worker(" in (project / "deployment" / "cdk8s" / "main.ts").read_text()
+
+
+@pytest.mark.parametrize(
+    ("backend", "dsn"),
+    [
+        ("relstorage", "INSTANCE_db_relstorage_postgresql_dsn"),
+        ("pgjsonb", "INSTANCE_db_pgjsonb_dsn"),
+    ],
+)
+def test_db_report(backend, dsn, relstorage_project, pgjsonb_project, tmp_path, run_entrypoint):
+    """Database backends: db-report command and statement statistics.
+
+    The report is tested in the backend (test_db_report.py), the parameters
+    in the chart tests (postgres.test.ts, main.test.ts).
+    """
+    project = {"relstorage": relstorage_project, "pgjsonb": pgjsonb_project}[backend]
+    script = project / "backend" / "scripts" / "db_report.py"
+    assert (project / "backend" / "tests" / "test_db_report.py").exists()
+    # The DSN it connects to: DB_REPORT_DSN (the primary) before the instance's
+    (tmp_path / "psycopg.py").write_text(
+        "def connect(dsn, **kwargs):\n    print(dsn)\n    raise SystemExit(0)\n"
+    )
+    environ = {**os.environ, "PYTHONPATH": str(tmp_path), dsn: "host=pooler"}
+    for extra, expected in (({}, "host=pooler"), ({"DB_REPORT_DSN": "host=db-rw"}, "host=db-rw")):
+        result = subprocess.run(
+            [sys.executable, str(script)], env={**environ, **extra}, capture_output=True, text=True
+        )
+        assert result.stdout.strip() == expected, result.stderr
+    result = run_entrypoint(project, "db-report", "--reset")
+    assert result.stdout.splitlines()[0] == "python /backend/scripts/db_report.py --reset"
+    # The make target runs in the development venv (extra "test")
+    pyproject = tomllib.loads((project / "backend" / "pyproject.toml").read_text())
+    assert "psycopg[binary]" in pyproject["project"]["optional-dependencies"]["test"]
+
+
 # --- None (custom) tests ---
 
 
@@ -142,6 +292,23 @@ def test_none_entrypoint(none_project):
     content = (none_project / "deployment" / "entrypoint.sh").read_text()
     assert "start-backend" in content
     assert "relstorage-export.conf" not in content
+    assert "start-worker" not in content
+
+
+def test_none_no_worker(none_project):
+    """None: no job queue without a PostgreSQL database."""
+    assert not (none_project / "backend" / "scripts" / "worker.py").exists()
+    package = none_project / "backend" / "src" / "testorg" / "testproject"
+    assert not (package / "jobs.py").exists()
+    assert not (none_project / "backend" / "tests" / "test_jobs.py").exists()
+    for name in ("worker.ts", "worker.test.ts"):
+        assert not (none_project / "deployment" / "cdk8s" / name).exists()
+    assert not (none_project / "backend" / "scripts" / "db_report.py").exists()
+    assert not (none_project / "backend" / "tests" / "test_db_report.py").exists()
+    assert "db-report" not in (none_project / "deployment" / "entrypoint.sh").read_text()
+    assert "Worker" not in (
+        none_project / "deployment" / "cdk8s" / "main.ts"
+    ).read_text()
 
 
 def test_none_cdk8s(none_project):
@@ -150,3 +317,30 @@ def test_none_cdk8s(none_project):
     assert "Configure your database storage" in content
     assert "INSTANCE_db_relstorage" not in content
     assert "INSTANCE_db_pgjsonb_dsn" not in content
+    assert "addCacheVolume" not in content
+
+
+def test_relstorage_read_replicas(relstorage_project):
+    """RelStorage: optional read-only backends on the database replicas.
+
+    Their manifests are tested by synthesizing them (readonly.test.ts).
+    """
+    cdk8s = relstorage_project / "deployment" / "cdk8s"
+    assert (cdk8s / "readonly.test.ts").exists()
+    ingress_ts = (cdk8s / "ingress.ts").read_text()
+    # Requests with an authentication cookie go to the read-write backends
+    match = re.search(r"'nginx.ingress.kubernetes.io/canary-by-header-pattern': '(.+)'", ingress_ts)
+    pattern = re.compile(match.group(1).replace("\\\\", "\\"))
+    for cookie in ("__ac=abc", "_ga=1; __ac=abc", "lang=de;auth_token=x"):
+        assert pattern.search(cookie), cookie
+    for cookie in ("my__ac=abc", "_ga=1; tracking_auth_token=x", "lang=__ac=x", "__acx=1"):
+        assert not pattern.search(cookie), cookie
+
+
+def test_pgjsonb_no_read_replicas(pgjsonb_project):
+    """PGJsonB: read-only backends need RelStorage's read-only mode."""
+    cdk8s = pgjsonb_project / "deployment" / "cdk8s"
+    assert not (cdk8s / "readonly.ts").exists()
+    assert not (cdk8s / "readonly.test.ts").exists()
+    assert "ReadOnlyBackend" not in (cdk8s / "main.ts").read_text()
+    assert "canary" not in (cdk8s / "ingress.ts").read_text()
@@ -1,2 +1,82 @@
 # Project-specific make targets
 # This file is included by the mxmake-generated Makefile.
+
+##############################################################################
+# Parallel and sharded tests
+##############################################################################
+
+# Number of pytest-xdist worker processes, `auto` means one per CPU core.
+# Tests are distributed per layer (--dist loadgroup, xdist_group marks set in
+# tests/conftest.py), so INTEGRATION_TESTING and FUNCTIONAL_TESTING are each
+# set up on one worker only.
+TEST_WORKERS?=auto
+
+# Split the suite into TEST_SPLITS shards of similar runtime and run shard
+# TEST_GROUP (1-based). Shards are balanced with the per-test durations
+# recorded in .test_durations (see `make test-durations`).
+TEST_SPLITS?=1
+TEST_GROUP?=1
+
+.PHONY: test-parallel
+test-parallel: $(FILES_TARGET) $(SOURCES_TARGET) $(PACKAGES_TARGET)
+	@echo "Run tests with $(TEST_WORKERS) workers, shard $(TEST_GROUP) of $(TEST_SPLITS)"
+	@pytest -n $(TEST_WORKERS) --dist loadgroup --splits $(TEST_SPLITS) --group $(TEST_GROUP)
+
+.PHONY: test-durations
+test-durations: $(FILES_TARGET) $(SOURCES_TARGET) $(PACKAGES_TARGET)
+	@echo "Record per-test durations in .test_durations"
+	@pytest --store-durations
+
+##############################################################################
+# Cache warm-up
+##############################################################################
+
+# Load site roots, catalog BTrees and hot paths in a separate process to fill
+# the storage caches. Configured via WARMUP_* environment variables, see
+# src/{{ cookiecutter.organization }}/{{ cookiecutter.project_name }}/warmup.py.
+.PHONY: zope-warmup
+zope-warmup: $(ZOPE_RUN_TARGET)
+	@echo "Warm caches with configuration in $(ZOPE_INSTANCE_FOLDER)"
+	@zconsole run "$(ZOPE_INSTANCE_FOLDER)/etc/zope.conf" scripts/warmup.py
+{% if cookiecutter.python_free_threaded == "yes" %}
+
+##############################################################################
+# Free-threaded Python (experimental)
+##############################################################################
+
+# Import every installed C extension module in a fresh interpreter and list
+# those that re-enable the GIL. Needs a free-threaded venv (e.g. the image).
+.PHONY: gil-check
+gil-check: $(PACKAGES_TARGET)
+	@python scripts/gil_check.py
+
+# Threaded request throughput of a running backend, see scripts/bench_threads.py
+BENCH_URL?=http://localhost:8080/Plone
+BENCH_CLIENTS?=8
+BENCH_DURATION?=30
+
+.PHONY: bench-threads
+bench-threads:
+	@python scripts/bench_threads.py $(BENCH_URL) --clients $(BENCH_CLIENTS) --duration $(BENCH_DURATION)
+{% endif %}
+{% if cookiecutter.storage_backend != "none" %}
+
+##############################################################################
+# Background jobs
+##############################################################################
+
+# Consume the job queue in PostgreSQL (zope_jobs table), see
+# src/{{ cookiecutter.organization }}/{{ cookiecutter.project_name }}/jobs.py.
+.PHONY: zope-worker
+zope-worker: $(ZOPE_RUN_TARGET)
+	@echo "Run background jobs with configuration in $(ZOPE_INSTANCE_FOLDER)"
+	@WARMUP_ON_START=false zconsole run "$(ZOPE_INSTANCE_FOLDER)/etc/zope.conf" scripts/worker.py
+
+# Top statements, cache hit ratios and dead rows of a PostgreSQL database,
+# e.g. make db-report DB_DSN="host=localhost user=plone dbname=plone"
+DB_DSN?=
+
+.PHONY: db-report
+db-report: $(PACKAGES_TARGET)
+	@python scripts/db_report.py $(if $(DB_DSN),--dsn "$(DB_DSN)")
+{% endif %}
@@ -0,0 +1,116 @@
+"""Measure threaded request throughput of a running backend.
+
+Sends GET requests over keep-alive connections from ``--clients`` threads
+for ``--duration`` seconds and reports requests per second and latency
+percentiles. To compare the free-threaded with the standard build, run the
+same image built both ways with the same ``INSTANCE_wsgi_threads`` and
+benchmark each (see backend/README.md)::
+
+    python scripts/bench_threads.py http://localhost:8080/Plone/news --clients 16
+
+Uses the standard library only and runs against any URL. Run it on another
+machine or with free cores: the client must not be the bottleneck.
+"""
+
+from urllib.parse import urlsplit
+
+import argparse
+import http.client
+import json
+import statistics
+import sys
+import threading
+import time
+
+
+def connect(url):
+    parts = urlsplit(url)
+    factory = (
+        http.client.HTTPSConnection
+        if parts.scheme == "https"
+        else http.client.HTTPConnection
+    )
+    return factory(parts.hostname, parts.port, timeout=60)
+
+
+def client(urls, deadline, latencies, errors):
+    """Request `urls` in turn until `deadline`, recording latencies."""
+    connection = connect(urls[0])
+    paths = [
+        urlsplit(url)._replace(scheme="", netloc="").geturl() or "/" for url in urls
+    ]
+    count = 0
+    while time.monotonic() < deadline:
+        path = paths[count % len(paths)]
+        count += 1
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = connect(urls[0])
+            errors.append(path)
+            continue
+        if response.status >= 400:
+            errors.append(path)
+        else:
+            latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def run(urls, clients, duration):
+    latencies = []
+    errors = []
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client, args=(urls, deadline, latencies, errors))
+        for _ in range(clients)
+    ]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    result = {
+        "clients": clients,
+        "seconds": round(elapsed, 1),
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+    }
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100)
+        for name, index in (("p50_ms", 49), ("p95_ms", 94), ("p99_ms", 98)):
+            result[name] = round(cuts[index] * 1000, 1)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("urls", nargs="+", help="URLs of one host, requested in turn")
+    parser.add_argument(
+        "--clients", type=int, default=8, help="concurrent client threads"
+    )
+    parser.add_argument("--duration", type=float, default=30, help="seconds to measure")
+    parser.add_argument(
+        "--warmup", type=float, default=5, help="seconds before measuring"
+    )
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args(argv)
+
+    if args.warmup > 0:
+        run(args.urls, args.clients, args.warmup)
+    result = run(args.urls, args.clients, args.duration)
+    if args.json:
+        sys.stdout.write(json.dumps(result) + "\n")
+    else:
+        for key, value in result.items():
+            sys.stdout.write(f"{key:>20}: {value}\n")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
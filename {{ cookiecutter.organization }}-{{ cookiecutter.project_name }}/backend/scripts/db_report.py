@@ -0,0 +1,161 @@
+"""Report where PostgreSQL spends its time for the ZODB storage.
+
+Prints the statements with the highest total and mean execution time (from
+``pg_stat_statements``), buffer cache hit ratios of the database and its
+largest tables, and dead rows per table, which show bloat that autovacuum
+has not caught up with::
+
+    python scripts/db_report.py --dsn "host=localhost user=plone dbname=plone"
+
+Without ``--dsn`` it connects to ``DB_REPORT_DSN``, which the deployment
+sets to the primary, bypassing a connection pooler, or else to the database
+of the instance (``{{ 'INSTANCE_db_relstorage_postgresql_dsn' if cookiecutter.storage_backend == 'relstorage' else 'INSTANCE_db_pgjsonb_dsn' }}``).
+Works against any PostgreSQL 13 or later; the statement sections need the
+``pg_stat_statements`` extension (``shared_preload_libraries`` and
+``CREATE EXTENSION pg_stat_statements``). Statistics accumulate since the
+last reset, ``--reset`` starts a new measurement.
+"""
+
+import argparse
+import os
+import psycopg
+import sys
+
+
+REPORT_DSN = "DB_REPORT_DSN"
+DATABASE_DSN = "{{ 'INSTANCE_db_relstorage_postgresql_dsn' if cookiecutter.storage_backend == 'relstorage' else 'INSTANCE_db_pgjsonb_dsn' }}"
+
+STATEMENTS = """
+SELECT calls,
+       round(total_exec_time::numeric, 1) AS total_ms,
+       round(mean_exec_time::numeric, 2) AS mean_ms,
+       rows,
+       round(100.0 * shared_blks_hit
+             / nullif(shared_blks_hit + shared_blks_read, 0), 1) AS hit_pct,
+       regexp_replace(query, '\\s+', ' ', 'g') AS query
+FROM pg_stat_statements
+WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+ORDER BY {order} DESC
+LIMIT %s
+"""
+
+DATABASE_HITS = """
+SELECT datname,
+       round(100.0 * blks_hit / nullif(blks_hit + blks_read, 0), 2) AS hit_pct,
+       blks_read,
+       temp_files,
+       pg_size_pretty(temp_bytes) AS temp,
+       deadlocks
+FROM pg_stat_database
+WHERE datname = current_database()
+"""
+
+TABLE_HITS = """
+SELECT io.relname AS table,
+       pg_size_pretty(pg_total_relation_size(io.relid)) AS size,
+       round(100.0 * heap_blks_hit
+             / nullif(heap_blks_hit + heap_blks_read, 0), 1) AS heap_hit_pct,
+       round(100.0 * idx_blks_hit
+             / nullif(idx_blks_hit + idx_blks_read, 0), 1) AS index_hit_pct,
+       st.seq_scan,
+       st.idx_scan
+FROM pg_statio_user_tables io
+JOIN pg_stat_user_tables st USING (relid)
+ORDER BY pg_total_relation_size(io.relid) DESC
+LIMIT %s
+"""
+
+DEAD_ROWS = """
+SELECT relname AS table,
+       n_live_tup AS live_rows,
+       n_dead_tup AS dead_rows,
+       round(100.0 * n_dead_tup / nullif(n_live_tup + n_dead_tup, 0), 1)
+           AS dead_pct,
+       pg_size_pretty(pg_table_size(relid)) AS table_size,
+       coalesce(greatest(last_vacuum, last_autovacuum)::text, 'never')
+           AS last_vacuum
+FROM pg_stat_user_tables
+ORDER BY n_dead_tup DESC
+LIMIT %s
+"""
+
+
+def write_table(out, title, cursor, width=100):
+    """Write the rows of `cursor` as an aligned text table."""
+    out.write(f"\n== {title} ==\n")
+    names = [column.name for column in cursor.description]
+    rows = [
+        ["" if value is None else str(value)[:width] for value in row]
+        for row in cursor.fetchall()
+    ]
+    if not rows:
+        out.write("(no rows)\n")
+        return
+    widths = [
+        max(len(name), *(len(row[i]) for row in rows)) for i, name in enumerate(names)
+    ]
+    out.write("  ".join(n.ljust(w) for n, w in zip(names, widths, strict=True)) + "\n")
+    out.write("  ".join("-" * w for w in widths) + "\n")
+    for row in rows:
+        out.write("  ".join(v.ljust(w) for v, w in zip(row, widths, strict=True)))
+        out.write("\n")
+
+
+def has_statements(cursor):
+    cursor.execute(
+        "SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'",
+    )
+    return cursor.fetchone() is not None
+
+
+def report(conn, out, limit=10):
+    with conn.cursor() as cursor:
+        if has_statements(cursor):
+            for title, order in (
+                ("Statements by total time", "total_exec_time"),
+                ("Statements by mean time", "mean_exec_time"),
+            ):
+                cursor.execute(STATEMENTS.format(order=order), (limit,))
+                write_table(out, title, cursor)
+        else:
+            out.write(
+                "\npg_stat_statements is not installed: add it to "
+                "shared_preload_libraries and run "
+                "CREATE EXTENSION pg_stat_statements\n"
+            )
+        cursor.execute(DATABASE_HITS)
+        write_table(out, "Database cache hits", cursor)
+        cursor.execute(TABLE_HITS, (limit,))
+        write_table(out, "Largest tables: cache hits and scans", cursor)
+        cursor.execute(DEAD_ROWS, (limit,))
+        write_table(out, "Dead rows (bloat not yet vacuumed)", cursor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dsn",
+        help=f"libpq connection string (default: ${REPORT_DSN} or ${DATABASE_DSN})",
+    )
+    parser.add_argument("--limit", type=int, default=10, help="rows per section")
+    parser.add_argument(
+        "--reset", action="store_true", help="reset the statistics after reporting"
+    )
+    args = parser.parse_args(argv)
+    dsn = args.dsn or os.getenv(REPORT_DSN) or os.getenv(DATABASE_DSN)
+    if not dsn:
+        parser.error(f"--dsn, {REPORT_DSN} or {DATABASE_DSN} is required")
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        report(conn, sys.stdout, args.limit)
+        if args.reset:
+            with conn.cursor() as cursor:
+                if has_statements(cursor):
+                    cursor.execute("SELECT pg_stat_statements_reset()")
+                cursor.execute("SELECT pg_stat_reset()")
+            sys.stdout.write("\nStatistics reset\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
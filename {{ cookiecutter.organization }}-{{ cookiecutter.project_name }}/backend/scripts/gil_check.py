@@ -0,0 +1,97 @@
+"""Report extension modules that re-enable the GIL on free-threaded Python.
+
+A free-threaded interpreter turns the GIL back on, with a RuntimeWarning,
+as soon as it imports a C extension that does not declare free-threading
+support. Only the first such import warns, so every extension module of the
+installed distributions is imported in a fresh interpreter.
+
+Run it with ``make gil-check`` or the ``gil-check`` container command. Exits
+with 1 if any module re-enables the GIL, with 2 on a standard build.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from importlib.machinery import EXTENSION_SUFFIXES
+from importlib.metadata import distributions
+
+import os
+import subprocess
+import sys
+import sysconfig
+
+
+# Imports the module given as argument and prints the module that made the
+# interpreter enable the GIL, if any (possibly a dependency of the former)
+PROBE = """
+import importlib, re, sys, warnings
+with warnings.catch_warnings(record=True) as caught:
+    warnings.simplefilter("always")
+    importlib.import_module(sys.argv[1])
+for warning in caught:
+    match = re.search(r"to load module '([^']+)'", str(warning.message))
+    if match:
+        print(match.group(1))
+"""
+
+
+def extension_modules():
+    """Map the names of all installed C extension modules to their distribution."""
+    suffixes = sorted(EXTENSION_SUFFIXES, key=len, reverse=True)
+    modules = {}
+    for dist in distributions():
+        for file in dist.files or ():
+            name = str(file)
+            suffix = next((s for s in suffixes if name.endswith(s)), None)
+            if suffix is None:
+                continue
+            module = name[: -len(suffix)].replace("/", ".")
+            if all(part.isidentifier() for part in module.split(".")):
+                modules[module] = dist.metadata["Name"]
+    return modules
+
+
+def probe(module):
+    """Import `module` in a fresh interpreter, return (failed, gil_modules)."""
+    # PYTHON_GIL=0 would keep the GIL off and hide the modules we look for
+    env = {key: value for key, value in os.environ.items() if key != "PYTHON_GIL"}
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, module],
+        capture_output=True,
+        env=env,
+        text=True,
+        timeout=120,
+    )
+    return result.returncode != 0, result.stdout.split()
+
+
+def main():
+    if not sysconfig.get_config_var("Py_GIL_DISABLED"):
+        sys.stderr.write(f"{sys.executable} is not a free-threaded build.\n")
+        return 2
+    modules = extension_modules()
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = dict(zip(modules, executor.map(probe, modules), strict=True))
+
+    gil = set()
+    failed = []
+    for module, (import_failed, gil_modules) in sorted(results.items()):
+        if import_failed:
+            failed.append(module)
+        gil.update(gil_modules)
+
+    out = sys.stdout
+    out.write(f"Checked {len(modules)} extension modules with {sys.executable}\n")
+    if gil:
+        out.write("\nRe-enable the GIL:\n")
+        for name in sorted(gil):
+            out.write(f"  {name} ({modules.get(name, '?')})\n")
+    if failed:
+        out.write("\nNot importable on their own (skipped):\n")
+        for module in failed:
+            out.write(f"  {module} ({modules[module]})\n")
+    if not gil:
+        out.write("\nNo extension module re-enables the GIL.\n")
+    return 1 if gil else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Soak test: compare backend memory growth of two allocators under load.
+
+Starts the image twice, with the configured allocator and with glibc malloc
+(``MALLOC_LIBRARY=``), puts both under the same request load and samples the
+resident memory of all processes in each container. Fragmentation shows as
+RSS that keeps growing after the caches are full::
+
+    python scripts/soak_rss.py <image> --env-file db.env --hours 4 \\
+        --path /Plone --path /Plone/news --path /Plone/@@search
+
+The env file configures the database both containers read from. Samples go
+to a CSV file; the summary reports the RSS growth per hour after warm-up.
+Runs on the Docker host and needs the standard library only.
+"""
+
+from pathlib import Path
+from urllib.error import URLError
+from urllib.request import urlopen
+
+import argparse
+import csv
+import itertools
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+
+VARIANTS = {
+    "{{ cookiecutter.memory_allocator }}": [],
+    "glibc": ["--env", "MALLOC_LIBRARY="],
+}
+
+# Sum of VmRSS over all processes in the container, in kB
+RSS_COMMAND = (
+    "cat /proc/[0-9]*/status 2>/dev/null | awk '/^VmRSS/ {s+=$2} END {print s}'"
+)
+
+
+def docker(*args):
+    return subprocess.run(
+        ["docker", *args], capture_output=True, check=True, text=True
+    ).stdout.strip()
+
+
+def start(image, name, port, options):
+    docker(
+        "run",
+        "--detach",
+        "--rm",
+        "--name",
+        name,
+        "--publish",
+        f"127.0.0.1:{port}:8080",
+        *options,
+        image,
+        "start-backend",
+    )
+
+
+def wait_healthy(base_url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(f"{base_url}/@@health", timeout=5):
+                return
+        except (OSError, URLError):
+            time.sleep(2)
+    raise RuntimeError(f"{base_url} did not become healthy in {timeout}s")
+
+
+def rss_mb(name):
+    return int(docker("exec", name, "sh", "-c", RSS_COMMAND) or 0) / 1024
+
+
+def load(base_url, paths, stop):
+    """Request `paths` in turn until `stop` is set."""
+    for path in itertools.cycle(paths):
+        if stop.is_set():
+            return
+        try:
+            with urlopen(base_url + path, timeout=60) as response:
+                response.read()
+        except (OSError, URLError):
+            time.sleep(1)
+
+
+def growth_per_hour(samples):
+    """Slope of a least-squares line through (seconds, MiB) samples."""
+    if len(samples) < 2:
+        return 0.0
+    seconds, values = zip(*samples, strict=True)
+    return statistics.linear_regression(seconds, values).slope * 3600
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("image")
+    parser.add_argument("--env-file", help="database configuration of the backends")
+    parser.add_argument("--path", action="append", dest="paths", help="path to request")
+    parser.add_argument("--clients", type=int, default=4, help="threads per backend")
+    parser.add_argument("--hours", type=float, default=2)
+    parser.add_argument("--warmup", type=float, default=600, help="seconds ignored")
+    parser.add_argument("--interval", type=float, default=60, help="seconds per sample")
+    parser.add_argument("--output", default="soak-rss.csv")
+    parser.add_argument("--port", type=int, default=18080, help="first host port")
+    args = parser.parse_args(argv)
+    paths = args.paths or ["/"]
+
+    stop = threading.Event()
+    names = {}
+    threads = []
+    try:
+        for port, (variant, options) in enumerate(VARIANTS.items(), args.port):
+            name = f"soak-{variant}-{port}"
+            base_url = f"http://127.0.0.1:{port}"
+            if args.env_file:
+                options = ["--env-file", args.env_file, *options]
+            start(args.image, name, port, options)
+            names[variant] = name
+            wait_healthy(base_url, timeout=600)
+            for _ in range(args.clients):
+                thread = threading.Thread(target=load, args=(base_url, paths, stop))
+                thread.start()
+                threads.append(thread)
+
+        samples = {variant: [] for variant in names}
+        begin = time.monotonic()
+        with Path(args.output).open("w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["seconds", "variant", "rss_mb"])
+            while (elapsed := time.monotonic() - begin) < args.hours * 3600:
+                for variant, name in names.items():
+                    rss = rss_mb(name)
+                    writer.writerow([round(elapsed), variant, round(rss, 1)])
+                    if elapsed >= args.warmup:
+                        samples[variant].append((elapsed, rss))
+                file.flush()
+                time.sleep(args.interval)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        for name in names.values():
+            subprocess.run(["docker", "stop", name], capture_output=True)
+
+    for variant, values in samples.items():
+        final = values[-1][1] if values else 0.0
+        sys.stdout.write(
+            f"{variant:>10}: {final:8.1f} MiB at the end, "
+            f"{growth_per_hour(values):+7.1f} MiB/h after warm-up\n"
+        )
+    sys.stdout.write(f"Samples written to {args.output}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
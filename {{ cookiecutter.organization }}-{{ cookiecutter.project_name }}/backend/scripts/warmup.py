@@ -0,0 +1,10 @@
+"""Warm the storage caches from a separate process.
+
+Run with `make zope-warmup` or the `warmup` container command. For warming
+the object caches of a running server, use WARMUP_ON_START instead.
+"""
+
+from {{ cookiecutter.__python_package }}.warmup import warmup
+
+
+warmup(globals()["app"])
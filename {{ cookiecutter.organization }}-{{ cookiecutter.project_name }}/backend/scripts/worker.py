@@ -0,0 +1,10 @@
+"""Run queued background jobs until stopped.
+
+Run with `make zope-worker` or the `start-worker` container command, see
+src/{{ cookiecutter.organization }}/{{ cookiecutter.project_name }}/jobs.py.
+"""
+
+from {{ cookiecutter.__python_package }}.jobs import run_worker
+
+
+run_worker(globals()["app"])
@@ -0,0 +1,276 @@
+"""Stream ZODB transactions between storages without an intermediate copy.
+
+``dump`` writes the transactions of a storage, including blobs, as one
+binary stream to stdout; ``load`` restores such a stream from stdin into
+another storage. Piped together, they copy a database with bounded local
+disk and no FileStorage in between::
+
+    zodbstream.py dump source.conf | zodbstream.py load target.conf --clear
+
+Incremental runs: ``dump --after <tid>`` starts after a transaction id, e.g.
+the last one reported by the previous run. ``load`` skips transactions the
+target already has, so an interrupted load can be repeated.
+
+``dump`` fetches the blobs of upcoming transactions with ``--blob-workers``
+parallel storage connections and removes each blob file from the local
+blob cache once it is streamed.
+
+The configuration files are ZODB storage configurations, e.g. ``%import
+relstorage`` and a ``<relstorage>`` section. Progress goes to stderr.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from ZODB.blob import is_blob_record
+from ZODB.config import storageFromFile
+from ZODB.Connection import TransactionMetaData
+from ZODB.utils import p64
+from ZODB.utils import tid_repr
+from ZODB.utils import u64
+from ZODB.utils import z64
+
+import argparse
+import logging
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+
+
+logger = logging.getLogger("zodbstream")
+
+MAGIC = b"ZODBSTREAM 1\n"
+TRANSACTION = b"T"
+RECORD = b"R"
+BLOB = b"B"
+NO_BLOB = b"-"
+COMMIT = b"C"
+END = b"Z"
+NO_DATA = 2**64 - 1
+CHUNK = 1 << 20
+
+
+def write_bytes(out, data):
+    out.write(struct.pack(">Q", NO_DATA if data is None else len(data)))
+    if data:
+        out.write(data)
+
+
+def read_exactly(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise EOFError("Stream ended unexpectedly")
+    return data
+
+
+def read_bytes(stream):
+    (size,) = struct.unpack(">Q", read_exactly(stream, 8))
+    return None if size == NO_DATA else read_exactly(stream, size)
+
+
+class BlobFetcher:
+    """Load blobs through one storage instance per worker thread."""
+
+    def __init__(self, storage, workers):
+        self.storage = storage
+        self.local = threading.local()
+        self.instances = []
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def fetch(self, oid, tid):
+        instance = getattr(self.local, "instance", None)
+        if instance is None:
+            new_instance = getattr(self.storage, "new_instance", None)
+            instance = new_instance() if new_instance else self.storage
+            self.local.instance = instance
+            with self.lock:
+                self.instances.append(instance)
+        return instance.loadBlob(oid, tid)
+
+    def submit(self, oid, tid):
+        return self.pool.submit(self.fetch, oid, tid)
+
+    def close(self):
+        self.pool.shutdown()
+        for instance in self.instances:
+            if instance is not self.storage:
+                instance.release()
+
+
+def write_transaction(out, txn, records, evict):
+    """Write one transaction; `records` holds (record, blob future or None)."""
+    out.write(TRANSACTION + txn.tid + txn.status.encode("ascii"))
+    write_bytes(out, txn.user)
+    write_bytes(out, txn.description)
+    write_bytes(out, txn.extension_bytes)
+    blobs = 0
+    for record, blob in records:
+        out.write(RECORD + record.oid + (record.data_txn or z64))
+        write_bytes(out, record.data)
+        if blob is None:
+            out.write(NO_BLOB)
+            continue
+        path = Path(blob.result())
+        out.write(BLOB + struct.pack(">Q", path.stat().st_size))
+        with path.open("rb") as file:
+            shutil.copyfileobj(file, out, CHUNK)
+        if evict:
+            # Keep the local blob cache bounded; the storage fetches the blob
+            # again should it be needed
+            path.unlink(missing_ok=True)
+        blobs += 1
+    out.write(COMMIT)
+    return blobs
+
+
+def dump(storage, out, after=None, workers=4):
+    start = p64(u64(after) + 1) if after else None
+    # Only RelStorage's blob cache may be pruned, other blob dirs hold the data
+    evict = (
+        getattr(getattr(storage, "_options", None), "shared_blob_dir", True) is False
+    )
+    fetcher = BlobFetcher(storage, workers)
+    pending = deque()
+    count = blobs = 0
+    last = after
+    out.write(MAGIC)
+    try:
+        for txn in storage.iterator(start):
+            records = [
+                (
+                    record,
+                    fetcher.submit(record.oid, record.tid)
+                    if record.data and is_blob_record(record.data)
+                    else None,
+                )
+                for record in txn
+            ]
+            pending.append((txn, records))
+            # Blob fetches run ahead of the writer by a few transactions
+            while len(pending) > workers * 4:
+                blobs += write_transaction(out, *pending.popleft(), evict)
+                count += 1
+            last = txn.tid
+            if count and count % 10000 == 0:
+                logger.info("Dumped %d transactions, at %s", count, tid_repr(last))
+        while pending:
+            blobs += write_transaction(out, *pending.popleft(), evict)
+            count += 1
+    finally:
+        fetcher.close()
+    out.write(END)
+    out.flush()
+    return count, blobs, last
+
+
+def load(storage, stream):
+    if read_exactly(stream, len(MAGIC)) != MAGIC:
+        raise ValueError("Not a zodbstream dump")
+    known = storage.lastTransaction()
+    tmp = (
+        storage.temporaryDirectory() if hasattr(storage, "temporaryDirectory") else None
+    )
+    count = skipped = blobs = 0
+    last = None
+    while (kind := read_exactly(stream, 1)) != END:
+        if kind != TRANSACTION:
+            raise ValueError(f"Corrupt stream: unexpected {kind!r}")
+        tid = read_exactly(stream, 8)
+        status = read_exactly(stream, 1).decode("ascii")
+        user, description, extension = (read_bytes(stream) for _ in range(3))
+        skip = tid <= known
+        txn = TransactionMetaData(user, description, extension)
+        if not skip:
+            storage.tpc_begin(txn, tid, status)
+        while (kind := read_exactly(stream, 1)) == RECORD:
+            oid = read_exactly(stream, 8)
+            data_txn = read_exactly(stream, 8)
+            data_txn = None if data_txn == z64 else data_txn
+            data = read_bytes(stream)
+            if read_exactly(stream, 1) == BLOB:
+                (size,) = struct.unpack(">Q", read_exactly(stream, 8))
+                fd, path = tempfile.mkstemp(suffix=".blob", dir=tmp)
+                with os.fdopen(fd, "wb") as file:
+                    while size:
+                        chunk = read_exactly(stream, min(size, CHUNK))
+                        file.write(chunk)
+                        size -= len(chunk)
+                if skip:
+                    Path(path).unlink()
+                else:
+                    storage.restoreBlob(oid, tid, data, path, data_txn, txn)
+                    blobs += 1
+            elif not skip:
+                storage.restore(oid, tid, data, "", data_txn, txn)
+        if kind != COMMIT:
+            raise ValueError(f"Corrupt stream: unexpected {kind!r}")
+        if skip:
+            skipped += 1
+            continue
+        storage.tpc_vote(txn)
+        storage.tpc_finish(txn)
+        count += 1
+        last = tid
+        if count % 10000 == 0:
+            logger.info("Loaded %d transactions, at %s", count, tid_repr(last))
+    return count, skipped, blobs, last
+
+
+def open_storage(config):
+    with Path(config).open() as file:
+        return storageFromFile(file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    dump_parser = commands.add_parser("dump", help="write a storage to stdout")
+    dump_parser.add_argument("config")
+    dump_parser.add_argument("--after", help="start after this transaction id (hex)")
+    dump_parser.add_argument("--blob-workers", type=int, default=4)
+    load_parser = commands.add_parser("load", help="restore a dump from stdin")
+    load_parser.add_argument("config")
+    load_parser.add_argument(
+        "--clear", action="store_true", help="empty the target first"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format="%(message)s")
+
+    storage = open_storage(args.config)
+    if args.command == "load" and args.clear and not hasattr(storage, "zap_all"):
+        storage.close()
+        parser.error("--clear needs a storage that can be emptied, e.g. RelStorage")
+    try:
+        if args.command == "dump":
+            after = p64(int(args.after, 16)) if args.after else None
+            out = open(sys.stdout.fileno(), "wb", buffering=CHUNK, closefd=False)  # noqa: SIM115
+            count, blobs, last = dump(storage, out, after, args.blob_workers)
+            logger.info("Dumped %d transactions with %d blobs", count, blobs)
+        else:
+            if args.clear:
+                storage.zap_all()
+            stream = open(sys.stdin.fileno(), "rb", buffering=CHUNK, closefd=False)  # noqa: SIM115
+            count, skipped, blobs, last = load(storage, stream)
+            logger.info(
+                "Loaded %d transactions with %d blobs, skipped %d already present",
+                count,
+                blobs,
+                skipped,
+            )
+    finally:
+        storage.close()
+    if last:
+        logger.info(
+            "Last transaction: %s (continue with --after %s)",
+            tid_repr(last),
+            last.hex(),
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
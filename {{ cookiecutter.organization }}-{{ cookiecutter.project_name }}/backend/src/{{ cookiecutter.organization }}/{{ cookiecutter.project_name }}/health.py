@@ -0,0 +1,40 @@
+"""Health endpoints for container and Kubernetes probes.
+
+Both views are registered on the Zope application root, so probes reach
+them as ``/@@health`` and ``/@@ready`` without virtual hosting or a site.
+
+Zope opens a ZODB connection for every request and polls the storage for
+invalidations while doing so. Reaching either view therefore already proves
+that the database answers; a storage outage fails the request with a 5xx.
+"""
+
+from plone.base.interfaces import IPloneSiteRoot
+from Products.Five.browser import BrowserView
+
+
+class HealthView(BrowserView):
+    """Liveness: Zope is up and a worker thread answers requests."""
+
+    def __call__(self):
+        return self.respond("OK")
+
+    def respond(self, body):
+        response = self.request.response
+        response.setHeader("Content-Type", "text/plain; charset=utf-8")
+        response.setHeader("Cache-Control", "no-store")
+        return body
+
+
+class ReadyView(HealthView):
+    """Readiness: the database answers and the Plone sites are loaded.
+
+    Loads every site root and its persistent component registry, which all
+    requests to a site need first. The first probe after start pays for
+    that, later probes hit the ZODB cache.
+    """
+
+    def __call__(self):
+        for obj in self.context.objectValues():
+            if IPloneSiteRoot.providedBy(obj):
+                obj.getSiteManager()
+        return self.respond("READY")
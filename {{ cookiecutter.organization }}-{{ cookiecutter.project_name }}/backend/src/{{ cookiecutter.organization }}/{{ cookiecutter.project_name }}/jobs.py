@@ -0,0 +1,231 @@
+"""Background jobs, queued in PostgreSQL and run by the worker role.
+
+Code running in a request queues slow work instead of doing it inline::
+
+    from {{ cookiecutter.__python_package }}.jobs import enqueue
+
+    enqueue("reindex", paths=["/Plone/news"], idxs=["SearchableText"])
+
+The job is inserted into the ``zope_jobs`` table once the current
+transaction commits, so aborted requests queue nothing. Workers
+(``start-worker``, ``make zope-worker``) claim jobs with ``FOR UPDATE SKIP
+LOCKED``, so any number of them share the queue. A job runs in its own ZODB
+transaction, retried on conflicts, as the system user. Failed jobs are
+retried with increasing delay; after ``JOBS_MAX_ATTEMPTS`` they stay in the
+table with their last error.
+
+Handlers are registered with ``@job(name)`` and called as
+``handler(site, **payload)``; the payload must be JSON serializable. Define
+them in this module, or import their module here, so workers know them.
+
+Environment:
+
+``JOBS_DSN``
+    PostgreSQL connection string (default: the database DSN). Unset
+    outside of the image: jobs then run inline, in the current transaction.
+``JOBS_POLL_SECONDS``
+    Pause of an idle worker before it checks for new jobs (default: 2).
+``JOBS_MAX_ATTEMPTS``
+    Attempts before a job is given up (default: 5).
+"""
+
+from AccessControl.SecurityManagement import newSecurityManager
+from AccessControl.SecurityManagement import noSecurityManager
+from AccessControl.SpecialUsers import system
+from itertools import chain
+from pathlib import Path
+from Testing.makerequest import makerequest
+from zope.component.hooks import getSite
+from zope.component.hooks import setSite
+from zope.component.interfaces import ISite
+
+import logging
+import os
+import signal
+import tempfile
+import threading
+import time
+import transaction
+
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+# The queue lives in the ZODB's PostgreSQL database by default
+DATABASE_DSN = "{{ 'INSTANCE_db_relstorage_postgresql_dsn' if cookiecutter.storage_backend == 'relstorage' else 'INSTANCE_db_pgjsonb_dsn' }}"
+
+# Touched by the running worker, checked by `entrypoint.sh healthcheck`
+HEARTBEAT = Path(tempfile.gettempdir()) / "zope-worker.alive"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS zope_jobs (
+    id bigserial PRIMARY KEY,
+    name text NOT NULL,
+    site text NOT NULL DEFAULT '',
+    payload jsonb NOT NULL DEFAULT '{}',
+    attempts integer NOT NULL DEFAULT 0,
+    run_after timestamptz NOT NULL DEFAULT now(),
+    last_error text,
+    created timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS zope_jobs_run_after ON zope_jobs (run_after);
+"""
+
+INSERT = "INSERT INTO zope_jobs (name, site, payload) VALUES (%s, %s, %s)"
+
+CLAIM = """
+SELECT id, name, site, payload, attempts FROM zope_jobs
+WHERE run_after <= now() AND attempts < %s
+ORDER BY run_after, id
+LIMIT 1
+FOR UPDATE SKIP LOCKED
+"""
+
+DONE = "DELETE FROM zope_jobs WHERE id = %s"
+
+FAILED = """
+UPDATE zope_jobs
+SET attempts = attempts + 1,
+    run_after = now() + make_interval(secs => %s),
+    last_error = %s
+WHERE id = %s
+"""
+
+
+def jobs_dsn():
+    return os.getenv("JOBS_DSN") or os.getenv(DATABASE_DSN)
+
+
+def job(name):
+    """Register a job handler under `name`."""
+
+    def register(handler):
+        HANDLERS[name] = handler
+        return handler
+
+    return register
+
+
+def enqueue(name, site=None, **payload):
+    """Queue job `name` for `site` (default: the current site)."""
+    if name not in HANDLERS:
+        raise KeyError(f"Unknown job: {name}")
+    site = site if site is not None else getSite()
+    dsn = jobs_dsn()
+    if not dsn:
+        logger.info("No job queue configured, running %s inline", name)
+        HANDLERS[name](site, **payload)
+        return
+    site_path = "/".join(site.getPhysicalPath()) if site is not None else ""
+    transaction.get().addAfterCommitHook(_insert, args=(dsn, name, site_path, payload))
+
+
+def _insert(committed, dsn, name, site_path, payload):
+    if not committed:
+        return
+    from psycopg.types.json import Jsonb
+
+    import psycopg
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(INSERT, (name, site_path, Jsonb(payload)))
+
+
+def run_job(app, name, site_path, payload):
+    """Run a job in its own ZODB transaction, retried on conflicts."""
+    handler = HANDLERS[name]
+    for attempt in transaction.manager.attempts(3):
+        with attempt:
+            site = app.unrestrictedTraverse(site_path) if site_path else app
+            setSite(site if ISite.providedBy(site) else None)
+            handler(site, **payload)
+
+
+def heartbeat(stop, interval=10):
+    while not stop.wait(interval):
+        HEARTBEAT.touch()
+
+
+def run_worker(app):
+    """Claim and run queued jobs until SIGTERM or SIGINT."""
+    import psycopg
+
+    dsn = jobs_dsn()
+    if not dsn:
+        raise SystemExit("No job queue configured (JOBS_DSN)")
+    poll = float(os.getenv("JOBS_POLL_SECONDS", "2"))
+    max_attempts = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        # Finish the current job, then exit
+        signal.signal(signum, lambda *args: stop.set())
+    HEARTBEAT.touch()
+    threading.Thread(target=heartbeat, args=(stop,), daemon=True).start()
+
+    app = makerequest(app)
+    newSecurityManager(None, system)
+    logger.info("Worker started, waiting for jobs")
+    try:
+        with psycopg.connect(dsn, autocommit=True) as conn:
+            conn.execute(SCHEMA)
+            while not stop.is_set():
+                with conn.transaction():
+                    row = conn.execute(CLAIM, (max_attempts,)).fetchone()
+                    if row is not None:
+                        run_claimed(conn, app, *row)
+                if row is None:
+                    stop.wait(poll)
+    finally:
+        noSecurityManager()
+        HEARTBEAT.unlink(missing_ok=True)
+    logger.info("Worker stopped")
+
+
+def run_claimed(conn, app, job_id, name, site_path, payload, attempts):
+    start = time.monotonic()
+    try:
+        run_job(app, name, site_path, payload)
+    except Exception as exc:
+        delay = 30 * 2**attempts
+        logger.exception("Job %s (%s) failed, retry in %ds", job_id, name, delay)
+        conn.execute(FAILED, (delay, repr(exc), job_id))
+    else:
+        conn.execute(DONE, (job_id,))
+        logger.info("Job %s (%s) done in %.1fs", job_id, name, time.monotonic() - start)
+
+
+def _objects(site, paths):
+    for path in paths:
+        obj = site.unrestrictedTraverse(path, None)
+        if obj is None:
+            logger.warning("Job target not found: %s", path)
+        else:
+            yield obj
+
+
+@job("reindex")
+def reindex(site, paths=(), idxs=(), query=None):
+    """Reindex objects at `paths` and matching the catalog `query`.
+
+    Pass ``idxs=["SearchableText"]`` to extract the text of files.
+    """
+    objects = _objects(site, paths)
+    if query is not None:
+        brains = site.portal_catalog.unrestrictedSearchResults(**query)
+        objects = chain(objects, (brain._unrestrictedGetObject() for brain in brains))
+    for count, obj in enumerate(objects, 1):
+        obj.reindexObject(idxs=list(idxs))
+        if count % 1000 == 0:
+            # Keep the transaction and its memory bounded in bulk runs
+            transaction.savepoint(optimistic=True)
+
+
+@job("scales")
+def scales(site, paths, field="image", names=("preview", "large")):
+    """Generate image scales ahead of the first request for them."""
+    for obj in _objects(site, paths):
+        images = obj.unrestrictedTraverse("@@images")
+        for name in names:
+            images.scale(field, scale=name)
@@ -0,0 +1,77 @@
+"""Point plone.cachepurging of every Plone site to the caching proxies.
+
+plone.cachepurging collects the paths of the content a request changes and,
+once the request succeeded, sends each path once as a ``PURGE`` request to
+every caching proxy, from a background thread per proxy. In the deployment
+the proxy is the kube-httpcache signaller, which forwards the requests to
+all Varnish pods.
+
+Environment:
+
+``CACHE_PURGE_PROXIES``
+    Proxy URLs, separated by whitespace, e.g. ``http://httpcache:8090``.
+    On start-up, purging is enabled with these proxies in every Plone site
+    whose settings differ. Unset or empty: the settings are left alone, so
+    they can be managed in the caching control panel.
+"""
+
+from plone.base.interfaces import IPloneSiteRoot
+from plone.cachepurging.interfaces import ICachePurgingSettings
+from plone.registry.interfaces import IRegistry
+from ZODB.POSException import ConflictError
+from zope.component import queryUtility
+
+import logging
+import os
+import transaction
+
+
+logger = logging.getLogger(__name__)
+
+
+def set_proxies(site, proxies):
+    """Enable purging to `proxies` in a site; return whether it changed."""
+    registry = queryUtility(IRegistry, context=site)
+    try:
+        settings = registry.forInterface(ICachePurgingSettings)
+    except (AttributeError, KeyError):
+        logger.warning(
+            "%s: plone.app.caching is not installed, purging is not configured",
+            "/".join(site.getPhysicalPath()),
+        )
+        return False
+    if settings.enabled and tuple(settings.cachingProxies or ()) == proxies:
+        return False
+    settings.enabled = True
+    settings.cachingProxies = proxies
+    return True
+
+
+def configure_on_start(event):
+    """Store CACHE_PURGE_PROXIES in the sites before the server starts.
+
+    Read-only backends skip it. Backends starting at the same time store
+    the same settings, so the one losing the conflict leaves them alone.
+    """
+    proxies = tuple(os.getenv("CACHE_PURGE_PROXIES", "").split())
+    if not proxies:
+        return
+    connection = event.database.open()
+    try:
+        if connection.isReadOnly():
+            return
+        app = connection.root()["Application"]
+        sites = [obj for obj in app.objectValues() if IPloneSiteRoot.providedBy(obj)]
+        changed = [site.getId() for site in sites if set_proxies(site, proxies)]
+        if changed:
+            transaction.commit()
+            logger.info(
+                "Cache purging to %s enabled in %s",
+                " ".join(proxies),
+                ", ".join(changed),
+            )
+    except ConflictError:
+        logger.info("Cache purging settings stored by another backend")
+    finally:
+        transaction.abort()
+        connection.close()
@@ -0,0 +1,149 @@
+"""Prime the ZODB and catalog caches before a backend serves traffic.
+
+``warmup(app)`` loads every Plone site root, the BTrees of its catalog and
+a list of hot paths. It runs
+
+- in-process on start-up with ``WARMUP_ON_START=true``: the pooled ZODB
+  connections are warmed before the WSGI server accepts requests, so the
+  startup and readiness probes only pass once the caches are warm;
+- as the ``warmup`` container command or ``make zope-warmup``: a separate
+  process, which only fills the storage caches (RelStorage's persistent
+  local cache, PostgreSQL's shared buffers).
+
+Environment:
+
+``WARMUP_PATHS``
+    Hot paths, separated by whitespace.
+``WARMUP_PATHS_FILE``
+    A sitemap.xml, an access log sample or a list with one path per line.
+    Access log paths are warmed in order of their frequency.
+``WARMUP_MAX_PATHS``
+    Upper bound for the number of hot paths (default: 1000).
+``WARMUP_CATALOG``
+    Load the catalog BTrees (default: true).
+``WARMUP_CONNECTIONS``
+    Number of pooled connections warmed on start-up (default: 1). Set it
+    to the number of WSGI threads to warm every thread's object cache.
+"""
+
+from Acquisition import aq_base
+from collections import Counter
+from pathlib import Path
+from plone.base.interfaces import IPloneSiteRoot
+from Testing.makerequest import makerequest
+from urllib.parse import urlsplit
+from zExceptions import NotFound
+
+import logging
+import os
+import re
+import time
+
+
+logger = logging.getLogger(__name__)
+
+TRUTHY = frozenset(("t", "true", "y", "yes", "on", "1"))
+LOG_REQUEST = re.compile(r'"(?:GET|HEAD) (\S+) HTTP/[\d.]+"')
+SITEMAP_LOC = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>")
+
+
+def asbool(value):
+    return str(value).strip().lower() in TRUTHY
+
+
+def read_paths(text):
+    """Extract paths from a sitemap, an access log or a plain list."""
+    if "<urlset" in text:
+        return [urlsplit(url).path for url in SITEMAP_LOC.findall(text)]
+    requests = LOG_REQUEST.findall(text)
+    if requests:
+        counts = Counter(urlsplit(url).path for url in requests)
+        return [path for path, _ in counts.most_common()]
+    lines = (line.strip() for line in text.splitlines())
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def hot_paths():
+    paths = os.getenv("WARMUP_PATHS", "").split()
+    paths_file = os.getenv("WARMUP_PATHS_FILE")
+    if paths_file:
+        paths += read_paths(Path(paths_file).read_text())
+    limit = int(os.getenv("WARMUP_MAX_PATHS", "1000"))
+    return list(dict.fromkeys(paths))[:limit]
+
+
+def load_tree(tree):
+    """Load all buckets of a BTree or TreeSet."""
+    for _key in tree:
+        pass
+
+
+def warm_catalog(site):
+    catalog = getattr(aq_base(site), "portal_catalog", None)
+    if catalog is None:
+        return
+    _catalog = catalog._catalog
+    for tree in (_catalog.uids, _catalog.paths, _catalog.data):
+        load_tree(tree)
+    for index in _catalog.indexes.values():
+        for name in ("_index", "_unindex"):
+            tree = getattr(aq_base(index), name, None)
+            if tree is not None and hasattr(tree, "keys"):
+                load_tree(tree)
+
+
+def warm_path(sites, path):
+    """Load the object at a public or physical path, skipping views."""
+    segments = [
+        segment
+        for segment in path.split("/")
+        if segment and not segment.startswith(("@", "++"))
+    ]
+    for site in sites:
+        try:
+            obj = site.unrestrictedTraverse(segments)
+        except (AttributeError, LookupError, NotFound):
+            continue
+        activate = getattr(aq_base(obj), "_p_activate", None)
+        if activate is not None:
+            activate()
+        return True
+    return False
+
+
+def warmup(app):
+    """Load site roots, catalog BTrees and hot paths into the caches."""
+    start = time.monotonic()
+    sites = [obj for obj in app.objectValues() if IPloneSiteRoot.providedBy(obj)]
+    for site in sites:
+        site.getSiteManager()
+        if asbool(os.getenv("WARMUP_CATALOG", "true")):
+            warm_catalog(site)
+    paths = hot_paths()
+    loaded = sum(warm_path(sites, path) for path in paths)
+    logger.info(
+        "Warm-up loaded %d sites and %d of %d hot paths in %.1fs, %d objects cached",
+        len(sites),
+        loaded,
+        len(paths),
+        time.monotonic() - start,
+        app._p_jar.db().cacheSize(),
+    )
+
+
+def warmup_on_start(event):
+    """Warm pooled connections before the WSGI server starts serving.
+
+    Closed connections go back to the pool with their object cache and are
+    handed out to the first requests.
+    """
+    if not asbool(os.getenv("WARMUP_ON_START", "false")):
+        return
+    count = int(os.getenv("WARMUP_CONNECTIONS", "1"))
+    connections = [event.database.open() for _ in range(count)]
+    try:
+        for connection in connections:
+            warmup(makerequest(connection.root()["Application"]))
+    finally:
+        for connection in connections:
+            connection.close()
@@ -2,6 +2,9 @@ from {{ cookiecutter.__python_package }}.testing import FUNCTIONAL_TESTING
 from {{ cookiecutter.__python_package }}.testing import INTEGRATION_TESTING
 from pytest_plone import fixtures_factory
 
+import pytest
+
+
 pytest_plugins = ["pytest_plone"]
 
 globals().update(
@@ -12,3 +15,16 @@ globals().update(
         )
     )
 )
+
+
+def pytest_collection_modifyitems(items):
+    """Group the tests of a layer on one xdist worker (--dist loadgroup).
+
+    Setting up a Plone layer takes seconds, each worker running a test of
+    a layer sets it up once. Tests without a layer run on any worker.
+    """
+    for item in items:
+        for layer in ("functional", "integration"):
+            if layer in item.fixturenames:
+                item.add_marker(pytest.mark.xdist_group(layer))
+                break
@@ -0,0 +1,116 @@
+"""HTTP caching rules installed by the default profile."""
+
+from plone.app.caching.utils import isPurged
+from plone.app.testing import setRoles
+from plone.app.testing import SITE_OWNER_NAME
+from plone.app.testing import SITE_OWNER_PASSWORD
+from plone.app.testing import TEST_USER_ID
+from plone.caching.interfaces import ICacheSettings
+from plone.testing.zope import Browser
+
+import pytest
+import transaction
+
+
+MAPPING = "plone.caching.interfaces.ICacheSettings.operationMapping"
+
+
+@pytest.fixture
+def registry(portal):
+    return portal.portal_registry
+
+
+@pytest.fixture
+def document(functional_portal):
+    setRoles(functional_portal, TEST_USER_ID, ["Manager"])
+    functional_portal.invokeFactory("Document", "news", title="News")
+    document = functional_portal["news"]
+    workflow = functional_portal.portal_workflow
+    if workflow.getChainFor(document):
+        workflow.doActionFor(document, "publish")
+    transaction.commit()
+    return document
+
+
+@pytest.fixture
+def browser(functional_app):
+    browser = Browser(functional_app)
+    browser.handleErrors = False
+    return browser
+
+
+def test_caching_enabled(registry):
+    assert registry.forInterface(ICacheSettings).enabled
+
+
+@pytest.mark.parametrize(
+    "ruleset,operation",
+    [
+        ("plone.resource", "plone.app.caching.strongCaching"),
+        ("plone.stableResource", "plone.app.caching.strongCaching"),
+        ("plone.content.itemView", "plone.app.caching.moderateCaching"),
+        ("plone.content.folderView", "plone.app.caching.moderateCaching"),
+        ("plone.content.dynamic", "plone.app.caching.moderateCaching"),
+        ("plone.content.feed", "plone.app.caching.moderateCaching"),
+        ("plone.content.file", "plone.app.caching.moderateCaching"),
+    ],
+)
+def test_operation_mapping(registry, ruleset, operation):
+    assert registry[MAPPING][ruleset] == operation
+
+
+def test_stable_resources_cached_for_a_year(registry):
+    name = "plone.app.caching.strongCaching.plone.stableResource.maxage"
+    assert registry[name] == 31536000
+
+
+@pytest.mark.parametrize(
+    "ruleset",
+    [
+        "itemView",
+        "folderView",
+        "dynamic",
+        "feed",
+        "file",
+    ],
+)
+def test_content_cached_for_anonymous_only(registry, ruleset):
+    prefix = f"plone.app.caching.moderateCaching.plone.content.{ruleset}"
+    assert registry[f"{prefix}.smaxage"] > 0
+    assert registry[f"{prefix}.anonOnly"] is True
+
+
+@pytest.mark.parametrize(
+    "portal_type",
+    [
+        "Collection",
+        "Document",
+        "Event",
+        "Folder",
+        "Link",
+        "News Item",
+        "Image",
+    ],
+)
+def test_changes_purged(portal, portal_type):
+    setRoles(portal, TEST_USER_ID, ["Manager"])
+    portal.invokeFactory(portal_type, "item")
+    assert isPurged(portal["item"])
+
+
+@pytest.mark.parametrize("accept", ["text/html", "application/json"])
+def test_anonymous_response_cached_in_proxy(browser, document, accept):
+    browser.addHeader("Accept", accept)
+    browser.open(document.absolute_url())
+    cache_control = browser.headers["Cache-Control"]
+    assert "s-maxage=" in cache_control
+    assert "private" not in cache_control
+    assert browser.headers["ETag"]
+
+
+@pytest.mark.parametrize("accept", ["text/html", "application/json"])
+def test_authenticated_response_not_cached(browser, document, accept):
+    browser.addHeader("Accept", accept)
+    browser.addHeader("Authorization", f"Basic {SITE_OWNER_NAME}:{SITE_OWNER_PASSWORD}")
+    browser.open(document.absolute_url())
+    assert browser.headers["Cache-Control"] == "max-age=0, must-revalidate, private"
@@ -0,0 +1,119 @@
+"""Database report (scripts/db_report.py)."""
+
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+
+import importlib.util
+import pytest
+
+
+@pytest.fixture(scope="module")
+def db_report():
+    path = Path(__file__).parent.parent / "scripts" / "db_report.py"
+    spec = importlib.util.spec_from_file_location("db_report", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeCursor:
+    """Answers every query with `rows` of `columns`, recording the queries."""
+
+    def __init__(self, extension=True, columns=("table", "dead_rows"), rows=()):
+        self.extension = extension
+        self.description = [SimpleNamespace(name=name) for name in columns]
+        self.rows = list(rows)
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, query, params=None):
+        self.queries.append(" ".join(query.split()))
+
+    def fetchone(self):
+        return (1,) if self.extension else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def cursor(self):
+        return self._cursor
+
+
+def sections(out):
+    return [line for line in out.getvalue().splitlines() if line.startswith("== ")]
+
+
+def test_report(db_report):
+    cursor = FakeCursor(rows=[("object_state", 1200), ("blob_chunk", None)])
+    out = StringIO()
+    db_report.report(FakeConnection(cursor), out, limit=5)
+    assert sections(out) == [
+        "== Statements by total time ==",
+        "== Statements by mean time ==",
+        "== Database cache hits ==",
+        "== Largest tables: cache hits and scans ==",
+        "== Dead rows (bloat not yet vacuumed) ==",
+    ]
+    assert "ORDER BY total_exec_time DESC" in cursor.queries[1]
+    assert "ORDER BY mean_exec_time DESC" in cursor.queries[2]
+    # Aligned columns, NULL as empty
+    assert out.getvalue().endswith(
+        "table         dead_rows\n"
+        "------------  ---------\n"
+        "object_state  1200     \n"
+        "blob_chunk             \n"
+    )
+
+
+def test_report_without_statements(db_report):
+    out = StringIO()
+    db_report.report(FakeConnection(FakeCursor(extension=False)), out)
+    assert "pg_stat_statements is not installed" in out.getvalue()
+    assert sections(out) == [
+        "== Database cache hits ==",
+        "== Largest tables: cache hits and scans ==",
+        "== Dead rows (bloat not yet vacuumed) ==",
+    ]
+    assert "(no rows)" in out.getvalue()
+
+
+def test_reset(db_report, monkeypatch, capsys):
+    cursor = FakeCursor()
+    connections = []
+
+    def connect(dsn, **kwargs):
+        connections.append((dsn, kwargs))
+        return FakeConnection(cursor)
+
+    monkeypatch.setattr(db_report.psycopg, "connect", connect)
+    assert db_report.main(["--dsn", "dbname=plone", "--reset"]) == 0
+    assert connections == [("dbname=plone", {"autocommit": True})]
+    assert cursor.queries[-2:] == [
+        "SELECT pg_stat_statements_reset()",
+        "SELECT pg_stat_reset()",
+    ]
+    assert capsys.readouterr().out.endswith("Statistics reset\n")
+
+
+def test_no_dsn(db_report, monkeypatch):
+    monkeypatch.delenv(db_report.REPORT_DSN, raising=False)
+    monkeypatch.delenv(db_report.DATABASE_DSN, raising=False)
+    with pytest.raises(SystemExit):
+        db_report.main([])
@@ -0,0 +1,20 @@
+"""Health endpoints for container and Kubernetes probes."""
+
+from plone.testing.zope import Browser
+
+import pytest
+
+
+@pytest.fixture
+def browser(functional_app):
+    browser = Browser(functional_app)
+    browser.handleErrors = False
+    return browser
+
+
+@pytest.mark.parametrize("view,body", [("health", "OK"), ("ready", "READY")])
+def test_probe_on_zope_root(browser, view, body):
+    browser.open(f"http://nohost/@@{view}")
+    assert browser.contents == body
+    assert browser.headers["Content-Type"].startswith("text/plain")
+    assert browser.headers["Cache-Control"] == "no-store"
@@ -0,0 +1,96 @@
+"""Background jobs queued in PostgreSQL."""
+
+from {{ cookiecutter.__python_package }} import jobs
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+from zope.component.hooks import getSite
+
+import pytest
+import transaction
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Register a `record` job handler, returning its calls."""
+    result = []
+
+    def record(site, **payload):
+        result.append((site, getSite(), payload))
+
+    monkeypatch.setitem(jobs.HANDLERS, "record", record)
+    return result
+
+
+@pytest.fixture
+def no_queue(monkeypatch):
+    monkeypatch.delenv("JOBS_DSN", raising=False)
+    monkeypatch.delenv(jobs.DATABASE_DSN, raising=False)
+
+
+def test_enqueue_unknown_job(portal):
+    with pytest.raises(KeyError, match="Unknown job: missing"):
+        jobs.enqueue("missing", portal)
+
+
+def test_enqueue_inline_without_queue(portal, calls, no_queue):
+    jobs.enqueue("record", portal, paths=["/news"])
+    [(site, _current, payload)] = calls
+    assert site is portal
+    assert payload == {"paths": ["/news"]}
+
+
+def test_enqueue_after_commit(portal, calls, monkeypatch):
+    monkeypatch.setenv("JOBS_DSN", "dbname=jobs")
+    jobs.enqueue("record", portal, paths=["/news"])
+    assert calls == []
+    hooks = list(transaction.get().getAfterCommitHooks())
+    assert hooks == [
+        (jobs._insert, ("dbname=jobs", "record", "/plone", {"paths": ["/news"]}), {})
+    ]
+    transaction.abort()
+
+
+def test_run_job_in_site(functional_app, functional_portal, calls):
+    jobs.run_job(functional_app, "record", "/plone", {"paths": ["/news"]})
+    [(site, current, payload)] = calls
+    assert site.getPhysicalPath() == ("", "plone")
+    assert current.getPhysicalPath() == ("", "plone")
+    assert payload == {"paths": ["/news"]}
+
+
+def test_reindex(functional_app, functional_portal):
+    setRoles(functional_portal, TEST_USER_ID, ["Manager"])
+    functional_portal.invokeFactory("Document", "news", title="News")
+    functional_portal["news"].title = "Latest news"
+    transaction.commit()
+    catalog = functional_portal.portal_catalog
+    assert not catalog.unrestrictedSearchResults(Title="Latest")
+
+    jobs.run_job(functional_app, "reindex", "/plone", {"paths": ["news"]})
+    assert len(catalog.unrestrictedSearchResults(Title="Latest")) == 1
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement, params):
+        self.statements.append((statement, params))
+
+
+def test_run_claimed_done(functional_app, functional_portal, calls):
+    conn = FakeConnection()
+    jobs.run_claimed(conn, functional_app, 7, "record", "/plone", {}, 0)
+    assert len(calls) == 1
+    assert conn.statements == [(jobs.DONE, (7,))]
+
+
+def test_run_claimed_failed(functional_app, monkeypatch):
+    def fail(site):
+        raise ValueError("broken")
+
+    monkeypatch.setitem(jobs.HANDLERS, "fail", fail)
+    conn = FakeConnection()
+    jobs.run_claimed(conn, functional_app, 7, "fail", "", {}, 2)
+    # Retried with increasing delay: 30 s times 2 ** attempts
+    assert conn.statements == [(jobs.FAILED, (120, "ValueError('broken')", 7))]
@@ -0,0 +1,48 @@
+"""Cache purging settings from CACHE_PURGE_PROXIES."""
+
+from {{ cookiecutter.__python_package }}.purging import configure_on_start
+from {{ cookiecutter.__python_package }}.purging import set_proxies
+from plone.cachepurging.interfaces import ICachePurgingSettings
+from types import SimpleNamespace
+
+import pytest
+import transaction
+
+
+PROXIES = ("http://httpcache:8090", "http://other:8090")
+
+
+def purging_settings(site):
+    return site.portal_registry.forInterface(ICachePurgingSettings)
+
+
+def test_set_proxies(portal):
+    assert set_proxies(portal, PROXIES) is True
+    settings = purging_settings(portal)
+    assert settings.enabled
+    assert tuple(settings.cachingProxies) == PROXIES
+    # Unchanged settings are not written again
+    assert set_proxies(portal, PROXIES) is False
+
+
+@pytest.fixture
+def opened(functional_app):
+    """Event of the database opening, as on start-up."""
+    return SimpleNamespace(database=functional_app._p_jar.db())
+
+
+def test_configure_on_start(functional_portal, opened, monkeypatch):
+    monkeypatch.setenv("CACHE_PURGE_PROXIES", " ".join(PROXIES))
+    configure_on_start(opened)
+    transaction.begin()
+    settings = purging_settings(functional_portal)
+    assert settings.enabled
+    assert tuple(settings.cachingProxies) == PROXIES
+
+
+def test_configure_on_start_without_proxies(functional_portal, opened, monkeypatch):
+    monkeypatch.setenv("CACHE_PURGE_PROXIES", "")
+    before = tuple(purging_settings(functional_portal).cachingProxies or ())
+    configure_on_start(opened)
+    transaction.begin()
+    assert tuple(purging_settings(functional_portal).cachingProxies or ()) == before
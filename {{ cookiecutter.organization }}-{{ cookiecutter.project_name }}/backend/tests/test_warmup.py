@@ -0,0 +1,90 @@
+"""Cache warm-up on start and as a separate process."""
+
+from {{ cookiecutter.__python_package }} import warmup as warmup_module
+from {{ cookiecutter.__python_package }}.warmup import hot_paths
+from {{ cookiecutter.__python_package }}.warmup import read_paths
+from {{ cookiecutter.__python_package }}.warmup import warm_path
+from {{ cookiecutter.__python_package }}.warmup import warmup
+from {{ cookiecutter.__python_package }}.warmup import warmup_on_start
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+from types import SimpleNamespace
+
+import logging
+import pytest
+
+
+@pytest.fixture
+def document(portal):
+    setRoles(portal, TEST_USER_ID, ["Manager"])
+    portal.invokeFactory("Document", "news", title="News")
+    return portal["news"]
+
+
+def test_read_paths_sitemap():
+    sitemap = (
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        "<url><loc>https://example.com/news</loc></url>"
+        "<url><loc> https://example.com/about </loc></url>"
+        "</urlset>"
+    )
+    assert read_paths(sitemap) == ["/news", "/about"]
+
+
+def test_read_paths_access_log_by_frequency():
+    log = "\n".join(
+        f'10.0.0.1 - - [19/Oct/2026:10:00:00 +0000] "GET {path} HTTP/1.1" 200 512'
+        for path in ("/about", "/news?page=2", "/news", "/events", "/news")
+    )
+    assert read_paths(log) == ["/news", "/about", "/events"]
+
+
+def test_read_paths_list():
+    assert read_paths("# hot paths\n/news\n\n  /about  \n") == ["/news", "/about"]
+
+
+def test_hot_paths_unique_and_bounded(monkeypatch, tmp_path):
+    paths_file = tmp_path / "paths.txt"
+    paths_file.write_text("/news\n/events\n/contact\n")
+    monkeypatch.setenv("WARMUP_PATHS", "/about /news")
+    monkeypatch.setenv("WARMUP_PATHS_FILE", str(paths_file))
+    monkeypatch.setenv("WARMUP_MAX_PATHS", "3")
+    assert hot_paths() == ["/about", "/news", "/events"]
+
+
+@pytest.mark.parametrize(
+    "path,found",
+    [
+        ("/news", True),
+        ("/plone/news", True),
+        ("/news/@@images/image", True),
+        ("/++api++/news", True),
+        ("/missing", False),
+    ],
+)
+def test_warm_path(portal, document, path, found):
+    assert warm_path([portal], path) is found
+
+
+def test_warmup(app, portal, document, monkeypatch, caplog):
+    monkeypatch.setenv("WARMUP_PATHS", "/news /missing")
+    with caplog.at_level(logging.INFO, logger=warmup_module.__name__):
+        warmup(app)
+    assert "loaded 1 sites and 1 of 2 hot paths" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "environ,warmed",
+    [
+        ({}, 0),
+        ({"WARMUP_ON_START": "true"}, 1),
+        ({"WARMUP_ON_START": "true", "WARMUP_CONNECTIONS": "2"}, 2),
+    ],
+)
+def test_warmup_on_start(app, monkeypatch, environ, warmed):
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    calls = []
+    monkeypatch.setattr(warmup_module, "warmup", calls.append)
+    warmup_on_start(SimpleNamespace(database=app._p_jar.db()))
+    assert len(calls) == warmed
@@ -0,0 +1,53 @@
+import { ApiObject, Testing } from 'cdk8s';
+import { Autoscaler, AutoscalerOptions } from './autoscaling';
+
+
+function synth(options: Partial<AutoscalerOptions> = {}): { deployment: any; hpa: any } {
+  const chart = Testing.chart();
+  const target = new ApiObject(chart, 'backend', {
+    apiVersion: 'apps/v1',
+    kind: 'Deployment',
+    metadata: { name: 'backend' },
+    spec: { replicas: 2 },
+  });
+  new Autoscaler(chart, 'autoscaler', { target, minReplicas: 2, maxReplicas: 6, ...options });
+  const manifests = Testing.synth(chart);
+  return {
+    deployment: manifests.find((manifest) => manifest.kind === 'Deployment'),
+    hpa: manifests.find((manifest) => manifest.kind === 'HorizontalPodAutoscaler'),
+  };
+}
+
+
+describe('Autoscaler', () => {
+  test('scales the Deployment on CPU, which no longer fixes its replicas', () => {
+    const { deployment, hpa } = synth();
+    expect(deployment.spec.replicas).toBeUndefined();
+    expect(hpa.spec.scaleTargetRef).toEqual({ apiVersion: 'apps/v1', kind: 'Deployment', name: 'backend' });
+    expect(hpa.spec.minReplicas).toBe(2);
+    expect(hpa.spec.maxReplicas).toBe(6);
+    expect(hpa.spec.metrics).toEqual([
+      { type: 'Resource', resource: { name: 'cpu', target: { type: 'Utilization', averageUtilization: 70 } } },
+    ]);
+  });
+
+  test('request rate from a custom metric', () => {
+    const { hpa } = synth({ requestRate: 20, requestRateMetric: 'plone_requests_per_second' });
+    expect(hpa.spec.metrics[1]).toEqual({
+      type: 'Pods',
+      pods: {
+        metric: { name: 'plone_requests_per_second' },
+        target: { type: 'AverageValue', averageValue: '20' },
+      },
+    });
+  });
+
+  test('scales up at once, down one pod a minute after the stabilization window', () => {
+    const { behavior } = synth({ scaleDownStabilizationSeconds: 600 }).hpa.spec;
+    expect(behavior.scaleUp.stabilizationWindowSeconds).toBe(0);
+    expect(behavior.scaleDown).toEqual({
+      stabilizationWindowSeconds: 600,
+      policies: [{ type: 'Pods', value: 1, periodSeconds: 60 }],
+    });
+  });
+});
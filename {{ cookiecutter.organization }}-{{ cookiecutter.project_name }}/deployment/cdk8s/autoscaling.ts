@@ -0,0 +1,85 @@
+import { Construct } from 'constructs';
+import { ApiObject, JsonPatch } from 'cdk8s';
+
+
+export interface AutoscalerOptions {
+  /** Deployment to scale, e.g. from findDeployment(). */
+  readonly target: ApiObject;
+  readonly minReplicas: number;
+  readonly maxReplicas: number;
+  /** Target average CPU usage, in percent of the container CPU request. */
+  readonly cpuUtilization?: number;
+  /**
+   * Target average requests per second per pod. Needs a custom metrics
+   * adapter (e.g. prometheus-adapter) serving `requestRateMetric`.
+   */
+  readonly requestRate?: number;
+  /** Pods metric with the request rate of each pod. */
+  readonly requestRateMetric?: string;
+  /** Time the load must stay low before pods are removed, in seconds. */
+  readonly scaleDownStabilizationSeconds?: number;
+}
+
+
+/**
+ * HorizontalPodAutoscaler (autoscaling/v2) for a synthesized Deployment.
+ *
+ * Removes the fixed replica count from the Deployment, so applying the
+ * manifests does not reset the count chosen by the autoscaler. Scales up
+ * without delay, but removes at most one pod per minute once the load stayed
+ * low for the stabilization window: new backend pods start with cold caches,
+ * so flapping is expensive.
+ */
+export class Autoscaler extends Construct {
+  public readonly hpa: ApiObject;
+
+  constructor(scope: Construct, id: string, options: AutoscalerOptions) {
+    super(scope, id);
+
+    if (options.target.toJson().spec?.replicas !== undefined) {
+      options.target.addJsonPatch(JsonPatch.remove('/spec/replicas'));
+    }
+
+    const metrics: unknown[] = [{
+      type: 'Resource',
+      resource: {
+        name: 'cpu',
+        target: { type: 'Utilization', averageUtilization: options.cpuUtilization ?? 70 },
+      },
+    }];
+    if (options.requestRate) {
+      metrics.push({
+        type: 'Pods',
+        pods: {
+          metric: { name: options.requestRateMetric ?? 'http_requests_per_second' },
+          target: { type: 'AverageValue', averageValue: String(options.requestRate) },
+        },
+      });
+    }
+
+    this.hpa = new ApiObject(this, 'hpa', {
+      apiVersion: 'autoscaling/v2',
+      kind: 'HorizontalPodAutoscaler',
+      spec: {
+        scaleTargetRef: {
+          apiVersion: 'apps/v1',
+          kind: 'Deployment',
+          name: options.target.name,
+        },
+        minReplicas: options.minReplicas,
+        maxReplicas: options.maxReplicas,
+        metrics,
+        behavior: {
+          scaleUp: {
+            stabilizationWindowSeconds: 0,
+            policies: [{ type: 'Percent', value: 100, periodSeconds: 60 }],
+          },
+          scaleDown: {
+            stabilizationWindowSeconds: options.scaleDownStabilizationSeconds ?? 300,
+            policies: [{ type: 'Pods', value: 1, periodSeconds: 60 }],
+          },
+        },
+      },
+    });
+  }
+}
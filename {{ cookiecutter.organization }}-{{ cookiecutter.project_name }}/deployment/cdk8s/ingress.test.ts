@@ -0,0 +1,62 @@
+import { Testing } from 'cdk8s';
+import { PloneIngress, PloneIngressOptions } from './ingress';
+
+
+// Needs the Kubernetes bindings: run `npx cdk8s import` first.
+
+function synth(options: Partial<PloneIngressOptions> = {}): any[] {
+  const chart = Testing.chart();
+  new PloneIngress(chart, 'ingress', {
+    domain: 'example.com',
+    backendServiceName: 'backend',
+{%- if cookiecutter.include_frontend == "yes" %}
+    frontendServiceName: 'frontend',
+{%- endif %}
+    ...options,
+  });
+  return Testing.synth(chart);
+}
+
+
+// Path, Service and port of the rules of the main Ingress, in order
+function routes(manifests: any[]): [string, string, number][] {
+  const main = manifests.find((manifest) => manifest.metadata.name.includes('main'));
+  return main.spec.rules[0].http.paths.map((path: any) =>
+    [path.path, path.backend.service.name, path.backend.service.port.number]);
+}
+
+
+describe('PloneIngress', () => {
+  test('everything to Plone', () => {
+    expect(routes(synth())).toEqual([
+{%- if cookiecutter.include_frontend == "yes" %}
+      ['/++api++', 'backend', 8080],
+      ['/', 'frontend', 3000],
+{%- else %}
+      ['/', 'backend', 8080],
+{%- endif %}
+    ]);
+  });
+
+  test('static resources to their service first', () => {
+    const manifests = synth({
+      staticService: { name: 'httpcache', port: 80 },
+      staticPaths: ['/static/', '/++plone++'],
+    });
+    expect(routes(manifests).slice(0, 2)).toEqual([['/static/', 'httpcache', 80], ['/++plone++', 'httpcache', 80]]);
+    const main = manifests.find((manifest) => manifest.metadata.name.includes('main'));
+    // Prefix paths may not contain "+"
+    expect(main.spec.rules[0].http.paths[1].pathType).toBe('ImplementationSpecific');
+  });
+
+  test('static paths need a service', () => {
+    expect(routes(synth({ staticPaths: ['/static/'] }))).toEqual(routes(synth()));
+  });
+
+  test('maintenance domain to the backend', () => {
+    const manifests = synth({ domainMaintenance: 'admin.example.com' });
+    const maintenance = manifests.find((manifest) => manifest.metadata.name.includes('maintenance'));
+    expect(maintenance.spec.rules[0].host).toBe('admin.example.com');
+    expect(maintenance.spec.rules[0].http.paths[0].backend.service.name).toBe('backend');
+  });
+});
@@ -10,6 +10,23 @@ export interface PloneIngressOptions {
 {% if cookiecutter.include_frontend == "yes" %}
   readonly frontendServiceName: string;
 {% endif %}
+{% if cookiecutter.storage_backend == "relstorage" %}
+  /**
+   * Backend for anonymous requests (read-only replicas). Requests with an
+   * authentication cookie, and those to `writePaths`, stay on the
+   * read-write backend. Needs ingress-nginx (canary ingress).
+   */
+  readonly readOnlyServiceName?: string;
+  /** Path prefixes anonymous users write through, e.g. login. */
+  readonly writePaths?: string[];
+{% endif %}
+  /**
+   * Service for static resources, e.g. the HTTP cache, so that they are not
+   * served by Plone processes busy with pages.
+   */
+  readonly staticService?: { name: string; port: number };
+  /** Path prefixes of static resources, sent to `staticService`, e.g. '/static/'. */
+  readonly staticPaths?: string[];
 }
 
 
@@ -22,6 +39,32 @@ export class PloneIngress extends Construct {
       annotations['cert-manager.io/cluster-issuer'] = options.certIssuer;
     }
 
+    // Static resources go to their own service, if any. ImplementationSpecific
+    // paths may contain "+" (++plone++) and are string prefixes in
+    // ingress-nginx: '/static' would also match '/statically-named', so
+    // directories end with '/'
+    const staticService = options.staticService;
+    const staticPaths = staticService
+      ? (options.staticPaths ?? []).map((path) => ({
+        path,
+        pathType: 'ImplementationSpecific',
+        backend: { service: { name: staticService.name, port: { number: staticService.port } } },
+      }))
+      : [];
+
+{% if cookiecutter.storage_backend == "relstorage" %}
+    // Anonymous backend traffic goes to the read-only backends, if any
+    const backendPath = (path: string, serviceName: string) => ({
+      path,
+      pathType: 'Prefix',
+      backend: { service: { name: serviceName, port: { number: 8080 } } },
+    });
+    const readServiceName = options.readOnlyServiceName ?? options.backendServiceName;
+    const writePaths = options.readOnlyServiceName
+      ? (options.writePaths ?? []).map((path) => backendPath(path, options.backendServiceName))
+      : [];
+
+{% endif %}
 {% if cookiecutter.include_frontend == "yes" %}
     // Main ingress — frontend serves /, API requests go to backend
     new k8s.KubeIngress(this, 'main', {
@@ -36,6 +79,11 @@ export class PloneIngress extends Construct {
             host: options.domain,
             http: {
               paths: [
+                ...staticPaths,
+{% if cookiecutter.storage_backend == "relstorage" %}
+                ...writePaths,
+                backendPath('/++api++', readServiceName),
+{% else %}
                 {
                   path: '/++api++',
                   pathType: 'Prefix',
@@ -46,6 +94,7 @@ export class PloneIngress extends Construct {
                     },
                   },
                 },
+{% endif %}
                 {
                   path: '/',
                   pathType: 'Prefix',
@@ -76,6 +125,11 @@ export class PloneIngress extends Construct {
             host: options.domain,
             http: {
               paths: [
+                ...staticPaths,
+{% if cookiecutter.storage_backend == "relstorage" %}
+                ...writePaths,
+                backendPath('/', readServiceName),
+{% else %}
                 {
                   path: '/',
                   pathType: 'Prefix',
@@ -86,6 +140,7 @@ export class PloneIngress extends Construct {
                     },
                   },
                 },
+{% endif %}
               ],
             },
           },
@@ -93,6 +148,31 @@ export class PloneIngress extends Construct {
       },
     });
 {% endif %}
+{% if cookiecutter.storage_backend == "relstorage" %}
+
+    // Canary ingress: authenticated requests (Plone and Volto auth cookies)
+    // on the anonymous path go to the read-write backends. The pattern
+    // matches cookie names only, not e.g. `my__ac=` or a value containing them
+    if (options.readOnlyServiceName) {
+      new k8s.KubeIngress(this, 'authenticated', {
+        metadata: {
+          annotations: {
+            'nginx.ingress.kubernetes.io/canary': 'true',
+            'nginx.ingress.kubernetes.io/canary-by-header': 'Cookie',
+            'nginx.ingress.kubernetes.io/canary-by-header-pattern': '(^|;\\s*)(__ac|auth_token)=',
+          },
+        },
+        spec: {
+          rules: [{
+            host: options.domain,
+            http: {
+              paths: [backendPath('{% if cookiecutter.include_frontend == "yes" %}/++api++{% else %}/{% endif %}', options.backendServiceName)],
+            },
+          }],
+        },
+      });
+    }
+{% endif %}
 
     // Maintenance ingress — direct backend access
     if (options.domainMaintenance) {
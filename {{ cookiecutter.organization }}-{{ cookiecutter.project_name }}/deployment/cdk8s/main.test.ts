@@ -0,0 +1,317 @@
+import { Testing } from 'cdk8s';
+import { Construct } from 'constructs';
+import { {{ cookiecutter.project_name | capitalize }}Chart } from './main';
+import { findDeployment } from './patches';
+{%- if cookiecutter.include_varnish == "yes" %}
+import { cacheService } from './varnish';
+{%- endif %}
+{%- if cookiecutter.include_cnpg == "yes" and cookiecutter.storage_backend != "none" %}
+import { CloudNativePGCluster } from './postgres';
+{%- endif %}
+
+
+// The chart synthesized with `environment` added to the process environment,
+// as `cdk8s synth` does with the variables of .env
+function synth(environment: { [name: string]: string } = {}): Construct {
+  const saved = process.env;
+  process.env = { ...saved, ...environment };
+  try {
+    const chart = new {{ cookiecutter.project_name | capitalize }}Chart(Testing.app(), 'test');
+    Testing.synth(chart);
+    return chart;
+  } finally {
+    process.env = saved;
+  }
+}
+
+
+// Manifest of the Deployment of `role` below the construct `id` of the chart
+function deployment(chart: Construct, id: string, role: string = id): any {
+  return findDeployment(chart.node.findChild(id), role).toJson();
+}
+
+
+// Synthesized manifests of `kind`
+function manifests(chart: Construct, kind: string): any[] {
+  return Testing.synth(chart).filter((manifest) => manifest.kind === kind);
+}
+
+
+// Environment of the first container, with the plain values
+function containerEnv(manifest: any): { [name: string]: string } {
+  const result: { [name: string]: string } = {};
+  for (const variable of manifest.spec.template.spec.containers[0].env ?? []) {
+    result[variable.name] = variable.value;
+  }
+  return result;
+}
+
+
+describe('backend tuning', () => {
+  test('derived from the resource limits of the SIZE preset', () => {
+    const env = containerEnv(deployment(synth({ SIZE: 'large' }), 'plone', 'backend'));
+    // 2 CPU, 4Gi
+    expect(env.INSTANCE_wsgi_threads).toBe('4');
+    expect(env.INSTANCE_db_pool_size).toBe('4');
+    expect(env.INSTANCE_db_cache_size_bytes).toBe('{% if cookiecutter.storage_backend == "relstorage" %}358MB{% else %}448MB{% endif %}');
+{%- if cookiecutter.storage_backend == "relstorage" %}
+    expect(env.INSTANCE_db_relstorage_cache_local_mb).toBe('358');
+{%- endif %}
+  });
+
+  test('INSTANCE_* variables set in the environment win', () => {
+    const env = containerEnv(deployment(synth({ SIZE: 'large', INSTANCE_wsgi_threads: '3' }), 'plone', 'backend'));
+    expect(env.INSTANCE_wsgi_threads).toBe('3');
+    expect(env.INSTANCE_db_pool_size).toBe('4');
+  });
+
+{%- if cookiecutter.storage_backend == "none" %}
+
+  test('gunicorn runs one process on FileStorage', () => {
+    const env = containerEnv(deployment(synth({ SIZE: 'large', WSGI_SERVER: 'gunicorn' }), 'plone', 'backend'));
+    expect(env.WSGI_SERVER).toBe('gunicorn');
+    expect(env.WSGI_WORKERS).toBe('1');
+    expect(env.INSTANCE_wsgi_threads).toBe('4');
+  });
+{%- else %}
+
+  test('gunicorn splits the CPUs over processes', () => {
+    const env = containerEnv(deployment(synth({ SIZE: 'large', WSGI_SERVER: 'gunicorn' }), 'plone', 'backend'));
+    expect(env.WSGI_SERVER).toBe('gunicorn');
+    expect(env.WSGI_WORKERS).toBe('2');
+    expect(env.INSTANCE_wsgi_threads).toBe('2');
+  });
+{%- endif %}
+});
+
+
+describe('autoscaling', () => {
+  test('only with a maximum above the replicas', () => {
+    expect(manifests(synth(), 'HorizontalPodAutoscaler')).toEqual([]);
+    const chart = synth({ BACKEND_REPLICAS: '2', BACKEND_MAX_REPLICAS: '6' });
+    const [hpa] = manifests(chart, 'HorizontalPodAutoscaler');
+    expect(hpa.spec.scaleTargetRef.name).toBe(findDeployment(chart.node.findChild('plone'), 'backend').name);
+    expect(hpa.spec.minReplicas).toBe(2);
+    expect(hpa.spec.maxReplicas).toBe(6);
+  });
+});
+
+
+describe('resources and disruptions', () => {
+  test('SIZE preset with single values from the environment', () => {
+    const chart = synth({ SIZE: 'small', BACKEND_LIMIT_MEMORY: '2Gi' });
+    const { resources } = deployment(chart, 'plone', 'backend').spec.template.spec.containers[0];
+    expect(resources.limits.memory).toBe('2Gi');
+    expect(resources.requests.memory).toBe('1536Mi');
+  });
+
+  test('every workload has a disruption budget and is spread', () => {
+    const chart = synth({ PDB_MAX_UNAVAILABLE: '50%' });
+    const workloads = [...manifests(chart, 'Deployment'), ...manifests(chart, 'StatefulSet')];
+    const budgets = manifests(chart, 'PodDisruptionBudget');
+    expect(budgets).toHaveLength(workloads.length);
+    for (const budget of budgets) {
+      expect(budget.spec.maxUnavailable).toBe('50%');
+    }
+    for (const workload of workloads) {
+      expect(workload.spec.template.spec.topologySpreadConstraints).toHaveLength(2);
+    }
+  });
+});
+{%- if cookiecutter.include_cnpg == "yes" %}
+
+
+describe('postgres', () => {
+  const parameters = (chart: Construct) => manifests(chart, 'Cluster')[0].spec.postgresql.parameters;
+
+  test('max_connections covers the backends at their maximum scale', () => {
+    const scaled = synth({ BACKEND_REPLICAS: '2', BACKEND_MAX_REPLICAS: '10' });
+    const fixed = synth({ BACKEND_REPLICAS: '2' });
+    // 8 more medium backends, {{ '4 connections each for RelStorage' if cookiecutter.storage_backend == 'relstorage' else '2 connections each' }}, with 25% headroom
+    expect(Number(parameters(scaled).max_connections) - Number(parameters(fixed).max_connections))
+      .toBe({{ '40' if cookiecutter.storage_backend == 'relstorage' else '20' }});
+  });
+
+  test('PG_PROFILE and PG_PARAMETERS', () => {
+    const chart = synth({ PG_PROFILE: 'jsonb', PG_PARAMETERS: '{"work_mem": "64MB"}' });
+    expect(parameters(chart).work_mem).toBe('64MB');
+    expect(parameters(chart).default_toast_compression).toBe('lz4');
+    expect(() => synth({ PG_PROFILE: 'olap' })).toThrow(/profile/);
+  });
+
+  test('PG_STATEMENT_STATS and PG_SLOW_QUERY_MS', () => {
+    expect(parameters(synth())['pg_stat_statements.track']).toBe('all');
+    const chart = synth({ PG_STATEMENT_STATS: 'false', PG_SLOW_QUERY_MS: '250' });
+    expect(parameters(chart)).not.toHaveProperty(['pg_stat_statements.track']);
+    expect(parameters(chart).log_min_duration_statement).toBe('250');
+  });
+});
+{%- endif %}
+{%- if cookiecutter.include_cnpg == "yes" and cookiecutter.storage_backend != "none" %}
+
+
+describe('pooler', () => {
+  const dsn = '{% if cookiecutter.storage_backend == "relstorage" %}INSTANCE_db_relstorage_postgresql_dsn{% else %}INSTANCE_db_pgjsonb_dsn{% endif %}';
+
+  test('backends connect through PgBouncer, maintenance to the primary', () => {
+    const chart = synth({ PG_POOLER: 'session' });
+    const db = chart.node.findChild('db') as CloudNativePGCluster;
+    expect(db.serviceName).toBe(manifests(chart, 'Pooler')[0].metadata.name);
+    const env = containerEnv(deployment(chart, 'plone', 'backend'));
+    expect(env[dsn]).toContain(`host='${db.serviceName}'`);
+    expect(env.DB_REPORT_DSN).toContain(`host='${db.primaryServiceName}'`);
+{%- if cookiecutter.storage_backend == "relstorage" %}
+    const [pack] = manifests(chart, 'CronJob');
+    const packEnv = pack.spec.jobTemplate.spec.template.spec.containers[0].env;
+    expect(packEnv.find((variable: any) => variable.name === dsn).value).toContain(`host='${db.primaryServiceName}'`);
+{%- endif %}
+  });
+
+  test('without a pooler, backends connect to the primary', () => {
+    const chart = synth({ PG_POOLER: '' });
+    const db = chart.node.findChild('db') as CloudNativePGCluster;
+    expect(manifests(chart, 'Pooler')).toEqual([]);
+    expect(containerEnv(deployment(chart, 'plone', 'backend'))[dsn]).toContain(`host='${db.primaryServiceName}'`);
+  });
+{%- if cookiecutter.storage_backend == "relstorage" %}
+
+  test('RelStorage keeps session state, which transaction pooling loses', () => {
+    expect(() => synth({ PG_POOLER: 'transaction' })).toThrow(/session pooler mode/);
+  });
+{%- endif %}
+});
+{%- endif %}
+{%- if cookiecutter.storage_backend == "relstorage" %}
+
+
+describe('read-only backends', () => {
+  test('off by default', () => {
+    expect(synth().node.tryFindChild('readonly')).toBeUndefined();
+  });
+
+  test('on the database replicas', () => {
+    const chart = synth({ READONLY_REPLICAS: '2' });
+    const readOnly = deployment(chart, 'readonly');
+    expect(readOnly.spec.replicas).toBe(2);
+{%- if cookiecutter.include_cnpg == "yes" %}
+    const db = chart.node.findChild('db') as CloudNativePGCluster;
+    expect(containerEnv(readOnly).INSTANCE_db_relstorage_postgresql_dsn).toContain(`host='${db.readServiceName}'`);
+{%- endif %}
+    // Startup, liveness and readiness probes of the read-write backends
+    expect(readOnly.spec.template.spec.containers[0].readinessProbe.httpGet.path).toBe('/@@ready');
+{%- if cookiecutter.include_ingress == "yes" %}
+    const service = manifests(chart, 'Service').find((manifest) => manifest.metadata.name.includes('readonly'));
+    const [canary] = manifests(chart, 'Ingress').filter(
+      (ingress) => ingress.metadata.annotations?.['nginx.ingress.kubernetes.io/canary'] === 'true');
+    expect(canary.spec.rules[0].http.paths[0].backend.service.name).not.toBe(service.metadata.name);
+    const services = manifests(chart, 'Ingress').flatMap((ingress) =>
+      ingress.spec.rules.flatMap((rule: any) => rule.http.paths.map((path: any) => path.backend.service.name)));
+    expect(services).toContain(service.metadata.name);
+{%- endif %}
+  });
+});
+{%- endif %}
+{%- if cookiecutter.storage_backend != "none" %}
+
+
+describe('worker', () => {
+  test('tuned for its own limits', () => {
+    const chart = synth({ SIZE: 'large', WORKER_LIMIT_CPU: '1', WORKER_LIMIT_MEMORY: '1Gi' });
+    const env = containerEnv(deployment(chart, 'worker'));
+    expect(env.INSTANCE_wsgi_threads).toBe('2');
+    expect(env.INSTANCE_db_pool_size).toBe('2');
+    expect(containerEnv(deployment(chart, 'plone', 'backend')).INSTANCE_db_pool_size).toBe('4');
+  });
+});
+{%- endif %}
+{%- if cookiecutter.include_varnish == "yes" %}
+
+
+describe('varnish', () => {
+  // The rendered VCL, in the ConfigMap of the kube-httpcache chart
+  const vcl = (chart: Construct): string => manifests(chart, 'ConfigMap')
+    .flatMap((configMap) => Object.values(configMap.data ?? {}) as string[])
+    .find((value) => value.startsWith('vcl 4.1;'))!;
+  const varnishArgs = (chart: Construct): string[] => manifests(chart, 'StatefulSet')
+    .concat(manifests(chart, 'Deployment'))
+    .flatMap((workload) => workload.spec.template.spec.containers)
+    .flatMap((container) => container.args ?? []);
+
+  test('VCL with the VARNISH_ settings', () => {
+    const chart = synth({ VARNISH_GRACE: '2h', VARNISH_PURGE_NETWORKS: '10.1.0.0/16' });
+    const rendered = vcl(chart);
+    expect(rendered).not.toMatch(/\$\{[A-Z_]+\}/);
+    expect(rendered).toContain('set beresp.grace = 2h;');
+    expect(rendered).toContain('set beresp.keep = 1d;');
+    expect(rendered).toContain('"10.1.0.0"/16;');
+    expect(() => synth({ VARNISH_KEEP: 'forever' })).toThrow(/Invalid VCL duration/);
+  });
+
+  test('backends purge through the signaller', () => {
+    const chart = synth();
+    const [service] = manifests(chart, 'Service').filter((manifest) =>
+      manifest.spec.ports.some((port: any) => port.targetPort === 8090 || port.port === 8090));
+    const purge = containerEnv(deployment(chart, 'plone', 'backend')).CACHE_PURGE_PROXIES;
+    expect(purge).toMatch(new RegExp(`^http://${service.metadata.name}:\\d+$`));
+    expect(containerEnv(deployment(synth({ CACHE_PURGE_PROXIES: '' }), 'plone', 'backend')).CACHE_PURGE_PROXIES).toBe('');
+  });
+
+  test('VARNISH_REPLICAS pods, each with its own storage', () => {
+    const chart = synth({ VARNISH_REPLICAS: '3' });
+    const [varnish] = manifests(chart, 'StatefulSet').concat(manifests(chart, 'Deployment'))
+      .filter((workload) => workload.spec.template.spec.containers
+        .some((container: any) => (container.args ?? []).some((arg: string) => arg.startsWith('-varnish-storage='))));
+    expect(varnish.spec.replicas).toBe(3);
+    expect(varnishArgs(chart)).toContain('-varnish-storage=malloc,768M');
+  });
+
+  test('cache storage from the memory limit', () => {
+    expect(varnishArgs(synth({ SIZE: 'large' }))).toContain('-varnish-storage=malloc,3072M');
+    expect(varnishArgs(synth({ VARNISH_STORAGE_SIZE: '2G' }))).toContain('-varnish-storage=malloc,2G');
+  });
+});
+{%- endif %}
+{%- if cookiecutter.include_ingress == "yes" and cookiecutter.include_varnish == "yes" %}
+
+
+describe('ingress', () => {
+  // Paths of the main Ingress to the HTTP cache
+  const cachedPaths = (chart: Construct): string[] => {
+    const service = cacheService(chart.node.findChild('httpcache')).name;
+    const main = manifests(chart, 'Ingress').find((ingress) => ingress.spec.rules[0].host === 'example.com');
+    return main.spec.rules[0].http.paths
+      .filter((path: any) => path.backend.service.name === service)
+      .map((path: any) => path.path);
+  };
+
+  test('static resources from the HTTP cache', () => {
+    const paths = cachedPaths(synth({ DOMAIN: 'example.com' }));
+    expect(paths).toEqual([{% if cookiecutter.include_frontend == "yes" %}'/static/', '/assets/'{% else %}
+      '/++plone++', '/++resource++', '/++theme++',
+      '/Plone/++plone++', '/Plone/++resource++', '/Plone/++theme++',
+    {% endif %}]);
+    // ingress-nginx matches them as string prefixes
+    for (const path of paths) {
+      expect('/statically-named'.startsWith(path)).toBe(false);
+    }
+  });
+
+  test('INGRESS_STATIC_PATHS', () => {
+    expect(cachedPaths(synth({ DOMAIN: 'example.com', INGRESS_STATIC_PATHS: '' }))).toEqual([]);
+    expect(cachedPaths(synth({ DOMAIN: 'example.com', INGRESS_STATIC_PATHS: '/media/' }))).toEqual(['/media/']);
+  });
+});
+{%- endif %}
+{%- if cookiecutter.memory_allocator != "glibc" %}
+
+
+describe('memory allocator', () => {
+  test('image defaults unless set in the environment', () => {
+    const variable = '{% if cookiecutter.memory_allocator == "jemalloc" %}MALLOC_CONF{% else %}MIMALLOC_PURGE_DELAY{% endif %}';
+    expect(containerEnv(deployment(synth(), 'plone', 'backend'))).not.toHaveProperty(variable);
+    const env = containerEnv(deployment(synth({ MALLOC_LIBRARY: '', [variable]: '1' }), 'plone', 'backend'));
+    expect(env.MALLOC_LIBRARY).toBe('');
+    expect(env[variable]).toBe('1');
+  });
+});
+{%- endif %}
@@ -8,22 +8,112 @@ import { CloudNativePGCluster } from './postgres';
 {% if cookiecutter.include_ingress == "yes" %}
 import { PloneIngress } from './ingress';
 {% endif %}
+{% if cookiecutter.storage_backend == "relstorage" %}
+import { ZodbPack } from './pack';
+import { ReadOnlyBackend } from './readonly';
+{% endif %}
+import { Autoscaler } from './autoscaling';
+import {
+{%- if cookiecutter.storage_backend != "none" %}
+  addCacheVolume,
+{%- endif %}
+  addDisruptionBudget,
+{%- if cookiecutter.include_varnish == "yes" %}
+  addEnvVariable,
+{%- endif %}
+  addHttpProbes,
+  addTopologySpread,
+  findDeployment,
+  findWorkloads,
+} from './patches';
+import { backendConnections, backendTuning, parseCpu, parseMemory, roleResources{% if cookiecutter.include_varnish == "yes" %}, varnishStorageSize{% endif %} } from './sizing';
+{% if cookiecutter.include_varnish == "yes" %}
+import { cacheService, renderVcl, setCacheStorage, setReplicas, signallerUrl, vclAcl, vclDuration } from './varnish';
+{% endif %}{% if cookiecutter.storage_backend != "none" %}
+import { Worker } from './worker';
+{% endif %}
+{% if cookiecutter.include_varnish == "yes" %}
+import * as fs from 'fs';
+import * as path from 'path';
+{% endif %}
 import * as process from 'process';
 
 
+/** Copy of `env` with the tuning variables added. */
+function withTuning(env: kplus.Env, tuning: { [name: string]: string }): kplus.Env {
+  const result = new kplus.Env([], { ...env.variables });
+  for (const [name, value] of Object.entries(tuning)) {
+    result.addVariable(name, kplus.EnvValue.fromValue(value));
+  }
+  return result;
+}
+
+
 export class {{ cookiecutter.project_name | capitalize }}Chart extends Chart {
   constructor(scope: Construct, id: string, props: ChartProps = {}) {
     super(scope, id, props);
 
     const image = process.env.IMAGE ?? '{{ cookiecutter.__container_registry }}/{{ cookiecutter.__target }}:latest';
-{% if cookiecutter.include_cnpg == "yes" %}
 
-    // ---- PostgreSQL (CloudNativePG) ----
+    // ---- Resource preset: small, medium, large or custom ----
+    const size = process.env.SIZE ?? 'medium';
+
+    // ---- Backend resources and the tuning derived from them ----
+    const backendResources = roleResources(size, 'backend', process.env);
+    const tuning = backendTuning(
+      parseCpu(backendResources.limitCpu),
+      parseMemory(backendResources.limitMemory),
+      process.env.WSGI_SERVER ?? 'waitress',
+    );
+    for (const name of Object.keys(tuning)) {
+      // INSTANCE_* values set in the environment win over derived ones
+      tuning[name] = process.env[name] ?? tuning[name];
+    }
+{% if cookiecutter.storage_backend != "none" %}
+    // Workers{% if cookiecutter.storage_backend == "relstorage" %} and the pack job{% endif %} run one Zope process within their own limit
+    const workerLimitCpu = process.env.WORKER_LIMIT_CPU ?? '1';
+    const workerLimitMemory = process.env.WORKER_LIMIT_MEMORY ?? '1Gi';
+    const workerTuning = backendTuning(parseCpu(workerLimitCpu), parseMemory(workerLimitMemory));
+{% endif %}
+
+    // ---- Replicas; a maximum above the count enables autoscaling ----
+    const backendReplicas = Number(process.env.BACKEND_REPLICAS ?? '2');
+    const backendMaxReplicas = Number(process.env.BACKEND_MAX_REPLICAS ?? '0');
+{% if cookiecutter.include_frontend == "yes" %}    const frontendReplicas = Number(process.env.FRONTEND_REPLICAS ?? '2');
+    const frontendMaxReplicas = Number(process.env.FRONTEND_MAX_REPLICAS ?? '0');
+{% endif %}{% if cookiecutter.storage_backend != "none" %}    const workerReplicas = Number(process.env.WORKER_REPLICAS ?? '1');
+{% endif %}{% if cookiecutter.storage_backend == "relstorage" %}    const readOnlyReplicas = Number(process.env.READONLY_REPLICAS ?? '0');
+{% endif %}{% if cookiecutter.include_cnpg == "yes" %}
+    // ---- PostgreSQL (CloudNativePG), optionally behind PgBouncer ----
+    // Parameters derive from the resources, the profile and the connections;
+    // PG_POOLER=session or transaction. Connections cover all backends at
+    // their maximum scale{% if cookiecutter.storage_backend != "none" %}, and the workers with their ZODB connections and
+    // the job queue each{% endif %}
+    const poolerMode = process.env.PG_POOLER ?? '';
+    const clientConnections = Math.max(backendReplicas, backendMaxReplicas) * backendConnections(tuning){% if cookiecutter.storage_backend != "none" %}
+      + workerReplicas * (backendConnections(workerTuning) + 1){% endif %}{% if cookiecutter.storage_backend == "relstorage" %}
+      // Standbys need the same max_connections as the primary
+      + readOnlyReplicas * backendConnections(tuning){% endif %};
     const db = new CloudNativePGCluster(this, 'db', {
       instances: Number(process.env.PG_INSTANCES ?? '2'),
       storageSize: process.env.PG_STORAGE ?? '20Gi',
+      resources: roleResources(size, 'postgres', process.env),
+      profile: process.env.PG_PROFILE ?? '{% if cookiecutter.storage_backend == "pgjsonb" %}jsonb{% else %}oltp{% endif %}',
+      clientConnections,
+      statementStats: process.env.PG_STATEMENT_STATS !== 'false',
+      slowQueryMs: process.env.PG_SLOW_QUERY_MS ? Number(process.env.PG_SLOW_QUERY_MS) : undefined,
+      parameters: process.env.PG_PARAMETERS ? JSON.parse(process.env.PG_PARAMETERS) : undefined,
+      pooler: poolerMode ? {
+        mode: poolerMode,
+        instances: Number(process.env.PG_POOLER_INSTANCES ?? '2'),
+        poolSize: process.env.PG_POOL_SIZE ? Number(process.env.PG_POOL_SIZE) : undefined,
+{% if cookiecutter.storage_backend == "relstorage" %}        // RelStorage prepares statements per connection and keeps session state
+        sessionState: true,
+{% endif %}      } : undefined,
     });
-
+{% if cookiecutter.storage_backend != "none" %}    // The primary, bypassing PgBouncer: for {% if cookiecutter.storage_backend == "relstorage" %}the pack job and {% endif %}db-report
+    const primaryDsn = `host='${db.primaryServiceName}' dbname='plone' user='$(SECRET_POSTGRESQL_USERNAME)' password='$(SECRET_POSTGRESQL_PASSWORD)'`;
+{% endif %}
     const env = new kplus.Env([], {
       SECRET_POSTGRESQL_USERNAME: {
         valueFrom: { secretKeyRef: { name: `${db.secretName}`, key: 'username' } },
@@ -38,18 +128,19 @@ export class {{ cookiecutter.project_name | capitalize }}Chart extends Chart {
       INSTANCE_db_relstorage_postgresql_dsn: {
         value: `host='${db.serviceName}' dbname='plone' user='$(SECRET_POSTGRESQL_USERNAME)' password='$(SECRET_POSTGRESQL_PASSWORD)'`,
       },
+      DB_REPORT_DSN: { value: primaryDsn },
 {% elif cookiecutter.storage_backend == "pgjsonb" %}
       INSTANCE_db_storage: { value: 'pgjsonb' },
       INSTANCE_db_blob_mode: { value: 'cache' },
       INSTANCE_db_pgjsonb_dsn: {
         value: `host='${db.serviceName}' dbname='plone' user='$(SECRET_POSTGRESQL_USERNAME)' password='$(SECRET_POSTGRESQL_PASSWORD)'`,
       },
+      DB_REPORT_DSN: { value: primaryDsn },
 {% else %}
       // Configure your database storage via environment variables
 {% endif %}
     });
 {% else %}
-
     // ---- Database environment (configure for your database) ----
     const env = new kplus.Env([], {
 {% if cookiecutter.storage_backend == "relstorage" %}
@@ -71,29 +162,212 @@ export class {{ cookiecutter.project_name | capitalize }}Chart extends Chart {
     });
 {% endif %}
 
+    // ---- Cache warm-up: backends only listen once their caches are warm ----
+    env.addVariable('WARMUP_ON_START', kplus.EnvValue.fromValue(process.env.WARMUP_ON_START ?? 'true'));
+    env.addVariable('WARMUP_CONNECTIONS', kplus.EnvValue.fromValue(process.env.WARMUP_CONNECTIONS ?? '1'));
+
+{% if cookiecutter.memory_allocator != "glibc" %}
+    // ---- Memory allocator: image defaults unless set in the environment ----
+{% if cookiecutter.memory_allocator == "jemalloc" %}
+    for (const name of ['MALLOC_LIBRARY', 'MALLOC_CONF']) {
+{% else %}
+    for (const name of ['MALLOC_LIBRARY', 'MIMALLOC_PURGE_DELAY']) {
+{% endif %}
+      const value = process.env[name];
+      if (value !== undefined) {
+        env.addVariable(name, kplus.EnvValue.fromValue(value));
+      }
+    }
+
+{% endif %}
+    // ---- Backend tuning derived from the resources ----
+    const backendEnv = withTuning(env, tuning);
+
     // ---- Plone (unified image, args select role) ----
     const plone = new Plone(this, 'plone', {
       version: process.env.IMAGE_TAG ?? 'latest',
       backend: {
         image: image,
         args: ['start-backend'],
-        environment: env,
-        replicas: Number(process.env.BACKEND_REPLICAS ?? '2'),
+        environment: backendEnv,
+        replicas: backendReplicas,
+        ...backendResources,
       },
 {% if cookiecutter.include_frontend == "yes" %}
       frontend: {
         image: image,
         args: ['start-frontend'],
-        replicas: Number(process.env.FRONTEND_REPLICAS ?? '2'),
+        replicas: frontendReplicas,
+        ...roleResources(size, 'frontend', process.env),
       },
 {% endif %}
     });
+
+    const backend = findDeployment(plone, 'backend');
+
+    // ---- Probes: traffic only reaches pods that loaded ZCML and their sites ----
+    addHttpProbes(backend, {
+      port: 8080,
+      healthPath: '/@@health',
+      readyPath: '/@@ready',
+      startupSeconds: Number(process.env.BACKEND_STARTUP_SECONDS ?? '300'),
+    });
+{% if cookiecutter.include_frontend == "yes" %}
+    addHttpProbes(findDeployment(plone, 'frontend'), {
+      port: 3000,
+      healthPath: '/health',
+      readyPath: '/health/ready',
+      startupSeconds: Number(process.env.FRONTEND_STARTUP_SECONDS ?? '120'),
+    });
+{% endif %}
+
+    // ---- Autoscaling on CPU and, with a metrics adapter, request rate ----
+    const scaleDownSeconds = Number(process.env.HPA_SCALE_DOWN_SECONDS ?? '300');
+    if (backendMaxReplicas > backendReplicas) {
+      new Autoscaler(this, 'backend-autoscaler', {
+        target: backend,
+        minReplicas: backendReplicas,
+        maxReplicas: backendMaxReplicas,
+        cpuUtilization: Number(process.env.BACKEND_HPA_CPU ?? '70'),
+        requestRate: Number(process.env.BACKEND_HPA_RPS ?? '0'),
+        requestRateMetric: process.env.HPA_RPS_METRIC,
+        scaleDownStabilizationSeconds: scaleDownSeconds,
+      });
+    }
+{% if cookiecutter.include_frontend == "yes" %}
+    if (frontendMaxReplicas > frontendReplicas) {
+      new Autoscaler(this, 'frontend-autoscaler', {
+        target: findDeployment(plone, 'frontend'),
+        minReplicas: frontendReplicas,
+        maxReplicas: frontendMaxReplicas,
+        cpuUtilization: Number(process.env.FRONTEND_HPA_CPU ?? '70'),
+        requestRate: Number(process.env.FRONTEND_HPA_RPS ?? '0'),
+        requestRateMetric: process.env.HPA_RPS_METRIC,
+        scaleDownStabilizationSeconds: scaleDownSeconds,
+      });
+    }
+{% endif %}
+{% if cookiecutter.storage_backend != "none" %}
+
+    // ---- Client cache volume at /cache, where the image keeps its caches ----
+    // An emptyDir per pod, surviving container restarts. Opt-in:
+    // BACKEND_CACHE_HOSTPATH (node-local directory, kept across rollouts,
+    // shared by the backend pods of a node) or BACKEND_CACHE_CLAIM (PVC)
+    const cacheVolume = {
+      mountPath: '/cache',
+      sizeLimit: process.env.BACKEND_CACHE_SIZE ?? '2Gi',
+      hostPath: process.env.BACKEND_CACHE_HOSTPATH || undefined,
+      claimName: process.env.BACKEND_CACHE_CLAIM || undefined,
+    };
+    addCacheVolume(backend, cacheVolume);
+{% endif %}
+{% if cookiecutter.storage_backend == "relstorage" %}
+
+    // ---- Read-only backends on the PostgreSQL replicas for anonymous ----
+    // ---- traffic; READONLY_REPLICAS=0 disables them ----
+    let readOnlyServiceName: string | undefined;
+    if (readOnlyReplicas > 0) {
+      const readOnly = new ReadOnlyBackend(this, 'readonly', {
+        image: image,
+        environment: backendEnv,
+        replicas: readOnlyReplicas,
+        resources: backendResources,
+{% if cookiecutter.include_cnpg == "yes" %}
+        dsn: `host='${db.readServiceName}' dbname='plone' user='$(SECRET_POSTGRESQL_USERNAME)' password='$(SECRET_POSTGRESQL_PASSWORD)'`,
+{% else %}
+        dsn: process.env.READONLY_DSN ?? "host='db-replica-host' dbname='plone' user='plone' password='secret'",
+{% endif %}
+      });
+      addHttpProbes(readOnly.apiObject, {
+        port: 8080,
+        healthPath: '/@@health',
+        readyPath: '/@@ready',
+        startupSeconds: Number(process.env.BACKEND_STARTUP_SECONDS ?? '300'),
+      });
+      // Own directory on the node; the claim belongs to the read-write pod
+      addCacheVolume(readOnly.apiObject, {
+        ...cacheVolume,
+        hostPath: cacheVolume.hostPath && `${cacheVolume.hostPath}-readonly`,
+        claimName: undefined,
+      });
+      const readOnlyMaxReplicas = Number(process.env.READONLY_MAX_REPLICAS ?? '0');
+      if (readOnlyMaxReplicas > readOnlyReplicas) {
+        new Autoscaler(this, 'readonly-autoscaler', {
+          target: readOnly.apiObject,
+          minReplicas: readOnlyReplicas,
+          maxReplicas: readOnlyMaxReplicas,
+          cpuUtilization: Number(process.env.BACKEND_HPA_CPU ?? '70'),
+          requestRate: Number(process.env.BACKEND_HPA_RPS ?? '0'),
+          requestRateMetric: process.env.HPA_RPS_METRIC,
+          scaleDownStabilizationSeconds: scaleDownSeconds,
+        });
+      }
+      readOnlyServiceName = readOnly.serviceName;
+    }
+{% endif %}
+{% if cookiecutter.storage_backend != "none" %}
+
+    // ---- Background job workers; WORKER_REPLICAS=0 disables them ----
+    if (workerReplicas > 0) {
+      new Worker(this, 'worker', {
+        image: image,
+        environment: withTuning(env, workerTuning),
+        replicas: workerReplicas,
+        limitCpu: workerLimitCpu,
+        limitMemory: workerLimitMemory,
+        requestCpu: process.env.WORKER_REQUEST_CPU,
+      });
+    }
+{% endif %}
+{% if cookiecutter.storage_backend == "relstorage" %}
+
+    // ---- Scheduled ZODB pack; PACK_SCHEDULE= (empty) disables it ----
+    const packSchedule = process.env.PACK_SCHEDULE ?? '0 3 * * *';
+    if (packSchedule) {
+      new ZodbPack(this, 'pack', {
+        image: image,
+        environment: withTuning(env, workerTuning),
+        schedule: packSchedule,
+{% if cookiecutter.include_cnpg == "yes" %}        dsn: primaryDsn,
+{% endif %}        days: Number(process.env.PACK_DAYS ?? '7'),
+        gc: (process.env.PACK_GC ?? 'true') === 'true',
+        concurrencyPolicy: (process.env.PACK_CONCURRENCY_POLICY ?? 'Forbid') as kplus.ConcurrencyPolicy,
+        deadlineSeconds: Number(process.env.PACK_DEADLINE_SECONDS ?? '10800'),
+      });
+    }
+{% endif %}
 {% if cookiecutter.include_varnish == "yes" %}
 
-    // ---- Varnish HTTP cache ----
+    // ---- Varnish HTTP cache, VCL from deployment/varnish/plone.vcl ----
+    // Cache storage: three quarters of the memory limit unless
+    // VARNISH_STORAGE_SIZE is set, per pod: the VARNISH_REPLICAS pods each
+    // cache a shard of the URLs. Plone purges changed content through the
+    // signaller, which forwards the requests to all Varnish pods;
+    // CACHE_PURGE_PROXIES= (empty) disables purging
+    const varnishResources = roleResources(size, 'varnish', process.env);
+    const vcl = fs.readFileSync(path.join(__dirname, '..', 'varnish', 'plone.vcl'), 'utf8');
+    const sitePath = process.env.VARNISH_SITE_PATH ?? '/Plone';
     const httpcache = new PloneHttpcache(this, 'httpcache', {
       plone: plone,
+      ...varnishResources,
+      varnishVcl: renderVcl(vcl, {
+        BACKEND_HOST: plone.backendServiceName,
+        BACKEND_PORT: '8080',
+{% if cookiecutter.include_frontend == "yes" %}
+        FRONTEND_HOST: plone.frontendServiceName ?? '',
+        FRONTEND_PORT: '3000',
+{% endif %}
+        GRACE: vclDuration(process.env.VARNISH_GRACE ?? '1h'),
+        KEEP: vclDuration(process.env.VARNISH_KEEP ?? '1d'),
+        STATIC_TTL: vclDuration(process.env.VARNISH_STATIC_TTL ?? '1d'),
+        PURGE_ACL: vclAcl(process.env.VARNISH_PURGE_NETWORKS ?? '10.0.0.0/8,172.16.0.0/12,192.168.0.0/16'),
+        SITE_PATH: sitePath,
+        PASS_COOKIES: process.env.VARNISH_PASS_COOKIES ?? '{% if cookiecutter.include_frontend == "yes" %}auth_token|__ac{% else %}__ac|_ZopeId|__cp|statusmessages|auth_token{% endif %}',
+      }),
     });
+    setCacheStorage(httpcache, process.env.VARNISH_STORAGE_SIZE ?? varnishStorageSize(varnishResources));
+    setReplicas(httpcache, Number(process.env.VARNISH_REPLICAS ?? '1'));
+    addEnvVariable(backend, 'CACHE_PURGE_PROXIES', process.env.CACHE_PURGE_PROXIES ?? signallerUrl(httpcache));
 {% endif %}
 {% if cookiecutter.include_ingress == "yes" %}
 
@@ -105,12 +379,34 @@ export class {{ cookiecutter.project_name | capitalize }}Chart extends Chart {
       backendServiceName: plone.backendServiceName,
 {% if cookiecutter.include_frontend == "yes" %}
       frontendServiceName: plone.frontendServiceName ?? '',
+{% endif %}
+{% if cookiecutter.storage_backend == "relstorage" %}
+      readOnlyServiceName: readOnlyServiceName,
+      writePaths: (process.env.READONLY_WRITE_PATHS ?? '{% if cookiecutter.include_frontend == "yes" %}/++api++/@login,/++api++/@login-renew,/++api++/@logout{% else %}/login,/@@login,/login_form,/failsafe_login,/logout,/@@logout,/mail_password_form,/passwordreset{% endif %}')
+        .split(',').filter((path) => path),
+{% endif %}
+{% if cookiecutter.include_varnish == "yes" %}
+      // Static resources from the HTTP cache; INGRESS_STATIC_PATHS= (empty)
+      // sends them to {% if cookiecutter.include_frontend == "yes" %}the frontend{% else %}Plone{% endif %} directly
+      staticService: cacheService(httpcache),
+      staticPaths: (process.env.INGRESS_STATIC_PATHS ?? {% if cookiecutter.include_frontend == "yes" %}'/static/,/assets/'{% else %}`/++plone++,/++resource++,/++theme++,${sitePath}/++plone++,${sitePath}/++resource++,${sitePath}/++theme++`{% endif %})
+        .split(',').filter((path) => path),
 {% endif %}
     });
 {% endif %}
+
+    // ---- Every role: spread over zones and nodes, drained one pod at a time ----
+    const maxUnavailable = process.env.PDB_MAX_UNAVAILABLE ?? '1';
+    for (const workload of findWorkloads(this)) {
+      addTopologySpread(workload, { whenUnsatisfiable: process.env.TOPOLOGY_SPREAD_NODES });
+      addDisruptionBudget(workload, maxUnavailable.endsWith('%') ? maxUnavailable : Number(maxUnavailable));
+    }
   }
 }
 
-const app = new App();
-new {{ cookiecutter.project_name | capitalize }}Chart(app, '{{ cookiecutter.__target }}');
-app.synth();
+// `cdk8s synth` runs this module; the tests import the chart
+if (require.main === module) {
+  const app = new App();
+  new {{ cookiecutter.project_name | capitalize }}Chart(app, '{{ cookiecutter.__target }}');
+  app.synth();
+}
@@ -0,0 +1,57 @@
+import { Testing } from 'cdk8s';
+import * as kplus from 'cdk8s-plus-30';
+import { ZodbPack, ZodbPackOptions } from './pack';
+
+
+function cronJob(options: Partial<ZodbPackOptions> = {}): any {
+  const chart = Testing.chart();
+  new ZodbPack(chart, 'pack', {
+    image: 'plone',
+    environment: new kplus.Env([], {
+      INSTANCE_db_relstorage_postgresql_dsn: kplus.EnvValue.fromValue("host='db-pooler'"),
+    }),
+    schedule: '30 2 * * 0',
+    ...options,
+  });
+  return Testing.synth(chart).find((manifest) => manifest.kind === 'CronJob');
+}
+
+
+function containerEnv(manifest: any): { [name: string]: string } {
+  const result: { [name: string]: string } = {};
+  for (const variable of manifest.spec.jobTemplate.spec.template.spec.containers[0].env) {
+    result[variable.name] = variable.value;
+  }
+  return result;
+}
+
+
+describe('ZodbPack', () => {
+  test('runs the pack command on the schedule, one run at a time', () => {
+    const manifest = cronJob();
+    expect(manifest.spec.schedule).toBe('30 2 * * 0');
+    expect(manifest.spec.concurrencyPolicy).toBe('Forbid');
+    const job = manifest.spec.jobTemplate.spec;
+    expect(job.activeDeadlineSeconds).toBe(10800);
+    expect(job.template.spec.restartPolicy).toBe('Never');
+    expect(job.template.spec.containers[0].args).toEqual(['pack']);
+    expect(containerEnv(manifest)).toMatchObject({
+      INSTANCE_db_relstorage_postgresql_dsn: "host='db-pooler'",
+      PACK_DAYS: '7',
+      PACK_GC: 'true',
+      PACK_BATCH_TIMEOUT: '1',
+      PACK_COMMIT_BUSY_DELAY: '5',
+    });
+  });
+
+  test('options', () => {
+    const manifest = cronJob({ days: 30, gc: false, deadlineSeconds: 600, batchTimeout: 2 });
+    expect(manifest.spec.jobTemplate.spec.activeDeadlineSeconds).toBe(600);
+    expect(containerEnv(manifest)).toMatchObject({ PACK_DAYS: '30', PACK_GC: 'false', PACK_BATCH_TIMEOUT: '2' });
+  });
+
+  test('dsn bypasses the pooler of the environment', () => {
+    const env = containerEnv(cronJob({ dsn: "host='db-rw'" }));
+    expect(env.INSTANCE_db_relstorage_postgresql_dsn).toBe("host='db-rw'");
+  });
+});
@@ -0,0 +1,66 @@
+import { Construct } from 'constructs';
+import { Cron, Duration } from 'cdk8s';
+import * as kplus from 'cdk8s-plus-30';
+
+
+export interface ZodbPackOptions {
+  readonly image: string;
+  /** Database environment of the backend, with the worker tuning. */
+  readonly environment: kplus.Env;
+  /** RelStorage DSN of the primary, bypassing a pooler; default: the environment's. */
+  readonly dsn?: string;
+  /** Cron expression, e.g. '0 3 * * *'. */
+  readonly schedule: string;
+  /** Days of history to keep. */
+  readonly days?: number;
+  /** Remove unreachable objects, not only old revisions. */
+  readonly gc?: boolean;
+  readonly concurrencyPolicy?: kplus.ConcurrencyPolicy;
+  /** Upper bound for one pack run; the next run continues. */
+  readonly deadlineSeconds?: number;
+  /** Longest time a pack batch holds the commit lock, in seconds. */
+  readonly batchTimeout?: number;
+  /** Pause between batches while other transactions commit, in seconds. */
+  readonly commitBusyDelay?: number;
+}
+
+
+/**
+ * CronJob running the image's `pack` command against the RelStorage database.
+ *
+ * RelStorage analyses references without locking and then deletes in short
+ * batches, each committed on its own, so writers only wait for a single
+ * batch. A run stopped by its deadline leaves the database consistent and
+ * the next run picks up the remaining history.
+ */
+export class ZodbPack extends Construct {
+  constructor(scope: Construct, id: string, options: ZodbPackOptions) {
+    super(scope, id);
+
+    const [minute, hour, day, month, weekDay] = options.schedule.trim().split(/\s+/);
+    const cronJob = new kplus.CronJob(this, 'cronjob', {
+      schedule: Cron.schedule({ minute, hour, day, month, weekDay }),
+      concurrencyPolicy: options.concurrencyPolicy ?? kplus.ConcurrencyPolicy.FORBID,
+      activeDeadline: Duration.seconds(options.deadlineSeconds ?? 3 * 3600),
+      backoffLimit: 1,
+      successfulJobsRetained: 3,
+      failedJobsRetained: 3,
+      restartPolicy: kplus.RestartPolicy.NEVER,
+      securityContext: { user: 500, group: 500 },
+    });
+    cronJob.addContainer({
+      image: options.image,
+      args: ['pack'],
+      envVariables: {
+        ...options.environment.variables,
+        ...(options.dsn ? { INSTANCE_db_relstorage_postgresql_dsn: kplus.EnvValue.fromValue(options.dsn) } : {}),
+        PACK_DAYS: kplus.EnvValue.fromValue(String(options.days ?? 7)),
+        PACK_GC: kplus.EnvValue.fromValue(String(options.gc ?? true)),
+        PACK_BATCH_TIMEOUT: kplus.EnvValue.fromValue(String(options.batchTimeout ?? 1)),
+        PACK_COMMIT_BUSY_DELAY: kplus.EnvValue.fromValue(String(options.commitBusyDelay ?? 5)),
+      },
+      // The entrypoint writes the pack configuration below /tmp
+      securityContext: { user: 500, group: 500, readOnlyRootFilesystem: false },
+    });
+  }
+}
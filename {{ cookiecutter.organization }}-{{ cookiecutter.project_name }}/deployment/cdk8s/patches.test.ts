@@ -0,0 +1,135 @@
+import { ApiObject, Testing } from 'cdk8s';
+import { addCacheVolume, addDisruptionBudget, addHttpProbes, addTopologySpread, findDeployment } from './patches';
+
+
+function deployment() {
+  const chart = Testing.chart();
+  const obj = new ApiObject(chart, 'backend', {
+    apiVersion: 'apps/v1',
+    kind: 'Deployment',
+    spec: {
+      selector: { matchLabels: { app: 'backend' } },
+      template: { spec: { containers: [{ name: 'backend', image: 'plone' }] } },
+    },
+  });
+  return { chart, obj };
+}
+
+
+describe('addCacheVolume', () => {
+  test('emptyDir owned by fsGroup, without root', () => {
+    const { chart, obj } = deployment();
+    addCacheVolume(obj, { mountPath: '/cache', sizeLimit: '2Gi' });
+    const pod = Testing.synth(chart)[0].spec.template.spec;
+    expect(pod.volumes).toEqual([{ name: 'cache', emptyDir: { sizeLimit: '2Gi' } }]);
+    expect(pod.containers[0].volumeMounts).toEqual([{ name: 'cache', mountPath: '/cache' }]);
+    expect(pod.securityContext).toEqual({ fsGroup: 500, fsGroupChangePolicy: 'OnRootMismatch' });
+    expect(pod.initContainers).toBeUndefined();
+  });
+
+  test('hostPath and PVC are opt-in', () => {
+    const { chart, obj } = deployment();
+    addCacheVolume(obj, { mountPath: '/cache', hostPath: '/var/cache/plone', sizeLimit: '2Gi' });
+    const pod = Testing.synth(chart)[0].spec.template.spec;
+    expect(pod.volumes).toEqual([{ name: 'cache', hostPath: { path: '/var/cache/plone', type: 'Directory' } }]);
+    expect(pod.initContainers).toBeUndefined();
+
+    const other = deployment();
+    addCacheVolume(other.obj, { mountPath: '/cache', claimName: 'cache' });
+    expect(Testing.synth(other.chart)[0].spec.template.spec.volumes)
+      .toEqual([{ name: 'cache', persistentVolumeClaim: { claimName: 'cache' } }]);
+    expect(() => addCacheVolume(other.obj, { mountPath: '/cache', hostPath: '/x', claimName: 'cache' }))
+      .toThrow();
+  });
+
+  test('keeps an existing pod security context', () => {
+    const chart = Testing.chart();
+    const withContext = new ApiObject(chart, 'other', {
+      apiVersion: 'apps/v1',
+      kind: 'Deployment',
+      spec: { template: { spec: { securityContext: { runAsUser: 500 }, containers: [{ name: 'c' }] } } },
+    });
+    addCacheVolume(withContext, { mountPath: '/cache' });
+    expect(withContext.toJson().spec.template.spec.securityContext)
+      .toEqual({ runAsUser: 500, fsGroup: 500, fsGroupChangePolicy: 'OnRootMismatch' });
+  });
+});
+
+
+describe('findDeployment', () => {
+  test('by role in the construct path', () => {
+    const chart = Testing.chart();
+    const backend = new ApiObject(chart, 'plone-backend', { apiVersion: 'apps/v1', kind: 'Deployment' });
+    new ApiObject(chart, 'plone-frontend', { apiVersion: 'apps/v1', kind: 'Deployment' });
+    new ApiObject(chart, 'backend-service', { apiVersion: 'v1', kind: 'Service' });
+    expect(findDeployment(chart, 'backend')).toBe(backend);
+    expect(() => findDeployment(chart, 'worker')).toThrow(/found 0/);
+  });
+});
+
+
+describe('addHttpProbes', () => {
+  test('startup probe covers the start, then readiness and liveness', () => {
+    const { chart, obj } = deployment();
+    addHttpProbes(obj, { port: 8080, healthPath: '/@@health', readyPath: '/@@ready', startupSeconds: 120 });
+    const container = Testing.synth(chart)[0].spec.template.spec.containers[0];
+    expect(container.startupProbe).toMatchObject({ httpGet: { path: '/@@health', port: 8080 }, periodSeconds: 5 });
+    expect(container.startupProbe.failureThreshold * container.startupProbe.periodSeconds).toBe(120);
+    expect(container.readinessProbe.httpGet).toEqual({ path: '/@@ready', port: 8080 });
+    expect(container.livenessProbe.httpGet).toEqual({ path: '/@@health', port: 8080 });
+  });
+});
+
+
+describe('addTopologySpread', () => {
+  test('zones best effort, nodes as configured, per revision', () => {
+    const { chart, obj } = deployment();
+    addTopologySpread(obj, { whenUnsatisfiable: 'DoNotSchedule' });
+    const constraints = Testing.synth(chart)[0].spec.template.spec.topologySpreadConstraints;
+    expect(constraints).toEqual([
+      {
+        maxSkew: 1,
+        topologyKey: 'topology.kubernetes.io/zone',
+        whenUnsatisfiable: 'ScheduleAnyway',
+        labelSelector: { matchLabels: { app: 'backend' } },
+        matchLabelKeys: ['pod-template-hash'],
+      },
+      {
+        maxSkew: 1,
+        topologyKey: 'kubernetes.io/hostname',
+        whenUnsatisfiable: 'DoNotSchedule',
+        labelSelector: { matchLabels: { app: 'backend' } },
+        matchLabelKeys: ['pod-template-hash'],
+      },
+    ]);
+  });
+
+  test('StatefulSets have no pod-template-hash', () => {
+    const chart = Testing.chart();
+    const statefulSet = new ApiObject(chart, 'db', {
+      apiVersion: 'apps/v1',
+      kind: 'StatefulSet',
+      spec: { selector: { matchLabels: { app: 'db' } }, template: { spec: { containers: [] } } },
+    });
+    addTopologySpread(statefulSet);
+    const constraints = Testing.synth(chart)[0].spec.template.spec.topologySpreadConstraints;
+    expect(constraints.map((c: any) => c.whenUnsatisfiable)).toEqual(['ScheduleAnyway', 'ScheduleAnyway']);
+    expect(constraints.some((c: any) => 'matchLabelKeys' in c)).toBe(false);
+  });
+
+  test('needs the selector labels', () => {
+    const chart = Testing.chart();
+    const bare = new ApiObject(chart, 'bare', { apiVersion: 'apps/v1', kind: 'Deployment', spec: {} });
+    expect(() => addTopologySpread(bare)).toThrow(/selector.matchLabels/);
+  });
+});
+
+
+describe('addDisruptionBudget', () => {
+  test('selects the pods of the workload', () => {
+    const { chart, obj } = deployment();
+    addDisruptionBudget(obj, '25%');
+    const pdb = Testing.synth(chart).find((manifest) => manifest.kind === 'PodDisruptionBudget');
+    expect(pdb.spec).toEqual({ maxUnavailable: '25%', selector: { matchLabels: { app: 'backend' } } });
+  });
+});
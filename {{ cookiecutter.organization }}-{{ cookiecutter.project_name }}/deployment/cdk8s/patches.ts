@@ -0,0 +1,211 @@
+import { Construct } from 'constructs';
+import { ApiObject, JsonPatch } from 'cdk8s';
+
+
+// Helpers to adjust manifests synthesized by third-party constructs
+// (e.g. cdk8s-plone) for settings their options do not expose.
+
+const CONTAINER = '/spec/template/spec/containers/0';
+
+
+/**
+ * Find the single Deployment below `scope` whose construct path contains
+ * `role` (e.g. 'backend' or 'frontend').
+ */
+export function findDeployment(scope: Construct, role: string): ApiObject {
+  const found = scope.node.findAll().filter((c): c is ApiObject =>
+    c instanceof ApiObject
+    && c.kind === 'Deployment'
+    && c.node.path.toLowerCase().split('/').some((part) => part.includes(role)),
+  );
+  if (found.length !== 1) {
+    throw new Error(`Expected one ${role} Deployment below ${scope.node.path}, found ${found.length}`);
+  }
+  return found[0];
+}
+
+
+/** All Deployments and StatefulSets below `scope`, e.g. of a Helm chart. */
+export function findWorkloads(scope: Construct): ApiObject[] {
+  return scope.node.findAll().filter((c): c is ApiObject =>
+    c instanceof ApiObject && ['Deployment', 'StatefulSet'].includes(c.kind),
+  );
+}
+
+
+function podLabels(workload: ApiObject): { [key: string]: string } {
+  const labels = workload.toJson().spec?.selector?.matchLabels;
+  if (!labels) {
+    throw new Error(`${workload.node.path} has no selector.matchLabels`);
+  }
+  return labels;
+}
+
+
+export interface TopologySpreadOptions {
+  /** 'DoNotSchedule' keeps pods pending rather than stacking them on a node. */
+  readonly whenUnsatisfiable?: string;
+}
+
+
+/**
+ * Spread the pods of a workload over zones and nodes.
+ *
+ * Zones are spread on a best-effort basis, as clusters may have a single
+ * zone. `pod-template-hash` limits the skew check to pods of the same
+ * revision, so a rollout spreads its new pods as well.
+ */
+export function addTopologySpread(workload: ApiObject, options: TopologySpreadOptions = {}) {
+  const constraint = (topologyKey: string, whenUnsatisfiable: string) => ({
+    maxSkew: 1,
+    topologyKey,
+    whenUnsatisfiable,
+    labelSelector: { matchLabels: podLabels(workload) },
+    ...(workload.kind === 'Deployment' ? { matchLabelKeys: ['pod-template-hash'] } : {}),
+  });
+  workload.addJsonPatch(JsonPatch.add('/spec/template/spec/topologySpreadConstraints', [
+    constraint('topology.kubernetes.io/zone', 'ScheduleAnyway'),
+    constraint('kubernetes.io/hostname', options.whenUnsatisfiable ?? 'ScheduleAnyway'),
+  ]));
+}
+
+
+/**
+ * PodDisruptionBudget for the pods of a workload, so that node drains evict
+ * at most `maxUnavailable` of them at a time.
+ */
+export function addDisruptionBudget(workload: ApiObject, maxUnavailable: number | string = 1): ApiObject {
+  return new ApiObject(workload, 'pdb', {
+    apiVersion: 'policy/v1',
+    kind: 'PodDisruptionBudget',
+    spec: {
+      maxUnavailable,
+      selector: { matchLabels: podLabels(workload) },
+    },
+  });
+}
+
+
+export interface HttpProbeOptions {
+  readonly port: number;
+  /** Cheap endpoint answered by the process itself. */
+  readonly healthPath: string;
+  /** Endpoint that also checks dependencies (database, backend). */
+  readonly readyPath: string;
+  /** Upper bound for the pod to come up, in seconds. */
+  readonly startupSeconds?: number;
+}
+
+
+/**
+ * Set startup, readiness and liveness probes on the first container.
+ *
+ * The startup probe holds back readiness and liveness checks until the
+ * process serves requests, so slow starts are not killed. Readiness takes
+ * a pod out of the service while its dependencies fail; liveness restarts
+ * it only after the process stopped answering for a minute.
+ */
+export function addHttpProbes(deployment: ApiObject, options: HttpProbeOptions) {
+  const period = 5;
+  const httpGet = (path: string) => ({ path, port: options.port });
+  deployment.addJsonPatch(
+    JsonPatch.add(`${CONTAINER}/startupProbe`, {
+      httpGet: httpGet(options.healthPath),
+      periodSeconds: period,
+      timeoutSeconds: 3,
+      failureThreshold: Math.ceil((options.startupSeconds ?? 300) / period),
+    }),
+    JsonPatch.add(`${CONTAINER}/readinessProbe`, {
+      httpGet: httpGet(options.readyPath),
+      periodSeconds: period,
+      timeoutSeconds: 5,
+      failureThreshold: 2,
+    }),
+    JsonPatch.add(`${CONTAINER}/livenessProbe`, {
+      httpGet: httpGet(options.healthPath),
+      periodSeconds: 10,
+      timeoutSeconds: 5,
+      failureThreshold: 6,
+    }),
+  );
+}
+
+
+/**
+ * Append `item` to the list at `path`, creating the list if the construct
+ * did not synthesize one.
+ */
+function appendItem(obj: ApiObject, path: string, item: unknown) {
+  const existing = path.split('/').slice(1).reduce(
+    (node: any, key) => (node === undefined ? undefined : node[key]),
+    obj.toJson(),
+  );
+  obj.addJsonPatch(existing === undefined
+    ? JsonPatch.add(path, [item])
+    : JsonPatch.add(`${path}/-`, item));
+}
+
+
+/** Add an environment variable to the first container. */
+export function addEnvVariable(deployment: ApiObject, name: string, value: string) {
+  appendItem(deployment, `${CONTAINER}/env`, { name, value });
+}
+
+
+export interface CacheVolumeOptions {
+  readonly mountPath: string;
+  /** Size limit of the emptyDir. */
+  readonly sizeLimit?: string;
+  /**
+   * Node-local directory kept across pod restarts, instead of an emptyDir.
+   * Opt-in: pods on the same node share it, and it must be writable by
+   * `fsGroup` already; Pod Security "baseline" does not allow hostPath.
+   */
+  readonly hostPath?: string;
+  /** PersistentVolumeClaim instead of an emptyDir, for a single pod. */
+  readonly claimName?: string;
+  /** Group that owns the files of the volume (the image's plone group). */
+  readonly fsGroup?: number;
+}
+
+
+/**
+ * Mount a cache volume into the first container.
+ *
+ * An emptyDir per pod by default, which survives container restarts.
+ * Kubernetes hands emptyDir and PVC volumes to `fsGroup`, so the container
+ * does not need root to write them.
+ */
+export function addCacheVolume(deployment: ApiObject, options: CacheVolumeOptions) {
+  const name = 'cache';
+  if (options.hostPath && options.claimName) {
+    throw new Error('Cache volume: set either hostPath or claimName');
+  }
+  let source: object;
+  if (options.hostPath) {
+    source = { hostPath: { path: options.hostPath, type: 'Directory' } };
+  } else if (options.claimName) {
+    source = { persistentVolumeClaim: { claimName: options.claimName } };
+  } else {
+    source = { emptyDir: options.sizeLimit ? { sizeLimit: options.sizeLimit } : {} };
+  }
+  appendItem(deployment, '/spec/template/spec/volumes', { name, ...source });
+  appendItem(deployment, `${CONTAINER}/volumeMounts`, { name, mountPath: options.mountPath });
+  setPodSecurityContext(deployment, {
+    fsGroup: options.fsGroup ?? 500,
+    fsGroupChangePolicy: 'OnRootMismatch',
+  });
+}
+
+
+/** Merge `fields` into the pod security context. */
+function setPodSecurityContext(deployment: ApiObject, fields: { [key: string]: unknown }) {
+  const path = '/spec/template/spec/securityContext';
+  if (deployment.toJson().spec?.template?.spec?.securityContext === undefined) {
+    deployment.addJsonPatch(JsonPatch.add(path, fields));
+  } else {
+    for (const [key, value] of Object.entries(fields)) {
+      deployment.addJsonPatch(JsonPatch.add(`${path}/${key}`, value));
+    }
+  }
+}
@@ -0,0 +1,86 @@
+import { Testing } from 'cdk8s';
+import { CloudNativePGCluster } from './postgres';
+import { SIZES } from './sizing';
+
+
+// Needs the CRD bindings: run `npx cdk8s import` first.
+
+describe('CloudNativePGCluster', () => {
+  for (const profile of ['oltp', 'jsonb']) {
+    test(`${profile} manifest`, () => {
+      const chart = Testing.chart();
+      new CloudNativePGCluster(chart, 'db', {
+        resources: SIZES.medium.postgres,
+        profile,
+        clientConnections: 40,
+      });
+      expect(Testing.synth(chart)).toMatchSnapshot();
+    });
+  }
+
+  test('max_connections covers the clients with headroom', () => {
+    const chart = Testing.chart();
+    new CloudNativePGCluster(chart, 'db', { clientConnections: 40 });
+    const cluster = Testing.synth(chart).find((m) => m.kind === 'Cluster');
+    // 40 clients with 25% headroom, plus the reserve
+    expect(cluster.spec.postgresql.parameters.max_connections).toBe('70');
+  });
+
+  test('parameters override the derived ones', () => {
+    const chart = Testing.chart();
+    new CloudNativePGCluster(chart, 'db', {
+      resources: SIZES.medium.postgres,
+      parameters: { work_mem: '64MB' },
+    });
+    const { parameters } = Testing.synth(chart).find((m) => m.kind === 'Cluster').spec.postgresql;
+    expect(parameters.work_mem).toBe('64MB');
+    expect(parameters.shared_buffers).toBe('1024MB');
+  });
+
+  test('statement statistics by default, slow queries on request', () => {
+    const parameters = (options: object) => {
+      const chart = Testing.chart();
+      new CloudNativePGCluster(chart, 'db', options);
+      return Testing.synth(chart).find((m) => m.kind === 'Cluster').spec.postgresql.parameters;
+    };
+    expect(parameters({})).toMatchObject({
+      'pg_stat_statements.track': 'all',
+      'track_io_timing': 'on',
+    });
+    expect(parameters({})).not.toHaveProperty('log_min_duration_statement');
+    const tuned = parameters({ statementStats: false, slowQueryMs: 500 });
+    expect(tuned).not.toHaveProperty(['pg_stat_statements.track']);
+    expect(tuned).toMatchObject({ log_min_duration_statement: '500', log_lock_waits: 'on' });
+  });
+
+  test('pooler bounds max_connections', () => {
+    const chart = Testing.chart();
+    const db = new CloudNativePGCluster(chart, 'db', {
+      clientConnections: 40,
+      pooler: { mode: 'session', instances: 2 },
+    });
+    const manifests = Testing.synth(chart);
+    const cluster = manifests.find((m) => m.kind === 'Cluster');
+    const pooler = manifests.find((m) => m.kind === 'Pooler');
+    // 40 clients with 25% headroom over 2 PgBouncer pods, plus the reserve
+    expect(pooler.spec.pgbouncer.parameters.default_pool_size).toBe('25');
+    expect(cluster.spec.postgresql.parameters.max_connections).toBe('70');
+    expect(db.serviceName).toBe(pooler.metadata.name);
+  });
+
+  test('transaction pooler rejects session state', () => {
+    expect(() => new CloudNativePGCluster(Testing.chart(), 'db', {
+      pooler: { mode: 'transaction', sessionState: true },
+    })).toThrow(/session/);
+    expect(() => new CloudNativePGCluster(Testing.chart(), 'db', {
+      pooler: { mode: 'statement' },
+    })).toThrow(/pooler mode/);
+  });
+
+  test('primary service bypasses the pooler', () => {
+    const chart = Testing.chart();
+    const db = new CloudNativePGCluster(chart, 'db', { pooler: { mode: 'session' } });
+    expect(db.primaryServiceName).toMatch(/-rw$/);
+    expect(db.serviceName).not.toBe(db.primaryServiceName);
+  });
+});
@@ -1,27 +1,108 @@
 import { Construct } from 'constructs';
-import { Names } from 'cdk8s';
+import { ApiObject, Names } from 'cdk8s';
 import * as cnpg from './imports/postgresql.cnpg.io';
+import { RESERVED_CONNECTIONS, Resources, SIZES, parseMemory, postgresTuning } from './sizing';
 
 
 export interface CloudNativePGClusterOptions {
   readonly instances?: number;
   readonly storageSize?: string;
+  /** CPU and memory of each instance; the parameters derive from them. */
+  readonly resources?: Resources;
+  /** Workload profile of the parameters: 'oltp' or 'jsonb'. */
+  readonly profile?: string;
+  /** Connections of all clients (backends, workers) at full scale. */
+  readonly clientConnections?: number;
+  /** Put PgBouncer between the clients and the primary. */
+  readonly pooler?: PoolerOptions;
+  /** Collect per-statement statistics (pg_stat_statements); default true. */
+  readonly statementStats?: boolean;
+  /** Log statements running longer than this, in milliseconds. */
+  readonly slowQueryMs?: number;
+  /** PostgreSQL parameters overriding the derived ones. */
+  readonly parameters?: { [name: string]: string };
+}
+
+
+export interface PoolerOptions {
+  /**
+   * 'session': a client keeps its server connection until it disconnects.
+   * 'transaction': server connections are shared between transactions.
+   */
+  readonly mode: string;
+  /** PgBouncer pods. */
+  readonly instances?: number;
+  /** Server connections per PgBouncer pod; derived if unset. */
+  readonly poolSize?: number;
+  /** The clients keep session state (e.g. RelStorage), which rules out 'transaction'. */
+  readonly sessionState?: boolean;
 }
 
 
 export class CloudNativePGCluster extends Construct {
+  /** Service the clients connect to: the pooler, if any, or the primary. */
   public readonly serviceName: string;
+  /** Service of the primary, bypassing the pooler. */
+  public readonly primaryServiceName: string;
+  /** Service for read-only clients: the replicas, or any instance if there are none. */
+  public readonly readServiceName: string;
   public readonly secretName: string;
 
   constructor(scope: Construct, id: string, options: CloudNativePGClusterOptions = {}) {
     super(scope, id);
 
+    // Headroom for surge pods during rollouts and, with a pooler, for
+    // clients spread unevenly over the PgBouncer pods
+    const clientConnections = options.clientConnections ?? 80;
+    const pooler = options.pooler;
+    if (pooler && pooler.mode !== 'session' && pooler.mode !== 'transaction') {
+      throw new Error(`Unknown pooler mode: ${pooler.mode} (session or transaction)`);
+    }
+    if (pooler?.mode === 'transaction' && pooler.sessionState) {
+      throw new Error('Clients with session state need the session pooler mode, not transaction');
+    }
+    const poolerInstances = pooler?.instances ?? 2;
+    // In transaction mode idle clients hold no server connection
+    const poolSize = pooler
+      ? pooler.poolSize ?? Math.ceil(
+        clientConnections * 1.25 / poolerInstances / (pooler.mode === 'transaction' ? 2 : 1))
+      : 0;
+    // With a pooler, PostgreSQL only needs the pooled connections
+    const maxConnections = RESERVED_CONNECTIONS + (pooler
+      ? poolerInstances * poolSize
+      : Math.ceil(clientConnections * 1.25));
+    const storageSize = options.storageSize ?? '20Gi';
+
+    // CloudNativePG preloads pg_stat_statements and creates the extension
+    // once one of its parameters is set
+    const statistics: { [name: string]: string } = {};
+    if (options.statementStats ?? true) {
+      Object.assign(statistics, {
+        'pg_stat_statements.max': '5000',
+        'pg_stat_statements.track': 'all',
+        'track_io_timing': 'on',
+      });
+    }
+    if (options.slowQueryMs !== undefined) {
+      Object.assign(statistics, {
+        log_min_duration_statement: String(options.slowQueryMs),
+        log_lock_waits: 'on',
+      });
+    }
+
     const cluster = new cnpg.Cluster(this, 'cluster', {
       spec: {
         instances: options.instances ?? 2,
         postgresql: {
           parameters: {
-            shared_buffers: '256MB',
+            ...postgresTuning(
+              options.resources ?? SIZES.medium.postgres,
+              options.profile ?? 'oltp',
+              maxConnections,
+              parseMemory(storageSize),
+            ),
+            ...statistics,
+            ...options.parameters,
           },
         },
         bootstrap: {
@@ -31,13 +112,61 @@ export class CloudNativePGCluster extends Construct {
           },
         },
         storage: {
-          size: options.storageSize ?? '20Gi',
+          size: storageSize,
         },
+        // CloudNativePG keeps instances on separate nodes (preferred
+        // anti-affinity) and adds PodDisruptionBudgets for primary and replicas
+        affinity: {
+          enablePodAntiAffinity: true,
+          podAntiAffinityType: 'preferred',
+          topologyKey: 'kubernetes.io/hostname',
+        },
+        enablePdb: true,
+        ...(options.resources ? {
+          resources: {
+            limits: {
+              cpu: cnpg.ClusterSpecResourcesLimits.fromString(options.resources.limitCpu),
+              memory: cnpg.ClusterSpecResourcesLimits.fromString(options.resources.limitMemory),
+            },
+            requests: {
+              cpu: cnpg.ClusterSpecResourcesRequests.fromString(options.resources.requestCpu),
+              memory: cnpg.ClusterSpecResourcesRequests.fromString(options.resources.requestMemory),
+            },
+          },
+        } : {}),
       },
     });
 
     const clusterName = Names.toLabelValue(cluster);
-    this.serviceName = `${clusterName}-rw`;
+    this.primaryServiceName = `${clusterName}-rw`;
+    this.readServiceName = (options.instances ?? 2) > 1 ? `${clusterName}-ro` : `${clusterName}-r`;
     this.secretName = `${clusterName}-app`;
+    this.serviceName = this.primaryServiceName;
+
+    if (pooler) {
+      // The operator creates a Service named like the Pooler
+      const pgbouncer = new ApiObject(this, 'pooler', {
+        apiVersion: 'postgresql.cnpg.io/v1',
+        kind: 'Pooler',
+        spec: {
+          cluster: { name: cluster.name },
+          instances: poolerInstances,
+          type: 'rw',
+          pgbouncer: {
+            poolMode: pooler.mode,
+            parameters: {
+              default_pool_size: String(poolSize),
+              // Room for surge pods during rollouts
+              max_client_conn: String(Math.max(100, clientConnections * 2)),
+              server_idle_timeout: '600',
+              // Protocol-level prepared statements (psycopg 3) across
+              // transactions on different server connections
+              ...(pooler.mode === 'transaction' ? { max_prepared_statements: '200' } : {}),
+            },
+          },
+        },
+      });
+      this.serviceName = pgbouncer.name;
+    }
   }
 }
@@ -0,0 +1,51 @@
+import { Testing } from 'cdk8s';
+import * as kplus from 'cdk8s-plus-30';
+import { ReadOnlyBackend } from './readonly';
+import { SIZES } from './sizing';
+
+
+function synth(): { backend: ReadOnlyBackend; manifests: any[] } {
+  const chart = Testing.chart();
+  const backend = new ReadOnlyBackend(chart, 'readonly', {
+    image: 'plone',
+    environment: new kplus.Env([], {
+      INSTANCE_db_relstorage_postgresql_dsn: kplus.EnvValue.fromValue("host='db-pooler'"),
+      INSTANCE_db_pool_size: kplus.EnvValue.fromValue('4'),
+    }),
+    dsn: "host='db-ro'",
+    resources: SIZES.medium.backend,
+  });
+  return { backend, manifests: Testing.synth(chart) };
+}
+
+
+function container(manifests: any[]): any {
+  return manifests.find((manifest) => manifest.kind === 'Deployment').spec.template.spec.containers[0];
+}
+
+
+describe('ReadOnlyBackend', () => {
+  test('opens RelStorage read-only on the replica DSN', () => {
+    const backend = container(synth().manifests);
+    expect(backend.args).toEqual(['start-backend']);
+    expect(backend.env).toEqual([
+      { name: 'INSTANCE_db_relstorage_postgresql_dsn', value: "host='db-ro'" },
+      { name: 'INSTANCE_db_pool_size', value: '4' },
+      { name: 'INSTANCE_db_relstorage_read_only', value: 'true' },
+      { name: 'INSTANCE_db_relstorage_create_schema', value: 'false' },
+    ]);
+  });
+
+  test('resources of the read-write backends', () => {
+    const { resources } = container(synth().manifests);
+    expect(resources.limits).toEqual({ cpu: '1000m', memory: '2048Mi' });
+    expect(resources.requests).toEqual({ cpu: '1000m', memory: '2048Mi' });
+  });
+
+  test('service on the backend port', () => {
+    const { backend, manifests } = synth();
+    const service = manifests.find((manifest) => manifest.kind === 'Service');
+    expect(service.metadata.name).toBe(backend.serviceName);
+    expect(service.spec.ports[0]).toMatchObject({ port: 8080, targetPort: 8080 });
+  });
+});
@@ -0,0 +1,70 @@
+import { Construct } from 'constructs';
+import { ApiObject, Size } from 'cdk8s';
+import * as kplus from 'cdk8s-plus-30';
+import { Resources, parseCpu, parseMemory } from './sizing';
+
+
+export interface ReadOnlyBackendOptions {
+  readonly image: string;
+  /** Environment of the read-write backend. */
+  readonly environment: kplus.Env;
+  /** RelStorage DSN of a PostgreSQL replica (e.g. the CNPG `-ro` service). */
+  readonly dsn: string;
+  readonly replicas?: number;
+  readonly resources: Resources;
+}
+
+
+/**
+ * Backend Deployment serving reads from PostgreSQL replicas.
+ *
+ * Runs the backend image with the environment of the read-write backends,
+ * but opens RelStorage read-only on a replica DSN: no schema creation, and
+ * transactions that try to write fail with ReadOnlyError instead of
+ * reaching the standby. Read capacity then grows with the replicas of the
+ * database instead of loading the primary.
+ */
+export class ReadOnlyBackend extends Construct {
+  public readonly deployment: kplus.Deployment;
+  public readonly serviceName: string;
+
+  constructor(scope: Construct, id: string, options: ReadOnlyBackendOptions) {
+    super(scope, id);
+
+    const cpu = (quantity: string) => kplus.Cpu.millis(Math.round(parseCpu(quantity) * 1000));
+    const memory = (quantity: string) => Size.mebibytes(Math.floor(parseMemory(quantity) / 2 ** 20));
+
+    this.deployment = new kplus.Deployment(this, 'deployment', {
+      replicas: options.replicas ?? 2,
+      securityContext: { user: 500, group: 500 },
+      containers: [{
+        name: 'backend',
+        image: options.image,
+        args: ['start-backend'],
+        portNumber: 8080,
+        envVariables: {
+          ...options.environment.variables,
+          INSTANCE_db_relstorage_postgresql_dsn: kplus.EnvValue.fromValue(options.dsn),
+          INSTANCE_db_relstorage_read_only: kplus.EnvValue.fromValue('true'),
+          // A hot standby rejects DDL
+          INSTANCE_db_relstorage_create_schema: kplus.EnvValue.fromValue('false'),
+        },
+        resources: {
+          cpu: { request: cpu(options.resources.requestCpu), limit: cpu(options.resources.limitCpu) },
+          memory: { request: memory(options.resources.requestMemory), limit: memory(options.resources.limitMemory) },
+        },
+        // setup_zope generates the instance configuration in the container
+        securityContext: { user: 500, group: 500, readOnlyRootFilesystem: false },
+      }],
+    });
+    const service = this.deployment.exposeViaService({
+      ports: [{ port: 8080, targetPort: 8080 }],
+    });
+    this.serviceName = service.name;
+  }
+
+  /** The synthesized Deployment, for the helpers in patches.ts. */
+  public get apiObject(): ApiObject {
+    return ApiObject.of(this.deployment);
+  }
+}
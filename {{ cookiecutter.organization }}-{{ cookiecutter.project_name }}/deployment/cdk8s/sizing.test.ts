@@ -0,0 +1,93 @@
+import { PROCESS_BASE_MB, SIZES, backendTuning, parseCpu, parseMemory, postgresTuning, roleResources, varnishStorageSize } from './sizing';
+
+
+describe('roleResources', () => {
+  test('preset', () => {
+    expect(roleResources('small', 'frontend', {})).toEqual(SIZES.small.frontend);
+  });
+
+  test('single values from the environment', () => {
+    const resources = roleResources('large', 'backend', { BACKEND_LIMIT_MEMORY: '6Gi', FRONTEND_LIMIT_CPU: '4' });
+    expect(resources).toEqual({ ...SIZES.large.backend, limitMemory: '6Gi' });
+  });
+
+  test('custom needs all four values', () => {
+    const env = { VARNISH_LIMIT_CPU: '1', VARNISH_LIMIT_MEMORY: '2Gi', VARNISH_REQUEST_CPU: '200m' };
+    expect(() => roleResources('custom', 'varnish', env)).toThrow('SIZE=custom needs VARNISH_REQUEST_MEMORY');
+    expect(roleResources('custom', 'varnish', { ...env, VARNISH_REQUEST_MEMORY: '2Gi' })).toEqual({
+      limitCpu: '1', limitMemory: '2Gi', requestCpu: '200m', requestMemory: '2Gi',
+    });
+  });
+
+  test('unknown size', () => {
+    expect(() => roleResources('huge', 'backend', {})).toThrow(/Unknown SIZE: huge/);
+  });
+});
+
+
+// Snapshots record the derived settings; review their diff when changing
+// the presets or the formulas (`npx jest -u` updates them).
+
+describe('backendTuning', () => {
+  for (const size of Object.keys(SIZES)) {
+    test(size, () => {
+      const { limitCpu, limitMemory } = SIZES[size].backend;
+      expect(backendTuning(parseCpu(limitCpu), parseMemory(limitMemory))).toMatchSnapshot();
+    });
+  }
+
+  // Processes with full object caches, of every connection, within the limit:
+  // the backend presets and the worker defaults (WORKER_LIMIT_*)
+  const limits = [...Object.values(SIZES).map((size) => size.backend), { limitCpu: '1', limitMemory: '1Gi' }];
+  for (const { limitCpu, limitMemory } of limits) {
+    test(`${limitCpu} CPU, ${limitMemory} within the limit`, () => {
+      const tuning = backendTuning(parseCpu(limitCpu), parseMemory(limitMemory));
+      const processMb = PROCESS_BASE_MB
+        + Number(tuning.INSTANCE_db_pool_size) * parseInt(tuning.INSTANCE_db_cache_size_bytes)
+        + Number(tuning.INSTANCE_db_relstorage_cache_local_mb ?? '0');
+      expect(Number(tuning.WSGI_WORKERS) * processMb).toBeLessThanOrEqual(parseMemory(limitMemory) / 2 ** 20);
+    });
+  }
+});
+
+
+describe('postgresTuning', () => {
+  for (const size of Object.keys(SIZES)) {
+    for (const profile of ['oltp', 'jsonb']) {
+      test(`${size} ${profile}`, () => {
+        expect(postgresTuning(SIZES[size].postgres, profile, 100, parseMemory('20Gi'))).toMatchSnapshot();
+      });
+    }
+  }
+
+  test('a quarter of the memory for shared_buffers, the rest as page cache', () => {
+    const params = postgresTuning(SIZES.medium.postgres, 'oltp', 100, parseMemory('20Gi'));
+    expect(params.shared_buffers).toBe('1024MB');
+    expect(params.effective_cache_size).toBe('3072MB');
+  });
+
+  test('WAL size follows the storage size, within bounds', () => {
+    const walSize = (storage: string) =>
+      postgresTuning(SIZES.medium.postgres, 'oltp', 100, parseMemory(storage)).max_wal_size;
+    expect(walSize('5Gi')).toBe('1024MB');
+    expect(walSize('50Gi')).toBe('5120MB');
+    expect(walSize('1Ti')).toBe('16384MB');
+  });
+
+  test('work_mem has a floor', () => {
+    const params = postgresTuning(SIZES.small.postgres, 'oltp', 1000, parseMemory('20Gi'));
+    expect(params.work_mem).toBe('4MB');
+  });
+
+  test('unknown profile', () => {
+    expect(() => postgresTuning(SIZES.small.postgres, 'olap', 100, 0)).toThrow(/profile/);
+  });
+});
+
+
+describe('varnishStorageSize', () => {
+  test('three quarters of the memory limit', () => {
+    expect(varnishStorageSize(SIZES.medium.varnish)).toBe('768M');
+    expect(varnishStorageSize(SIZES.large.varnish)).toBe('3072M');
+  });
+});
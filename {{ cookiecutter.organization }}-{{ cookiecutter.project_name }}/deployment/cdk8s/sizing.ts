@@ -0,0 +1,251 @@
+// Resource presets per role, and backend tuning derived from the container
+// resource limits, so that larger pods use their CPU and memory without
+// hand-tuning. The tuning keys are the INSTANCE_* variables of the image
+// (cookiecutter-zope-instance).
+
+const UNITS: { [suffix: string]: number } = {
+  '': 1,
+  'k': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12,
+  'Ki': 2 ** 10, 'Mi': 2 ** 20, 'Gi': 2 ** 30, 'Ti': 2 ** 40,
+};
+
+
+/** Parse a Kubernetes memory quantity ('2Gi', '512Mi', '1G') into bytes. */
+export function parseMemory(quantity: string): number {
+  const match = /^(\d+(?:\.\d+)?)([kMGT]i?)?$/.exec(quantity.trim());
+  if (!match) {
+    throw new Error(`Invalid memory quantity: ${quantity}`);
+  }
+  return Number(match[1]) * UNITS[match[2] ?? ''];
+}
+
+
+/** Parse a Kubernetes CPU quantity ('500m', '2') into cores. */
+export function parseCpu(quantity: string): number {
+  const value = quantity.trim();
+  return value.endsWith('m') ? Number(value.slice(0, -1)) / 1000 : Number(value);
+}
+
+
+export interface Resources {
+  readonly limitCpu: string;
+  readonly limitMemory: string;
+  readonly requestCpu: string;
+  readonly requestMemory: string;
+}
+
+
+/**
+ * Resources per role and SIZE preset. Memory requests equal the limits for
+ * the roles holding caches (backend, Varnish, PostgreSQL), so the scheduler
+ * reserves what they grow into and they are not evicted under node pressure.
+ */
+export const SIZES: { [size: string]: { [role: string]: Resources } } = {
+  small: {
+    backend: { limitCpu: '1', limitMemory: '1536Mi', requestCpu: '500m', requestMemory: '1536Mi' },
+    frontend: { limitCpu: '500m', limitMemory: '512Mi', requestCpu: '250m', requestMemory: '384Mi' },
+    varnish: { limitCpu: '500m', limitMemory: '512Mi', requestCpu: '100m', requestMemory: '512Mi' },
+    postgres: { limitCpu: '1', limitMemory: '1Gi', requestCpu: '250m', requestMemory: '1Gi' },
+  },
+  medium: {
+    backend: { limitCpu: '1', limitMemory: '2Gi', requestCpu: '1', requestMemory: '2Gi' },
+    frontend: { limitCpu: '1', limitMemory: '1Gi', requestCpu: '500m', requestMemory: '512Mi' },
+    varnish: { limitCpu: '1', limitMemory: '1Gi', requestCpu: '250m', requestMemory: '1Gi' },
+    postgres: { limitCpu: '2', limitMemory: '4Gi', requestCpu: '1', requestMemory: '4Gi' },
+  },
+  large: {
+    backend: { limitCpu: '2', limitMemory: '4Gi', requestCpu: '2', requestMemory: '4Gi' },
+    frontend: { limitCpu: '2', limitMemory: '2Gi', requestCpu: '1', requestMemory: '1Gi' },
+    varnish: { limitCpu: '2', limitMemory: '4Gi', requestCpu: '500m', requestMemory: '4Gi' },
+    postgres: { limitCpu: '4', limitMemory: '16Gi', requestCpu: '2', requestMemory: '16Gi' },
+  },
+};
+
+
+/**
+ * Resources of `role` for the SIZE preset `size`.
+ *
+ * `<ROLE>_LIMIT_CPU`, `<ROLE>_LIMIT_MEMORY`, `<ROLE>_REQUEST_CPU` and
+ * `<ROLE>_REQUEST_MEMORY` in `env` override single values. With 'custom'
+ * there is no preset and all four must be set.
+ */
+export function roleResources(
+  size: string,
+  role: string,
+  env: { [name: string]: string | undefined },
+): Resources {
+  const preset = size === 'custom' ? undefined : SIZES[size];
+  if (size !== 'custom' && !preset) {
+    throw new Error(`Unknown SIZE: ${size} (small, medium, large or custom)`);
+  }
+  const value = (key: keyof Resources, name: string): string => {
+    const result = env[`${role.toUpperCase()}_${name}`] ?? preset?.[role][key];
+    if (result === undefined) {
+      throw new Error(`SIZE=custom needs ${role.toUpperCase()}_${name}`);
+    }
+    return result;
+  };
+  return {
+    limitCpu: value('limitCpu', 'LIMIT_CPU'),
+    limitMemory: value('limitMemory', 'LIMIT_MEMORY'),
+    requestCpu: value('requestCpu', 'REQUEST_CPU'),
+    requestMemory: value('requestMemory', 'REQUEST_MEMORY'),
+  };
+}
+
+
+/**
+ * Cache storage of a Varnish container: three quarters of its memory limit,
+ * in varnishd units (M = MiB). The rest covers the overhead per object,
+ * worker threads and the transient storage of passed responses.
+ */
+export function varnishStorageSize(resources: Resources): string {
+  return `${Math.floor(parseMemory(resources.limitMemory) * 3 / 4 / 2 ** 20)}M`;
+}
+
+
+/** Memory of a backend process without object caches, in MiB. */
+export const PROCESS_BASE_MB = 512;
+
+/** Minimum memory per backend process, in MiB. */
+export const MEMORY_PER_WORKER_MB = 768;
+
+
+/**
+ * Tuning for a backend container with the given CPU and memory limits.
+ *
+{%- if cookiecutter.storage_backend == "none" %}
+ * - Processes: one, FileStorage locks Data.fs to a single process.
+{%- else %}
+ * - Processes: waitress runs one. gunicorn prefork runs one per core, as
+ *   far as the memory limit allows MEMORY_PER_WORKER_MB per process.
+{%- endif %}
+ * - WSGI threads: the GIL serializes Python code, additional threads mainly
+ *   overlap database and network waits. Two per core and process, between
+ *   2 and 8.
+ * - Connection pool: one connection, and thus one object cache, per thread.
+ * - Object caches: half of the memory a process has beyond PROCESS_BASE_MB
+ *   (code, component registries, request handling), split across its
+ *   connections. ZODB estimates object sizes low, so the other half covers
+ *   the difference.
+ */
+export function backendTuning(
+  cpu: number,
+  memoryBytes: number,
+  wsgiServer: string = 'waitress',
+): { [name: string]: string } {
+  const memoryMb = Math.floor(memoryBytes / 2 ** 20);
+{%- if cookiecutter.storage_backend == "none" %}
+  const workers = 1;
+{%- else %}
+  const workers = wsgiServer === 'gunicorn'
+    ? Math.max(1, Math.min(Math.floor(cpu), Math.floor(memoryMb / MEMORY_PER_WORKER_MB)))
+    : 1;
+{%- endif %}
+  const threads = Math.min(8, Math.max(2, Math.ceil(cpu * 2 / workers)));
+  const budgetMb = Math.max(0, memoryMb / workers - PROCESS_BASE_MB) / 2;
+{% if cookiecutter.storage_backend == "relstorage" %}
+  // RelStorage's local cache is shared by all connections of the process
+  const localCacheMb = Math.floor(budgetMb * 0.2);
+  const cacheMb = Math.max(32, Math.floor((budgetMb - localCacheMb) / threads));
+{% else %}
+  const cacheMb = Math.max(32, Math.floor(budgetMb / threads));
+{% endif %}
+  return {
+    WSGI_SERVER: wsgiServer,
+    WSGI_WORKERS: String(workers),
+    INSTANCE_wsgi_threads: String(threads),
+    INSTANCE_db_pool_size: String(threads),
+    // Bounded by bytes; the object count assumes ~5 KiB per object
+    INSTANCE_db_cache_size: String(cacheMb * 200),
+    INSTANCE_db_cache_size_bytes: `${cacheMb}MB`,
+{% if cookiecutter.storage_backend == "relstorage" %}
+    INSTANCE_db_relstorage_cache_local_mb: String(localCacheMb),
+{% endif %}
+  };
+}
+
+
+/**
+ * PostgreSQL connections of one backend pod with the given tuning: one per
+ * pooled ZODB connection and process{% if cookiecutter.storage_backend == "relstorage" %}, twice for RelStorage, which loads and
+ * stores through separate connections{% endif %}.
+ */
+export function backendConnections(tuning: { [name: string]: string }): number {
+  const perConnection = {% if cookiecutter.storage_backend == "relstorage" %}2{% else %}1{% endif %};
+  return Number(tuning.WSGI_WORKERS) * Number(tuning.INSTANCE_db_pool_size) * perConnection;
+}
+
+
+/** Connections to PostgreSQL kept free for the operator, replication and admins. */
+export const RESERVED_CONNECTIONS = 20;
+
+
+/**
+ * PostgreSQL parameters for an instance with the given resources.
+ *
+ * Profiles:
+ * - 'oltp' (RelStorage): many short transactions reading and writing
+ *   single rows by primary key. Small work_mem, little parallel query,
+ *   aggressive autovacuum for the frequently updated object tables.
+ * - 'jsonb' (pgjsonb): object state as JSONB with GIN indexes and catalog
+ *   queries over it. More work_mem and maintenance_work_mem for sorts and
+ *   index builds, parallel query, lz4 compression of large values.
+ *
+ * Memory: a quarter for shared_buffers, three quarters assumed available as
+ * page cache (effective_cache_size). work_mem is sized so that every
+ * connection can run a few sort or hash steps at once within the remaining
+ * memory. WAL sizes follow the storage size, so checkpoints are spread out
+ * without filling the volume.
+ */
+export function postgresTuning(
+  resources: Resources,
+  profile: string,
+  maxConnections: number,
+  storageBytes: number,
+): { [name: string]: string } {
+  if (profile !== 'oltp' && profile !== 'jsonb') {
+    throw new Error(`Unknown PostgreSQL profile: ${profile} (oltp or jsonb)`);
+  }
+  const jsonb = profile === 'jsonb';
+  const memoryMb = Math.floor(parseMemory(resources.limitMemory) / 2 ** 20);
+  const cpu = Math.max(1, Math.floor(parseCpu(resources.limitCpu)));
+  const storageMb = Math.floor(storageBytes / 2 ** 20);
+
+  const sharedBuffersMb = Math.floor(memoryMb / 4);
+  const operationsPerConnection = jsonb ? 2 : 4;
+  const workMemMb = Math.max(4, Math.floor(
+    (memoryMb - sharedBuffersMb) / maxConnections / operationsPerConnection));
+  const maintenanceWorkMemMb = Math.min(2048, Math.floor(memoryMb / (jsonb ? 8 : 16)));
+  // At most a tenth of the volume, which also holds the data
+  const maxWalMb = Math.max(1024, Math.min(16384, Math.floor(storageMb / 10)));
+
+  return {
+    max_connections: String(maxConnections),
+    shared_buffers: `${sharedBuffersMb}MB`,
+    effective_cache_size: `${Math.floor(memoryMb * 3 / 4)}MB`,
+    work_mem: `${workMemMb}MB`,
+    maintenance_work_mem: `${maintenanceWorkMemMb}MB`,
+    // Network volumes: random reads cost little more than sequential ones
+    random_page_cost: '1.1',
+    effective_io_concurrency: '200',
+    max_worker_processes: String(Math.max(8, cpu)),
+    max_parallel_workers: String(cpu),
+    max_parallel_workers_per_gather: String(Math.min(jsonb ? 4 : 2, Math.floor(cpu / 2))),
+    max_parallel_maintenance_workers: String(Math.min(4, Math.floor(cpu / 2))),
+    // WAL: fewer, spread checkpoints; full-page images compress well
+    min_wal_size: `${Math.floor(maxWalMb / 4)}MB`,
+    max_wal_size: `${maxWalMb}MB`,
+    checkpoint_timeout: '15min',
+    checkpoint_completion_target: '0.9',
+    wal_compression: 'lz4',
+    // Autovacuum: clean the object tables early, before dead rows pile up
+    autovacuum_max_workers: String(Math.min(6, Math.max(3, cpu))),
+    autovacuum_naptime: '30s',
+    autovacuum_vacuum_scale_factor: jsonb ? '0.02' : '0.05',
+    autovacuum_vacuum_insert_scale_factor: jsonb ? '0.05' : '0.1',
+    autovacuum_analyze_scale_factor: jsonb ? '0.01' : '0.02',
+    autovacuum_vacuum_cost_limit: String(cpu >= 4 ? 2000 : 1000),
+    ...(jsonb ? { default_toast_compression: 'lz4' } : {}),
+  };
+}
@@ -0,0 +1,101 @@
+import { ApiObject, Chart, Testing } from 'cdk8s';
+import { Construct } from 'constructs';
+import { renderVcl, setCacheStorage, setReplicas, signallerUrl, vclAcl, vclDuration } from './varnish';
+
+
+// A Varnish Deployment as the kube-httpcache chart renders it
+function httpcache(args: string[] = ['-varnish-storage=malloc,128M']): Construct {
+  const chart = Testing.chart();
+  const scope = new Construct(chart, 'httpcache');
+  new ApiObject(scope, 'varnish', {
+    apiVersion: 'apps/v1',
+    kind: 'Deployment',
+    metadata: { name: 'varnish' },
+    spec: {
+      template: {
+        spec: { containers: [{ name: 'exporter' }, { name: 'varnish', args: ['-admin-addr=0.0.0.0', ...args] }] },
+      },
+    },
+  });
+  return scope;
+}
+
+
+// A Service of the chart below `scope`
+function service(scope: Construct, name: string, ports: { port: number; targetPort: number }[]) {
+  new ApiObject(scope, name, { apiVersion: 'v1', kind: 'Service', metadata: { name }, spec: { ports } });
+}
+
+
+function containers(scope: Construct): any[] {
+  const [deployment] = Testing.synth(Chart.of(scope));
+  return deployment.spec.template.spec.containers;
+}
+
+
+describe('renderVcl', () => {
+  test('placeholders', () => {
+    expect(renderVcl('set beresp.grace = ${GRACE}; # ${GRACE}', { GRACE: '1h' }))
+      .toBe('set beresp.grace = 1h; # 1h');
+  });
+
+  test('fails on placeholders without a value', () => {
+    expect(() => renderVcl('set beresp.keep = ${KEEP};', { GRACE: '1h' })).toThrow(/\$\{KEEP\}/);
+  });
+});
+
+
+describe('VCL values', () => {
+  test('durations', () => {
+    expect(vclDuration(' 30s ')).toBe('30s');
+    expect(vclDuration('1.5h')).toBe('1.5h');
+    for (const value of ['30', '1 h', 'soon', '1h; return (pass)']) {
+      expect(() => vclDuration(value)).toThrow(/Invalid VCL duration/);
+    }
+  });
+
+  test('ACL entries', () => {
+    expect(vclAcl('10.0.0.0/8, fd00::/8 192.168.1.5')).toBe('"10.0.0.0"/8; "fd00::"/8; "192.168.1.5";');
+    expect(vclAcl('')).toBe('');
+    expect(() => vclAcl('10.0.0.0/8 example.com')).toThrow(/Invalid network/);
+  });
+});
+
+
+describe('setCacheStorage', () => {
+  test('replaces the storage argument of the Varnish container', () => {
+    const scope = httpcache();
+    setCacheStorage(scope, '768M');
+    const [exporter, varnish] = containers(scope);
+    expect(exporter.args).toBeUndefined();
+    expect(varnish.args).toEqual(['-admin-addr=0.0.0.0', '-varnish-storage=malloc,768M']);
+  });
+
+  test('fails without a storage argument', () => {
+    expect(() => setCacheStorage(httpcache([]), '768M')).toThrow(/-varnish-storage/);
+  });
+});
+
+
+describe('setReplicas', () => {
+  test('Varnish pods', () => {
+    const scope = httpcache();
+    setReplicas(scope, 3);
+    expect(Testing.synth(Chart.of(scope))[0].spec.replicas).toBe(3);
+    expect(() => setReplicas(new Construct(Testing.chart(), 'empty'), 3)).toThrow(/No Varnish workload/);
+  });
+});
+
+describe('signallerUrl', () => {
+  test('Service port forwarding to the signaller', () => {
+    const scope = httpcache();
+    service(scope, 'httpcache', [{ port: 80, targetPort: 8080 }, { port: 8090, targetPort: 8090 }]);
+    expect(signallerUrl(scope)).toBe('http://httpcache:8090');
+  });
+
+  test('fails without one', () => {
+    const scope = httpcache();
+    service(scope, 'httpcache', [{ port: 80, targetPort: 8080 }]);
+    expect(() => signallerUrl(scope)).toThrow(/signaller/);
+  });
+});
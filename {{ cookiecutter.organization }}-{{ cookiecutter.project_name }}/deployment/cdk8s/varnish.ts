@@ -0,0 +1,135 @@
+import { Construct } from 'constructs';
+import { ApiObject, JsonPatch } from 'cdk8s';
+import { findWorkloads } from './patches';
+
+
+// Varnish settings PloneHttpcache does not expose: the VCL from
+// deployment/varnish/, the cache storage, replicas, the signaller and the
+// Service of the kube-httpcache chart.
+
+const DURATION = /^\d+(\.\d+)?(ms|s|m|h|d|w|y)$/;
+const NETWORK = /^[0-9a-fA-F.:]+(\/\d{1,3})?$/;
+const SIGNALLER_PORT = 8090;
+const VARNISH_PORT = 8080;
+
+
+/**
+ * Replace the `${NAME}` placeholders of a VCL template with `values`.
+ *
+ * Fails on placeholders without a value, so that a setting added to the VCL
+ * cannot reach Varnish unrendered.
+ */
+export function renderVcl(template: string, values: { [name: string]: string }): string {
+  return template.replace(/\$\{([A-Z_]+)\}/g, (placeholder, name: string) => {
+    if (values[name] === undefined) {
+      throw new Error(`No value for ${placeholder} in the VCL`);
+    }
+    return values[name];
+  });
+}
+
+
+/** Check a VCL duration such as '30s', '1h' or '7d'. */
+export function vclDuration(value: string): string {
+  if (!DURATION.test(value.trim())) {
+    throw new Error(`Invalid VCL duration: ${value} (e.g. 30s, 1h, 7d)`);
+  }
+  return value.trim();
+}
+
+
+/**
+ * ACL entries for networks separated by whitespace or commas, e.g.
+ * '10.0.0.0/8 fd00::/8' becomes '"10.0.0.0"/8; "fd00::"/8;'.
+ */
+export function vclAcl(networks: string): string {
+  return networks.split(/[\s,]+/).filter((network) => network).map((network) => {
+    if (!NETWORK.test(network)) {
+      throw new Error(`Invalid network for a VCL ACL: ${network} (e.g. 10.0.0.0/8)`);
+    }
+    const [address, bits] = network.split('/');
+    return bits === undefined ? `"${address}";` : `"${address}"/${bits};`;
+  }).join(' ');
+}
+
+
+/**
+ * Set the size of the malloc cache storage of the Varnish pods below
+ * `scope`, e.g. '768M'. kube-httpcache passes it to varnishd through its
+ * `-varnish-storage` argument, 128M by default.
+ */
+export function setCacheStorage(scope: Construct, size: string) {
+  let found = 0;
+  for (const workload of findWorkloads(scope)) {
+    const containers: { args?: string[] }[] = workload.toJson().spec?.template?.spec?.containers ?? [];
+    containers.forEach((container, c) => {
+      const index = (container.args ?? []).findIndex((arg) => arg.startsWith('-varnish-storage='));
+      if (index >= 0) {
+        workload.addJsonPatch(JsonPatch.replace(
+          `/spec/template/spec/containers/${c}/args/${index}`, `-varnish-storage=malloc,${size}`));
+        found += 1;
+      }
+    });
+  }
+  if (!found) {
+    throw new Error(`No -varnish-storage argument below ${scope.node.path}`);
+  }
+}
+
+
+/**
+ * Run `replicas` Varnish pods below `scope`. The VCL shards the cache over
+ * them, so its capacity grows with the pods.
+ */
+export function setReplicas(scope: Construct, replicas: number) {
+  const workloads = findWorkloads(scope);
+  if (!workloads.length) {
+    throw new Error(`No Varnish workload below ${scope.node.path}`);
+  }
+  for (const workload of workloads) {
+    workload.addJsonPatch(JsonPatch.add('/spec/replicas', replicas));
+  }
+}
+
+
+/**
+ * Name and port of the Service below `scope` that forwards to `targetPort`.
+ */
+function findServicePort(scope: Construct, targetPort: number): { name: string; port: number } | undefined {
+  const services = scope.node.findAll().filter((c): c is ApiObject =>
+    c instanceof ApiObject && c.kind === 'Service',
+  );
+  for (const service of services) {
+    const ports: { port: number; targetPort?: number | string }[] = service.toJson().spec?.ports ?? [];
+    const found = ports.find((port) => port.targetPort === targetPort || port.port === targetPort);
+    if (found) {
+      return { name: service.name, port: found.port };
+    }
+  }
+  return undefined;
+}
+
+
+/**
+ * URL of the kube-httpcache signaller below `scope`. It forwards every
+ * PURGE and BAN request it receives to all Varnish pods of the Service.
+ */
+export function signallerUrl(scope: Construct): string {
+  const signaller = findServicePort(scope, SIGNALLER_PORT);
+  if (!signaller) {
+    throw new Error(`No Service for the signaller (port ${SIGNALLER_PORT}) below ${scope.node.path}`);
+  }
+  return `http://${signaller.name}:${signaller.port}`;
+}
+
+
+/**
+ * Service of the Varnish pods below `scope`, for ingress rules.
+ */
+export function cacheService(scope: Construct): { name: string; port: number } {
+  const service = findServicePort(scope, VARNISH_PORT);
+  if (!service) {
+    throw new Error(`No Service for Varnish (port ${VARNISH_PORT}) below ${scope.node.path}`);
+  }
+  return service;
+}
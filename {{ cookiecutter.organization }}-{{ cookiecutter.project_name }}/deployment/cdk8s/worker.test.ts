@@ -0,0 +1,34 @@
+import { Testing } from 'cdk8s';
+import * as kplus from 'cdk8s-plus-30';
+import { Worker, WorkerOptions } from './worker';
+
+
+function container(options: Partial<WorkerOptions> = {}): any {
+  const chart = Testing.chart();
+  new Worker(chart, 'worker', {
+    image: 'plone',
+    environment: new kplus.Env([], { INSTANCE_db_pool_size: kplus.EnvValue.fromValue('2') }),
+    ...options,
+  });
+  const deployment = Testing.synth(chart).find((manifest) => manifest.kind === 'Deployment');
+  return deployment.spec.template.spec.containers[0];
+}
+
+
+describe('Worker', () => {
+  test('runs start-worker with the environment it is given', () => {
+    const worker = container();
+    expect(worker.args).toEqual(['start-worker']);
+    expect(worker.env).toEqual([{ name: 'INSTANCE_db_pool_size', value: '2' }]);
+  });
+
+  test('liveness checks the heartbeat of the job loop', () => {
+    expect(container().livenessProbe.exec.command).toEqual(['/deployment/entrypoint.sh', 'healthcheck']);
+  });
+
+  test('memory request equals the limit', () => {
+    const { resources } = container({ limitCpu: '2', limitMemory: '1536Mi', requestCpu: '250m' });
+    expect(resources.limits).toEqual({ cpu: '2000m', memory: '1536Mi' });
+    expect(resources.requests).toEqual({ cpu: '250m', memory: '1536Mi' });
+  });
+});
@@ -0,0 +1,58 @@
+import { Construct } from 'constructs';
+import { Duration, Size } from 'cdk8s';
+import * as kplus from 'cdk8s-plus-30';
+import { parseCpu, parseMemory } from './sizing';
+
+
+export interface WorkerOptions {
+  readonly image: string;
+  /** Database environment, with the tuning for the worker limits. */
+  readonly environment: kplus.Env;
+  readonly replicas?: number;
+  readonly limitCpu?: string;
+  readonly limitMemory?: string;
+  readonly requestCpu?: string;
+}
+
+
+/**
+ * Deployment of background job workers (`start-worker`).
+ *
+ * Workers use the backend's database environment and claim jobs from the
+ * queue in PostgreSQL. They serve no HTTP, so liveness checks the heartbeat
+ * file of the job loop (`entrypoint.sh healthcheck`).
+ */
+export class Worker extends Construct {
+  public readonly deployment: kplus.Deployment;
+
+  constructor(scope: Construct, id: string, options: WorkerOptions) {
+    super(scope, id);
+
+    const limitCpu = options.limitCpu ?? '1';
+    const cpu = (quantity: string) => kplus.Cpu.millis(Math.round(parseCpu(quantity) * 1000));
+    const memory = Size.mebibytes(Math.floor(parseMemory(options.limitMemory ?? '1Gi') / 2 ** 20));
+
+    this.deployment = new kplus.Deployment(this, 'deployment', {
+      replicas: options.replicas ?? 1,
+      securityContext: { user: 500, group: 500 },
+      containers: [{
+        name: 'worker',
+        image: options.image,
+        args: ['start-worker'],
+        envVariables: options.environment.variables,
+        resources: {
+          cpu: { request: cpu(options.requestCpu ?? limitCpu), limit: cpu(limitCpu) },
+          memory: { request: memory, limit: memory },
+        },
+        liveness: kplus.Probe.fromCommand(['/deployment/entrypoint.sh', 'healthcheck'], {
+          // Zope loads its configuration before the job loop starts
+          initialDelaySeconds: Duration.seconds(120),
+          periodSeconds: Duration.seconds(30),
+          failureThreshold: 3,
+        }),
+        // setup_zope generates the instance configuration in the container
+        securityContext: { user: 500, group: 500, readOnlyRootFilesystem: false },
+      }],
+    });
+  }
+}
@@ -4,15 +4,11 @@ set -e
 # ---------------------------------------------------------------------------
 # {{ cookiecutter.title }} OCI Image Entrypoint
 #
-{% if cookiecutter.include_frontend == "yes" and cookiecutter.storage_backend == "relstorage" %}
-# Built-in commands: start-backend, start-frontend, export, import, pack
-{% elif cookiecutter.include_frontend == "yes" %}
-# Built-in commands: start-backend, start-frontend
-{% elif cookiecutter.storage_backend == "relstorage" %}
-# Built-in commands: start-backend, export, import, pack
-{% else %}
-# Built-in commands: start-backend
-{% endif %}
+# Built-in commands: start-backend{% if cookiecutter.include_frontend == "yes" %}, start-frontend{% endif %}{% if cookiecutter.storage_backend != "none" %}, start-worker{% endif %}, warmup
+{% if cookiecutter.storage_backend == "relstorage" %}# Database commands: export, import, dump, load, pack, db-report
+{% elif cookiecutter.storage_backend == "pgjsonb" %}# Database commands: db-report
+{% endif %}{% if cookiecutter.python_free_threaded == "yes" %}# Free-threaded Python: gil-check (extension modules that re-enable the GIL)
+{% endif %}# Health check: healthcheck (image HEALTHCHECK, probes the running server)
 # Extensible: drop scripts into /deployment/commands.d/<command>.sh
 # ---------------------------------------------------------------------------
 
@@ -26,18 +22,172 @@ fi
 
 # Helper: generate Zope instance from environment variables
 setup_zope() {
+{% if cookiecutter.storage_backend == "relstorage" %}
+    # Client caches may live on a freshly mounted, empty volume
+    mkdir -p "$INSTANCE_db_relstorage_cache_local_dir" "$INSTANCE_db_blobs_location"
+{% elif cookiecutter.storage_backend == "pgjsonb" %}
+    # The blob cache may live on a freshly mounted, empty volume
+    mkdir -p "$INSTANCE_db_blobs_location"
+{% endif %}
     python /deployment/transform_from_environment.py \
         -o "$ZOPE_CONFIGURATION_FILE"
     cd /backend && make zope-instance
 }
 
-# Built-in commands
+{% if cookiecutter.storage_backend == "relstorage" %}
+# Helper: RelStorage configuration for zodbpack, zodbstream and, as section
+# $1 (source or destination), zodbconvert. Packing deletes in batches that
+# hold the commit lock at most PACK_BATCH_TIMEOUT seconds and waits
+# PACK_COMMIT_BUSY_DELAY seconds while others commit.
+write_relstorage_conf() {
+    mkdir -p "$INSTANCE_db_blobs_location"
+    cat <<EOF
+%import relstorage
+<relstorage${1:+ $1}>
+    keep-history ${INSTANCE_db_relstorage_keep_history:-true}
+    pack-gc ${PACK_GC}
+    pack-batch-timeout ${PACK_BATCH_TIMEOUT}
+    pack-commit-busy-delay ${PACK_COMMIT_BUSY_DELAY}
+    blob-dir ${INSTANCE_db_blobs_location}
+    shared-blob-dir false
+    <postgresql>
+        dsn ${INSTANCE_db_relstorage_postgresql_dsn}
+    </postgresql>
+</relstorage>
+EOF
+}
+
+# Helper: FileStorage of export and import, as zodbconvert section $1
+write_filestorage_conf() {
+    mkdir -p "$(dirname "$FILESTORAGE_PATH")" "$FILESTORAGE_BLOBS"
+    cat <<EOF
+<filestorage $1>
+    path ${FILESTORAGE_PATH}
+    blob-dir ${FILESTORAGE_BLOBS}
+</filestorage>
+EOF
+}
+
+{% endif %}
+{% if cookiecutter.memory_allocator != "glibc" %}
+# Helper: preload the allocator in MALLOC_LIBRARY into backend processes
+# (and the processes they fork). Empty: glibc malloc.
+use_allocator() {
+    if [[ -n "$MALLOC_LIBRARY" ]]; then
+        if [[ ! -f "$MALLOC_LIBRARY" ]]; then
+            echo "MALLOC_LIBRARY '$MALLOC_LIBRARY' not found" >&2
+            exit 1
+        fi
+        echo "Using allocator $MALLOC_LIBRARY"
+        export LD_PRELOAD="$MALLOC_LIBRARY${LD_PRELOAD:+ $LD_PRELOAD}"
+    fi
+}
+
+{% endif %}
+{%- if cookiecutter.storage_backend != "none" %}
+# Helper: default number of backend processes. One per CPU of the container
+# (cgroup CPU quota), as far as the memory limit allows MEMORY_PER_WORKER_MB
+# per process.
+default_workers() {
+    local workers quota period limit
+    workers=$(nproc)
+    if read -r quota period 2>/dev/null < /sys/fs/cgroup/cpu.max && [[ "$quota" =~ ^[0-9]+$ ]]; then
+        workers=$(( quota / period ))
+    fi
+    limit=$(cat /sys/fs/cgroup/memory.max 2>/dev/null || echo max)
+    if [[ "$limit" =~ ^[0-9]+$ ]] && (( limit / (MEMORY_PER_WORKER_MB * 1048576) < workers )); then
+        workers=$(( limit / (MEMORY_PER_WORKER_MB * 1048576) ))
+    fi
+    echo $(( workers < 1 ? 1 : workers ))
+}
+
+{% endif %}# Built-in commands
 case "$1" in
     start-backend)
         echo "Setting up Zope instance from environment"
         setup_zope
-        echo "Starting Plone backend"
-        exec make zope-start
+{% if cookiecutter.memory_allocator != "glibc" %}
+        use_allocator
+{% endif %}
+        case "$WSGI_SERVER" in
+            waitress)
+                echo "Starting Plone backend (waitress, one process)"
+                exec make zope-start
+                ;;
+            gunicorn)
+                # Prefork: each worker is a separate Zope process with its own
+                # ZODB connections and caches. No --preload, database
+                # connections must not be shared across fork().
+{%- if cookiecutter.storage_backend == "none" %}
+                # FileStorage locks Data.fs to a single process.
+                workers=${WSGI_WORKERS:-1}
+                if [ "$workers" != 1 ]; then
+                    echo "WSGI_WORKERS=$workers needs a database server, FileStorage allows one process" >&2
+                    exit 1
+                fi
+{%- else %}
+                workers=${WSGI_WORKERS:-$(default_workers)}
+{%- endif %}
+                echo "Starting Plone backend (gunicorn, $workers processes)"
+                exec gunicorn \
+                    --paste "$INSTANCE_target/etc/zope.ini" \
+                    --bind 0.0.0.0:8080 \
+                    --workers "$workers" \
+                    --threads "$INSTANCE_wsgi_threads" \
+                    --timeout 120 \
+                    --graceful-timeout 30
+                ;;
+            *)
+                echo "Unknown WSGI_SERVER '$WSGI_SERVER', use waitress or gunicorn" >&2
+                exit 1
+                ;;
+        esac
+        ;;
+{% if cookiecutter.storage_backend != "none" %}
+    start-worker)
+        echo "Setting up Zope instance from environment"
+        setup_zope
+{% if cookiecutter.memory_allocator != "glibc" %}
+        use_allocator
+{% endif %}
+        # zconsole directly, so that SIGTERM reaches the worker, which then
+        # finishes its current job
+        echo "Starting background job worker"
+        WARMUP_ON_START=false exec zconsole run "$INSTANCE_target/etc/zope.conf" /backend/scripts/worker.py
+        ;;
+{% endif %}
+    warmup)
+        setup_zope
+        echo "Warming storage caches"
+        cd /backend && WARMUP_ON_START=false exec make zope-warmup
+        ;;
+{% if cookiecutter.python_free_threaded == "yes" %}
+    gil-check)
+        echo "Checking extension modules for free-threading support"
+        exec python /backend/scripts/gil_check.py
+        ;;
+{% endif %}
+{% if cookiecutter.storage_backend != "none" %}
+    db-report)
+        # Top statements, cache hit ratios and dead rows of the database;
+        # --dsn for another database, --reset to restart the statistics
+        exec python /backend/scripts/db_report.py "${@:2}"
+        ;;
+{% endif %}
+    healthcheck)
+{% if cookiecutter.storage_backend != "none" %}
+        # Worker: its job loop touches the heartbeat file every 10 seconds
+        if [[ -f /tmp/zope-worker.alive ]]; then
+            (( $(date +%s) - $(stat -c %Y /tmp/zope-worker.alive) < 60 )) && exit 0
+            exit 1
+        fi
+{% endif %}
+        # Succeeds if the server of this container answers its health route
+        wget -q -O /dev/null -T 4 --tries=1 http://127.0.0.1:8080/@@health && exit 0
+{% if cookiecutter.include_frontend == "yes" %}
+        wget -q -O /dev/null -T 4 --tries=1 http://127.0.0.1:3000/health && exit 0
+{% endif %}
+        exit 1
         ;;
 {% if cookiecutter.include_frontend == "yes" %}
     start-frontend)
@@ -47,19 +197,34 @@ case "$1" in
 {% endif %}
 {% if cookiecutter.storage_backend == "relstorage" %}
     export)
-        setup_zope
-        echo "Exporting ZODB to filestorage"
-        exec zodbconvert --clear /backend/instance/etc/relstorage-export.conf
+        {
+            write_relstorage_conf source
+            write_filestorage_conf destination
+        } > /tmp/relstorage-export.conf
+        echo "Exporting ZODB to $FILESTORAGE_PATH"
+        exec zodbconvert --clear /tmp/relstorage-export.conf
         ;;
     import)
-        setup_zope
-        echo "Importing filestorage to ZODB"
-        exec zodbconvert --clear /backend/instance/etc/relstorage-import.conf
+        {
+            write_filestorage_conf source
+            write_relstorage_conf destination
+        } > /tmp/relstorage-import.conf
+        echo "Importing $FILESTORAGE_PATH to ZODB"
+        exec zodbconvert --clear /tmp/relstorage-import.conf
+        ;;
+    dump)
+        # Transactions and blobs as a stream on stdout, logs on stderr
+        write_relstorage_conf > /tmp/relstorage.conf
+        exec python /backend/scripts/zodbstream.py dump /tmp/relstorage.conf "${@:2}"
+        ;;
+    load)
+        write_relstorage_conf > /tmp/relstorage.conf
+        exec python /backend/scripts/zodbstream.py load /tmp/relstorage.conf "${@:2}"
         ;;
     pack)
-        setup_zope
-        echo "Packing ZODB"
-        exec zodbpack /backend/instance/etc/relstorage-pack.conf
+        write_relstorage_conf > /tmp/relstorage-pack.conf
+        echo "Packing ZODB: keeping $PACK_DAYS days of history, GC $PACK_GC"
+        exec zodbpack --days "$PACK_DAYS" /tmp/relstorage-pack.conf
         ;;
 {% endif %}
     *)
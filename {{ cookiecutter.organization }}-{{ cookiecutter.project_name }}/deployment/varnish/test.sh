@@ -0,0 +1,85 @@
+#!/bin/bash
+# Run the varnishtest cases in tests/ against plone.vcl.
+#
+# Renders the VCL like deployment/cdk8s/varnish.ts, with local addresses
+# served by the test servers; VARNISH_* settings apply as in the deployment.
+# Needs varnishtest, e.g. from the Varnish image: `make varnish-test`.
+set -euo pipefail
+cd "$(dirname "$0")"
+
+BACKEND_PORT=18080
+SHARD1_PORT=16081
+SHARD2_PORT=16082
+{% if cookiecutter.include_frontend == "yes" %}FRONTEND_PORT=13000
+{% endif %}
+# ACL entries as rendered by varnish.ts, e.g. "10.0.0.0"/8;
+purge_acl=""
+networks="${VARNISH_PURGE_NETWORKS-10.0.0.0/8,172.16.0.0/12,192.168.0.0/16}"
+for network in ${networks//,/ }; do
+    if [[ $network == */* ]]; then
+        purge_acl+="\"${network%/*}\"/${network#*/}; "
+    else
+        purge_acl+="\"$network\"; "
+    fi
+done
+purge_acl="${purge_acl% }"
+
+declare -A values=(
+    [BACKEND_HOST]=127.0.0.1
+    [BACKEND_PORT]=$BACKEND_PORT
+{% if cookiecutter.include_frontend == "yes" %}    [FRONTEND_HOST]=127.0.0.1
+    [FRONTEND_PORT]=$FRONTEND_PORT
+{% endif %}    # Defaults as in deployment/cdk8s/main.ts
+    [GRACE]="${VARNISH_GRACE:-1h}"
+    [KEEP]="${VARNISH_KEEP:-1d}"
+    [STATIC_TTL]="${VARNISH_STATIC_TTL:-1d}"
+    [PURGE_ACL]="$purge_acl"
+    [SITE_PATH]="${VARNISH_SITE_PATH:-/Plone}"
+    [PASS_COOKIES]="${VARNISH_PASS_COOKIES:-{% if cookiecutter.include_frontend == "yes" %}auth_token|__ac{% else %}__ac|_ZopeId|__cp|statusmessages|auth_token{% endif %}}"
+)
+
+tmp=$(mktemp -d)
+trap 'rm -rf "$tmp"' EXIT
+
+script=()
+for name in "${!values[@]}"; do
+    script+=(-e "s#\${$name}#${values[$name]}#g")
+done
+sed "${script[@]}" plone.vcl > "$tmp/template.vcl"
+
+# The kube-httpcache blocks for the Varnish pods: removed for a single
+# Varnish without shards (plone.vcl), filled in with two local Varnish
+# instances for tests/shard.vtc (shard.vcl)
+{% raw %}sed '/^{{ range \.Frontends }}$/,/^{{ end }}$/d' "$tmp/template.vcl" > "$tmp/plone.vcl"
+awk -v pods="shard1:$SHARD1_PORT shard2:$SHARD2_PORT" '
+    function replace(text, from, to,    at) {
+        while ((at = index(text, from)) > 0) {
+            text = substr(text, 1, at - 1) to substr(text, at + length(from))
+        }
+        return text
+    }
+    $0 == "{{ range .Frontends }}" { inside = 1; block = ""; next }
+    inside && $0 == "{{ end }}" {
+        count = split(pods, list, " ")
+        for (i = 1; i <= count; i++) {
+            split(list[i], pod, ":")
+            text = replace(block, "{{ .Name }}", pod[1])
+            text = replace(text, "{{ .Host }}", "127.0.0.1")
+            printf "%s", replace(text, "{{ .Port }}", pod[2])
+        }
+        inside = 0
+        next
+    }
+    inside { block = block $0 "\n"; next }
+    { print }
+' "$tmp/template.vcl" > "$tmp/shard.vcl"
+for vcl in plone.vcl shard.vcl; do
+    if grep -n '\${[A-Z_]*}\|{{' "$tmp/$vcl"; then
+        echo "$vcl: placeholders without a value" >&2
+        exit 1
+    fi
+done{% endraw %}
+
+varnishtest -D vcl="$tmp/plone.vcl" -D shard_vcl="$tmp/shard.vcl" \
+    -D shard1_port=$SHARD1_PORT -D shard2_port=$SHARD2_PORT \
+    -D backend_port=$BACKEND_PORT{% if cookiecutter.include_frontend == "yes" %} -D frontend_port=$FRONTEND_PORT{% endif %} "$@" tests/*.vtc
@@ -0,0 +1,25 @@
+import type { ConfigType } from "@plone/registry";
+
+declare const __SERVER__: boolean;
+
+export default function install(config: ConfigType) {
+  if (__SERVER__) {
+    // Server-only code, kept out of the client bundle
+    const healthMiddleware = require("../express-middleware/health").default;
+    const {
+      precompressedStatic,
+    } = require("../express-middleware/precompressed");
+    // Volto sets up express.static after applying the add-on configuration
+    // and ahead of expressMiddleware, so its replacement serves the
+    // precompressed static resources
+    const express = require("express");
+    if (!express.static.precompressed) {
+      express.static = precompressedStatic(express.static);
+    }
+    config.settings.expressMiddleware = [
+      ...(config.settings.expressMiddleware || []),
+      healthMiddleware,
+    ];
+  }
+  return config;
+}
@@ -0,0 +1,67 @@
+/**
+ * @jest-environment node
+ */
+import config from '@plone/registry';
+import express from 'express';
+import http from 'http';
+import type { AddressInfo } from 'net';
+import healthMiddleware from './health';
+
+let backend: http.Server;
+let backendStatus = 200;
+let server: http.Server;
+
+function listen(handler: http.RequestListener): Promise<http.Server> {
+  return new Promise((resolve) => {
+    const listening = http
+      .createServer(handler)
+      .listen(0, () => resolve(listening));
+  });
+}
+
+async function get(path: string) {
+  const { port } = server.address() as AddressInfo;
+  const response = await fetch(`http://127.0.0.1:${port}${path}`);
+  return { status: response.status, body: await response.text() };
+}
+
+beforeAll(async () => {
+  backend = await listen((req, res) => {
+    res.statusCode = req.url === '/@@ready' ? backendStatus : 404;
+    res.end();
+  });
+  const { port } = backend.address() as AddressInfo;
+  config.settings.apiPath = `http://127.0.0.1:${port}`;
+  config.settings.internalApiPath = '';
+  server = await listen(express().use(healthMiddleware));
+});
+
+afterAll(() => {
+  backend.close();
+  server.close();
+});
+
+describe('health middleware', () => {
+  test('liveness without the backend', async () => {
+    backendStatus = 503;
+    expect(await get('/health')).toEqual({ status: 200, body: 'OK' });
+  });
+
+  test('readiness follows the backend, cached briefly', async () => {
+    const now = jest.spyOn(Date, 'now').mockReturnValue(1_000_000);
+    backendStatus = 200;
+    expect(await get('/health/ready')).toEqual({ status: 200, body: 'READY' });
+    backendStatus = 503;
+    expect((await get('/health/ready')).status).toBe(200);
+    now.mockReturnValue(1_010_000);
+    expect(await get('/health/ready')).toEqual({
+      status: 503,
+      body: 'BACKEND NOT READY',
+    });
+    now.mockRestore();
+  });
+
+  test('other paths fall through', async () => {
+    expect((await get('/news')).status).toBe(404);
+  });
+});
@@ -0,0 +1,62 @@
+import config from '@plone/registry';
+import type { NextFunction, Request, Response } from 'express';
+
+// Probe endpoints of the Volto SSR server:
+//   /health        liveness, answered by the Node process itself
+//   /health/ready  readiness, the backend answers its own /@@ready
+//
+// The backend result is cached briefly so that probes from several
+// kubelets or load balancers do not multiply backend traffic.
+
+const READY_CACHE_MS = 5000;
+const READY_TIMEOUT_MS = 3000;
+
+let lastCheck = 0;
+let lastReady = false;
+
+function backendReadyUrl(): string {
+  const { internalApiPath, apiPath } = config.settings;
+  return `${new URL(internalApiPath || apiPath).origin}/@@ready`;
+}
+
+async function backendReady(): Promise<boolean> {
+  const now = Date.now();
+  if (now - lastCheck < READY_CACHE_MS) {
+    return lastReady;
+  }
+  try {
+    const response = await fetch(backendReadyUrl(), {
+      signal: AbortSignal.timeout(READY_TIMEOUT_MS),
+    });
+    lastReady = response.ok;
+  } catch {
+    lastReady = false;
+  }
+  lastCheck = now;
+  return lastReady;
+}
+
+function respond(res: Response, status: number, body: string) {
+  res.status(status).set('Cache-Control', 'no-store').type('text/plain');
+  res.send(body);
+}
+
+export default function healthMiddleware(
+  req: Request,
+  res: Response,
+  next: NextFunction,
+) {
+  if (req.method !== 'GET') {
+    next();
+  } else if (req.path === '/health') {
+    respond(res, 200, 'OK');
+  } else if (req.path === '/health/ready') {
+    backendReady().then((ready) =>
+      respond(res, ready ? 200 : 503, ready ? 'READY' : 'BACKEND NOT READY'),
+    );
+  } else {
+    next();
+  }
+}
+
+healthMiddleware.id = 'health';
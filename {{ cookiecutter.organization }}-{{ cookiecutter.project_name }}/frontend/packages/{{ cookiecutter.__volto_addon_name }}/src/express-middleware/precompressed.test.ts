@@ -0,0 +1,102 @@
+/**
+ * @jest-environment node
+ */
+import express from 'express';
+import fs from 'fs';
+import http from 'http';
+import type { AddressInfo } from 'net';
+import os from 'os';
+import path from 'path';
+import { precompressedMiddleware, precompressedStatic } from './precompressed';
+
+let root: string;
+let server: http.Server;
+
+// Status, headers and body of a request to the test server
+function get(
+  url: string,
+  headers: http.OutgoingHttpHeaders = {},
+): Promise<{
+  status?: number;
+  headers: http.IncomingHttpHeaders;
+  body: string;
+}> {
+  const { port } = server.address() as AddressInfo;
+  return new Promise((resolve, reject) => {
+    http
+      .get({ port, path: url, headers }, (res) => {
+        const chunks: Buffer[] = [];
+        res.on('data', (chunk) => chunks.push(chunk));
+        res.on('end', () =>
+          resolve({
+            status: res.statusCode,
+            headers: res.headers,
+            body: Buffer.concat(chunks).toString(),
+          }),
+        );
+      })
+      .on('error', reject);
+  });
+}
+
+beforeAll((done) => {
+  root = fs.mkdtempSync(path.join(os.tmpdir(), 'public-'));
+  fs.mkdirSync(path.join(root, 'static', 'js'), { recursive: true });
+  fs.writeFileSync(path.join(root, 'static', 'js', 'client.js'), 'plain');
+  fs.writeFileSync(path.join(root, 'static', 'js', 'client.js.br'), 'brotli');
+  fs.writeFileSync(path.join(root, 'static', 'js', 'client.js.gz'), 'gzip');
+  fs.writeFileSync(path.join(root, 'static', 'js', 'small.js'), 'small');
+  // Set up as Volto does: express.static first
+  const app = express().use(precompressedStatic(express.static)(root, {}));
+  server = app.listen(0, done);
+});
+
+afterAll((done) => {
+  fs.rmSync(root, { recursive: true });
+  server.close(done);
+});
+
+describe('precompressed static resources', () => {
+  test('brotli before gzip', async () => {
+    const res = await get('/static/js/client.js', {
+      'Accept-Encoding': 'gzip, deflate, br',
+    });
+    expect(res.status).toBe(200);
+    expect(res.body).toBe('brotli');
+    expect(res.headers['content-encoding']).toBe('br');
+    expect(res.headers['content-type']).toMatch(/javascript/);
+    expect(res.headers['vary']).toBe('Accept-Encoding');
+    expect(res.headers['cache-control']).toBe(
+      'public, max-age=31536000, immutable',
+    );
+  });
+
+  test('gzip', async () => {
+    const res = await get('/static/js/client.js', {
+      'Accept-Encoding': 'gzip',
+    });
+    expect(res.body).toBe('gzip');
+    expect(res.headers['content-encoding']).toBe('gzip');
+  });
+
+  test('uncompressed for other clients', async () => {
+    const res = await get('/static/js/client.js', {
+      'Accept-Encoding': 'identity',
+    });
+    expect(res.body).toBe('plain');
+    expect(res.headers['content-encoding']).toBeUndefined();
+    expect(res.headers['vary']).toBe('Accept-Encoding');
+  });
+
+  test('files without a sibling', async () => {
+    const res = await get('/static/js/small.js', { 'Accept-Encoding': 'br' });
+    expect(res.body).toBe('small');
+    expect(res.headers['content-encoding']).toBeUndefined();
+  });
+
+  test('no public directory', () => {
+    expect(() => precompressedMiddleware('', express.static('.'))).toThrow(
+      /RAZZLE_PUBLIC_DIR/,
+    );
+  });
+});
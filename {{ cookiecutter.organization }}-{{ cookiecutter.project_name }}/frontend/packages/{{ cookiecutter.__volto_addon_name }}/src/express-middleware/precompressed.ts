@@ -0,0 +1,104 @@
+import fs from 'fs';
+import path from 'path';
+import type express from 'express';
+import type { NextFunction, Request, RequestHandler, Response } from 'express';
+
+// Static resources of the build (/static/...) from the .br and .gz
+// siblings that frontend/scripts/precompress.mjs writes in the image
+// build, for clients accepting the encoding. Others, and files without a
+// sibling, go to the wrapped static middleware.
+//
+// Volto serves the public directory with express.static before any
+// config.settings.expressMiddleware, so the siblings are chosen in a
+// wrapper of express.static itself (precompressedStatic).
+//
+// The build names these files by content hash, so they never change.
+
+type ServeStatic = (
+  root: string,
+  options?: Parameters<typeof express.static>[1],
+) => RequestHandler;
+
+// In order of preference, when the client accepts both
+const ENCODINGS: [string, string][] = [
+  ['br', '.br'],
+  ['gzip', '.gz'],
+];
+
+// Paths of the compressed siblings below `dir`, read once: the build does
+// not change
+function siblings(dir: string): Set<string> {
+  const result = new Set<string>();
+  if (fs.existsSync(dir)) {
+    for (const name of fs.readdirSync(dir, { recursive: true })) {
+      const file = path.join(dir, name.toString());
+      if (file.endsWith('.br') || file.endsWith('.gz')) {
+        result.add(file);
+      }
+    }
+  }
+  return result;
+}
+
+/**
+ * Middleware sending the precompressed siblings below `root`/static, and
+ * everything else through `serve`.
+ */
+export function precompressedMiddleware(
+  root: string,
+  serve: RequestHandler,
+): RequestHandler {
+  if (!root) {
+    throw new Error(
+      'No public directory to serve: set BUILD_DIR or RAZZLE_PUBLIC_DIR',
+    );
+  }
+  const staticDir = path.join(path.resolve(root), 'static');
+  let precompressed: Set<string> | undefined;
+
+  return function (req: Request, res: Response, next: NextFunction) {
+    if (
+      (req.method !== 'GET' && req.method !== 'HEAD') ||
+      !req.path.startsWith('/static/')
+    ) {
+      serve(req, res, next);
+      return;
+    }
+    // Caches must keep the encodings apart, whichever one is sent
+    res.vary('Accept-Encoding');
+    const file = path.join(staticDir, req.path.slice('/static'.length));
+    if (file.startsWith(staticDir + path.sep)) {
+      precompressed ??= siblings(staticDir);
+      for (const [encoding, suffix] of ENCODINGS) {
+        if (
+          req.acceptsEncodings(encoding) &&
+          precompressed.has(file + suffix)
+        ) {
+          res.type(path.extname(file));
+          res.set('Content-Encoding', encoding);
+          res.sendFile(
+            file + suffix,
+            { maxAge: '1y', immutable: true },
+            (err) => {
+              if (err) {
+                next(err);
+              }
+            },
+          );
+          return;
+        }
+      }
+    }
+    serve(req, res, next);
+  };
+}
+
+/**
+ * Replacement of express.static that serves precompressed siblings first.
+ */
+export function precompressedStatic(serveStatic: ServeStatic): ServeStatic {
+  const wrapped = (root: string, options?: Parameters<ServeStatic>[1]) =>
+    precompressedMiddleware(root, serveStatic(root, options));
+  wrapped.precompressed = true;
+  return wrapped;
+}
@@ -1,8 +1,10 @@
 import type { ConfigType } from '@plone/registry';
+import installServer from './config/server';
 import installSettings from './config/settings';
 
 function applyConfig(config: ConfigType) {
   installSettings(config);
+  installServer(config);
   return config;
 }
 
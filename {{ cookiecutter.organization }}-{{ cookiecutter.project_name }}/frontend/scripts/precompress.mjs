@@ -0,0 +1,75 @@
+// Write .br and .gz siblings of the static resources of a Volto build, e.g.
+//   node scripts/precompress.mjs core/packages/volto/build/public/static
+//
+// The production server sends them to clients that accept the encoding
+// (express-middleware/precompressed.ts in the addon), so text is
+// compressed once, at maximum level, instead of on every request.
+// woff/woff2 fonts and images are compressed already and are left alone.
+
+import fs from 'node:fs';
+import path from 'node:path';
+import zlib from 'node:zlib';
+
+const EXTENSIONS = new Set([
+  '.js',
+  '.mjs',
+  '.css',
+  '.json',
+  '.svg',
+  '.txt',
+  '.ttf',
+  '.otf',
+  '.eot',
+]);
+// Smaller files gain little and cost a request for the sibling lookup
+const MIN_SIZE = 1024;
+// A sibling is only written if it saves at least a tenth
+const MAX_RATIO = 0.9;
+
+const ENCODERS = {
+  '.br': (data) =>
+    zlib.brotliCompressSync(data, {
+      params: {
+        [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+        [zlib.constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+      },
+    }),
+  '.gz': (data) => zlib.gzipSync(data, { level: zlib.constants.Z_BEST_COMPRESSION }),
+};
+
+const root = process.argv[2];
+if (!root || !fs.existsSync(root)) {
+  console.error(`Usage: node precompress.mjs <directory>, got ${root}`);
+  process.exit(1);
+}
+
+let files = 0;
+let before = 0;
+let after = 0;
+for (const name of fs.readdirSync(root, { recursive: true })) {
+  const file = path.join(root, name);
+  if (!EXTENSIONS.has(path.extname(file)) || !fs.statSync(file).isFile()) {
+    continue;
+  }
+  const data = fs.readFileSync(file);
+  if (data.length < MIN_SIZE) {
+    continue;
+  }
+  let smallest = data.length;
+  for (const [suffix, encode] of Object.entries(ENCODERS)) {
+    const encoded = encode(data);
+    if (encoded.length <= data.length * MAX_RATIO) {
+      fs.writeFileSync(file + suffix, encoded);
+      smallest = Math.min(smallest, encoded.length);
+    }
+  }
+  // Count only the files that got a compressed sibling
+  if (smallest < data.length) {
+    files += 1;
+    before += data.length;
+    after += smallest;
+  }
+}
+
+const mb = (bytes) => (bytes / 1024 / 1024).toFixed(1);
+console.log(`Precompressed ${files} files in ${root}: ${mb(before)} MB, ${mb(after)} MB compressed`);